@@ -1,18 +1,45 @@
 from errors import (AssistantError,
+                    CircuitOpenError,
                     ConnectionFailedError,
+                    DeadlineExceededError,
                     NoSignalError,
                     OverrideError,
-                    DasApplicationNotRunningError)
-from json import dumps, loads
-from requests import (exceptions as requests_exceptions,
-                      get,
-                      post,
-                      Response)
-from settings import BASE_URL, COLORS, HEADERS, PID
-from threading import Thread
-from time import sleep
-from typing import Dict
-from urllib3 import exceptions as url_exceptions
+                    WatchFailedError)
+from event_bus import get_event_bus
+from file_watcher import get_file_watcher, WatchedPaths
+from math import inf
+from metrics import get_metrics_registry, MetricsRegistry
+from profiler import get_profiler
+from publisher import get_publisher
+from random import uniform
+from retry import RetryPolicy
+from settings import (COLORS,
+                      DEFAULT_DEADLINE_FRACTION,
+                      DEFAULT_OVERRUN_POLICY,
+                      DEFAULT_PRIORITY,
+                      DEFAULT_RETRY_ATTEMPTS,
+                      DEFAULT_RETRY_BASE_DELAY,
+                      DEFAULT_RETRY_MAX_DELAY,
+                      FILE_WATCH_SAFETY_DELAY,
+                      IS_FILE_WATCHING_ENABLED,
+                      IS_STATE_STORE_ENABLED,
+                      OVERRUN_POLICIES,
+                      OVERRUN_QUEUE_ONE,
+                      OVERRUN_SKIP,
+                      PID,
+                      PRIORITIES,
+                      RECONCILIATION_INTERVAL,
+                      SCHEDULING_JITTER,
+                      SHARD_COUNT)
+from state_store import AssistantSnapshot, get_state_store
+from threading import Event, Lock
+from time import monotonic, sleep, thread_time, time
+from traceback import print_exception
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+from worker_pool import get_concurrency_gauge, get_worker_pool, WorkerPool
+
+
+T = TypeVar('T')
 
 
 class Assistant:
@@ -26,9 +53,13 @@ class Assistant:
     color_identifier(state: str) -> str
     ```
 
+    NOTE: An assistant whose state only changes along with files may also
+    override `_get_watched_paths()` to be evaluated as soon as they change
+
     NOTE: Additionally, is a public method for initiating the binding
-    `create_binding()` Otherwise, all other methods are considered private and
-    should NOT be used externally
+    `create_binding()` and public methods for configuring the binding, which
+    are all named `set_...()` Otherwise, all other methods are considered
+    private and should NOT be used externally
 
     NOTE: Only use `__init__` to set variables, do not delay the driver by
     evaluating any complex logic
@@ -38,6 +69,25 @@ class Assistant:
         delay (str): the delay between evaluations
         zone_id (str): the zone_id to bind the color to
         is_muted (bool): flag to deliver with no message
+        overrun_policy (str): what happens when an evaluation is still
+            running once the next one is due (see `set_overrun_policy()`)
+        overrun_count (int): amount of evaluations that were due while the
+            previous evaluation was still running
+        deadline (float): seconds an evaluation may take (see
+            `set_deadline()`)
+        retry_policy (RetryPolicy): how calls made through `_retry()` are
+            retried (see `set_retry_policy()`)
+        min_delay (float): the shortest delay between evaluations
+        max_delay (float): the longest delay between evaluations
+        growth_factor (float): how much the delay grows after every
+            evaluation that found the same state (see
+            `set_adaptive_polling()`)
+        shard (Optional[int]): the worker process the assistant is pinned to
+            in `SHARDED_MODE` (see `set_shard()`)
+        priority (str): how urgent the evaluations and signals of the
+            assistant are (see `set_priority()`)
+        state_priorities (Dict[str, str]): the priority while in a given
+            state, instead of `priority`
 
     TODO: When DAS API implements `isMuted`, have the `isMuted` variable use
     the DAS API isMuted
@@ -53,6 +103,47 @@ class Assistant:
         self.is_muted: bool = is_muted
         self._ERROR_MESSAGE: str = name + ' is in an unknown state'
         self._ERROR_COLOR: str = COLORS['error']
+        self._TIMEOUT_MESSAGE: str = name + ' timed out'
+        self._TIMEOUT_COLOR: str = COLORS['timeout']
+        self._last_published_values: Optional[Tuple[str, str, bool]] = None
+        self._last_reconciled_at: float = -inf
+        self.overrun_policy: str = DEFAULT_OVERRUN_POLICY
+        self.overrun_count: int = 0
+        self._is_evaluating: bool = False
+        self._is_evaluation_pending: bool = False
+        self._evaluation_lock: Lock = Lock()
+        self.deadline: float = delay * DEFAULT_DEADLINE_FRACTION
+        self._deadline_at: float = inf
+        self.retry_policy: RetryPolicy = RetryPolicy(DEFAULT_RETRY_ATTEMPTS,
+                                                     DEFAULT_RETRY_BASE_DELAY,
+                                                     DEFAULT_RETRY_MAX_DELAY)
+        self.min_delay: float = delay
+        self.max_delay: float = delay
+        self.growth_factor: float = 1.0
+        self._current_delay: float = delay
+        self._last_state: Optional[str] = None
+        self._expedite_hook: Optional[Callable[[Assistant, float],
+                                               None]] = None
+        self.shard: Optional[int] = None
+        self.priority: str = DEFAULT_PRIORITY
+        self.state_priorities: Dict[str, str] = {}
+        self._cpu_seconds: float = 0.0
+        self._evaluation_count: int = 0
+        self._watch_id: Optional[int] = None
+        self._state_changed_at: Optional[float] = None
+        self._is_fully_watched: bool = False
+        self._restored_values: Optional[Tuple[str, str, bool]] = None
+
+    def __getstate__(self) -> Dict[str, object]:
+        # locks and hooks cannot be pickled into a spawned binding process
+        state: Dict[str, object] = dict(self.__dict__)
+        del state['_evaluation_lock']
+        state['_expedite_hook'] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, object]):
+        self.__dict__.update(state)
+        self._evaluation_lock = Lock()
 
     def state_identifier(self) -> str:
         """Identify the state that will then be used to identify color and message
@@ -96,18 +187,418 @@ class Assistant:
         """
         raise OverrideError(self.name, 'color')
 
-    def create_binding(self):
+    def set_overrun_policy(self, overrun_policy: str):
+        """Sets what happens when an evaluation is due while one is running
+
+        There is never more than one evaluation of an assistant running at a
+        time. When the next evaluation is due while the previous one is still
+        running, it is counted in `overrun_count` and then:
+        `OVERRUN_SKIP`: dropped
+        `OVERRUN_COALESCE`: merged with any other overrun into one evaluation
+            that starts on the same worker as soon as the running one ends
+        `OVERRUN_QUEUE_ONE`: merged with any other overrun into one evaluation
+            that is queued behind the work already waiting for the pool
+
+        Arguments:
+            overrun_policy (str): one of the `OVERRUN_POLICIES` in settings
+        """
+        if overrun_policy not in OVERRUN_POLICIES:
+            raise ValueError('Unknown overrun policy: ' + overrun_policy)
+        self.overrun_policy = overrun_policy
+
+    def set_deadline(self, deadline: float):
+        """Sets how many seconds an evaluation may take
+
+        When `state_identifier` fails after the deadline has passed, or the
+        time it has left is requested through `_get_remaining_time()` once
+        the deadline has passed, the assistant displays its timed-out color
+        and message rather than its error color and message. So does an
+        evaluation that finishes after the deadline, whose values are dropped
+
+        NOTE: A running evaluation is never interrupted, only blocking calls
+        that are given `_get_remaining_time()` as their timeout stop at the
+        deadline
+
+        NOTE: The deadline defaults to `DEFAULT_DEADLINE_FRACTION` of the
+        `delay`
+
+        Arguments:
+            deadline (float): seconds an evaluation may take
+        """
+        if deadline <= 0:
+            raise ValueError('The deadline must be positive: ' +
+                             str(deadline))
+        self.deadline = deadline
+
+    def set_retry_policy(self,
+                         max_attempts: int,
+                         base_delay: float = DEFAULT_RETRY_BASE_DELAY,
+                         max_delay: float = DEFAULT_RETRY_MAX_DELAY):
+        """Sets how calls made through `_retry()` are retried
+
+        NOTE: Retries never outlast the deadline, a retry that could not
+        start before it is not made at all
+
+        Arguments:
+            max_attempts (int): the most calls, 1 to never retry
+            base_delay (float): the most seconds before the first retry
+            max_delay (float): the most seconds before any retry
+        """
+        self.retry_policy = RetryPolicy(max_attempts, base_delay, max_delay)
+
+    def set_adaptive_polling(self,
+                             max_delay: float,
+                             growth_factor: float,
+                             min_delay: Optional[float] = None):
+        """Stretches the delay between evaluations while the state is stable
+
+        After every evaluation that found the same state as the previous one,
+        the delay is multiplied by `growth_factor` up to `max_delay`. As soon
+        as the state changes, the delay snaps back to `min_delay` and the next
+        evaluation is brought forward accordingly
+
+        NOTE: Failed evaluations all count as the same state
+
+        Arguments:
+            max_delay (float): the longest delay between evaluations
+            growth_factor (float): factor the delay grows by (at least 1)
+            min_delay (Optional[float]): the shortest delay between
+                evaluations, `delay` if not given
+        """
+        min_delay = self.delay if min_delay is None else min_delay
+        if min_delay <= 0 or max_delay < min_delay or growth_factor < 1:
+            raise ValueError('Invalid adaptive polling for ' + self.name +
+                             ': 0 < min_delay <= max_delay and ' +
+                             '1 <= growth_factor are required')
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.growth_factor = growth_factor
+        self._current_delay = min_delay
+
+    def set_shard(self, shard: int):
+        """Pins the assistant to one of the worker processes of `SHARDED_MODE`
+
+        NOTE: Assistants that are not pinned are spread over the shards by
+        the CPU they were measured to use in previous runs
+
+        Arguments:
+            shard (int): index of the shard, below `SHARD_COUNT`
+        """
+        if not 0 <= shard < SHARD_COUNT:
+            raise ValueError('The shard of ' + self.name + ' must be ' +
+                             'between 0 and ' + str(SHARD_COUNT - 1) + ': ' +
+                             str(shard))
+        self.shard = shard
+
+    def set_priority(self,
+                     priority: str,
+                     state_priorities: Optional[Dict[str, str]] = None):
+        """Sets how urgent the evaluations and signals of the assistant are
+
+        Under contention, evaluations waiting for the worker pool and signals
+        waiting to be published go in the order of `PRIORITIES`, so urgent
+        states are not held up by routine checks. The priority of the state
+        found by the last evaluation applies to the next evaluation and to
+        the signal of the state
+
+        Arguments:
+            priority (str): one of the `PRIORITIES` in settings
+            state_priorities (Optional[Dict[str, str]]): priorities of given
+                states, which override `priority` while in them. The
+                current `state_priorities` are kept if not given
+        """
+        if state_priorities is None:
+            state_priorities = self.state_priorities
+        for value in [priority] + list(state_priorities.values()):
+            if value not in PRIORITIES:
+                raise ValueError('Unknown priority for ' + self.name + ': ' +
+                                 value)
+        self.priority = priority
+        self.state_priorities = dict(state_priorities)
+
+    def create_binding(self, phase: float = 0.0):
         """Binds the assistant to `self.zone_id` and set every `self.delay`
 
-        NOTE: A value evaluator thread is spawned and then the assistant calls
-        `sleep(self.delay)`
+        NOTE: An evaluation is handed to the pool of worker threads and then
+        the assistant waits for the current delay, unless the next evaluation
+        is brought forward by `_expedite_evaluation()`
+
+        Arguments:
+            phase (float): seconds to wait before the first evaluation
         """
+        next_evaluation_at: float = monotonic() + phase
+        wakeup: Event = Event()
+
+        def expedite(assistant: Assistant, delay: float):
+            nonlocal next_evaluation_at
+            next_evaluation_at = min(next_evaluation_at, monotonic() + delay)
+            wakeup.set()
+
+        self._expedite_hook = expedite
+        self._publish_restored_values()
+        self._start_watching()
         while 1:
             try:
-                Thread(target=self._evaluate_values).start()
-                sleep(self.delay)
+                wakeup.clear()
+                if monotonic() >= next_evaluation_at:
+                    self._request_evaluation(get_worker_pool())
+                    next_evaluation_at = monotonic() + self._get_next_delay()
+                wakeup.wait(max(0.0, next_evaluation_at - monotonic()))
             except KeyboardInterrupt:
+                self._stop_watching()
+                return
+
+    def _get_watched_paths(self) -> Optional[WatchedPaths]:
+        """Returns the paths whose changes should trigger an evaluation
+
+        Whenever the paths change, an evaluation starts once they stopped
+        changing for `FILE_WATCH_DEBOUNCE` seconds, and if every change is
+        noticed, the assistant is polled only every `FILE_WATCH_SAFETY_DELAY`
+        seconds (unless its delay is longer)
+
+        NOTE: Called once the binding starts, in the process that evaluates
+        the assistant. Without any paths (the default) or if they cannot be
+        watched, the assistant is polled every `delay` as usual
+        """
+        return None
+
+    def _start_watching(self):
+        if not IS_FILE_WATCHING_ENABLED or self._watch_id is not None:
+            return
+        try:
+            watched_paths: Optional[WatchedPaths] = self._get_watched_paths()
+            if watched_paths is None:
+                return
+            self._watch_id = get_file_watcher().watch(
+                watched_paths,
+                self._on_watched_paths_changed)
+        except AssistantError as e:
+            e.elaborate()
+            return
+        except OSError as e:
+            WatchFailedError(self.name, str(e)).elaborate()
+            return
+        # edits deep inside a tree are only noticed with watchdog
+        self._is_fully_watched = (get_file_watcher().is_recursive or
+                                  len(watched_paths.trees) == 0)
+
+    def _stop_watching(self):
+        if self._watch_id is not None:
+            get_file_watcher().unwatch(self._watch_id)
+            self._watch_id = None
+            self._is_fully_watched = False
+
+    def _get_persisted_fields(self) -> Dict[str, object]:
+        """Returns the internal fields to remember between runs
+
+        NOTE: Override this along with `_restore_persisted_fields()` for
+        anything change detection depends on that cannot be derived from the
+        last state, such as the version a `YamlAssistant` last saw. The
+        fields must be JSON serializable. There are none by default
+        """
+        return {}
+
+    def _restore_persisted_fields(self, fields: Dict[str, object]):
+        """Restores what `_get_persisted_fields()` returned in the last run
+
+        NOTE: A `KeyError`, `TypeError` or `ValueError` raised here discards
+        the whole snapshot, so the assistant simply starts cold
+        """
+        return
+
+    def _restore_snapshot(self, snapshot: AssistantSnapshot) -> bool:
+        """Picks up where the assistant left off in the last run
+
+        The last state and the persisted fields are restored, and the values
+        last published are published again once the binding starts, so the
+        keyboard lights up before the first evaluation
+
+        NOTE: Called by the driver before the assistant is bound
+
+        Returns:
+            bool: whether the snapshot was restored, which it is not if it
+                belongs to another type of assistant or cannot be read
+        """
+        if snapshot.get('type') != type(self).__name__:
+            return False
+        try:
+            color, message, is_blinking = snapshot['values']
+            self._restore_persisted_fields(snapshot['fields'])
+            self._last_state = str(snapshot['state'])
+            self._restored_values = (str(color),
+                                     str(message),
+                                     bool(is_blinking))
+        except (KeyError, TypeError, ValueError):
+            return False
+        return True
+
+    def _publish_restored_values(self):
+        if self._restored_values is None:
+            return
+        self._set_values(*self._restored_values)
+        self._last_published_values = self._restored_values
+        self._last_reconciled_at = monotonic()
+        self._restored_values = None
+
+    def _record_snapshot(self,
+                         state: str,
+                         values: Tuple[str, str, bool]):
+        get_state_store().record(self.name, {
+            'type': type(self).__name__,
+            'state': state,
+            'values': list(values),
+            'fields': self._get_persisted_fields(),
+        })
+
+    def _on_watched_paths_changed(self):
+        get_metrics_registry().increment(self.name, 'triggers')
+        with self._evaluation_lock:
+            if self._is_evaluating:
+                # the running evaluation may have missed the change, so
+                # another one follows it whatever the overrun policy
+                self._is_evaluation_pending = True
                 return
+        self._expedite_evaluation(0.0)
+
+    def _get_next_delay(self) -> float:
+        delay: float = self._current_delay
+        if self._is_fully_watched:
+            delay = max(delay, FILE_WATCH_SAFETY_DELAY)
+        return delay * (1 + uniform(0, SCHEDULING_JITTER))
+
+    def _expedite_evaluation(self, delay: float):
+        """Brings the next evaluation forward to at most `delay` seconds away
+
+        NOTE: Whatever drives the binding (`create_binding()` or a
+        `Scheduler`) installs the hook that reschedules the evaluation
+        """
+        if self._expedite_hook is not None:
+            self._expedite_hook(self, delay)
+
+    def _update_current_delay(self, state: Optional[str]):
+        if state == self._last_state:
+            self._current_delay = min(self._current_delay * self.growth_factor,
+                                      self.max_delay)
+        else:
+            is_stretched: bool = self._current_delay > self.min_delay
+            self._current_delay = self.min_delay
+            if is_stretched:
+                self._expedite_evaluation(self.min_delay)
+        self._last_state = state
+
+    def _get_priority(self) -> str:
+        # a failed or first evaluation has no state, so `priority` applies
+        return self.state_priorities.get(self._last_state, self.priority)
+
+    def _request_evaluation(self, executor: WorkerPool):
+        with self._evaluation_lock:
+            if self._is_evaluating:
+                self.overrun_count += 1
+                get_metrics_registry().increment(self.name, 'overruns')
+                if self.overrun_policy != OVERRUN_SKIP:
+                    self._is_evaluation_pending = True
+                return
+            self._is_evaluating = True
+        self._submit_evaluations(executor)
+
+    def _submit_evaluations(self, executor: WorkerPool):
+        priority: str = self._get_priority()
+        executor.submit_with_priority(priority,
+                                      self._run_evaluations,
+                                      executor,
+                                      priority,
+                                      monotonic())
+
+    def _run_evaluations(self,
+                         executor: WorkerPool,
+                         priority: str,
+                         submitted_at: float):
+        get_metrics_registry().observe_queueing_delay(
+            'evaluation', priority, monotonic() - submitted_at)
+        while 1:
+            get_concurrency_gauge().enter()
+            started_cpu_seconds: float = thread_time()
+            try:
+                get_profiler().run(self.name, self._evaluate_values)
+            except AssistantError as e:
+                e.elaborate()
+                get_metrics_registry().increment(self.name,
+                                                 'errors',
+                                                 type(e).__name__)
+            except Exception as e:
+                print_exception(type(e), e, e.__traceback__)
+            self._cpu_seconds += thread_time() - started_cpu_seconds
+            self._evaluation_count += 1
+            get_concurrency_gauge().exit()
+            with self._evaluation_lock:
+                is_evaluation_pending: bool = self._is_evaluation_pending
+                self._is_evaluation_pending = False
+                if not is_evaluation_pending:
+                    self._is_evaluating = False
+            if not is_evaluation_pending:
+                return
+            if self.overrun_policy == OVERRUN_QUEUE_ONE:
+                self._submit_evaluations(executor)
+                return
+
+    def _wait_until_idle(self, timeout: float) -> bool:
+        """Waits for the running evaluation to finish, if there is one
+
+        NOTE: An evaluation waiting for the worker pool counts as running
+
+        Arguments:
+            timeout (float): the most seconds to wait
+
+        Returns:
+            bool: whether no evaluation is running anymore
+        """
+        deadline: float = monotonic() + timeout
+        while self._is_evaluating:
+            if monotonic() >= deadline:
+                return False
+            sleep(0.01)
+        return True
+
+    def _get_cost(self) -> Optional[float]:
+        """Returns the share of a core the evaluations were measured to use
+
+        NOTE: Only CPU used by the evaluating thread is measured, which is
+        what contends for the GIL, and `None` is returned before the first
+        evaluation
+        """
+        if self._evaluation_count == 0:
+            return None
+        return self._cpu_seconds / self._evaluation_count / self.delay
+
+    def _get_remaining_time(self) -> float:
+        """Returns the seconds left before the current evaluation times out
+
+        Every blocking call made by `state_identifier` (requests, subprocesses,
+        git commands, etc.) should pass this as its timeout, so that a stuck
+        call is abandoned or killed and its resources are actually freed
+
+        NOTE: If the deadline has already passed, a `DeadlineExceededError`
+        is raised instead
+        """
+        remaining_time: float = self._deadline_at - monotonic()
+        if remaining_time <= 0:
+            raise DeadlineExceededError(self.name, self.deadline)
+        return remaining_time
+
+    def _retry(self, function: Callable[[], T]) -> T:
+        """Returns what the function returns, retrying transient errors
+
+        Network assistants should make their requests through this, so that
+        a dropped connection or a 503 does not turn into an error right away.
+        The function should pass `_get_remaining_time()` as its timeout
+
+        NOTE: Retries never outlast the deadline of the evaluation, see
+        `RetryPolicy`
+        """
+        return self.retry_policy.call(self.name, function, self._deadline_at)
+
+    def _is_past_deadline(self) -> bool:
+        return monotonic() >= self._deadline_at
 
     def _get_all_signals(self) -> Dict[str, str]:
         """
@@ -116,36 +607,59 @@ class Assistant:
 
         url = BASE_URL + '/pid/'+ PID + '/zoneId/' + self.zone_id
         response = get(url, headers=HEADERS)
+
+        NOTE: The signal is looked up by the `Publisher` of the process. The
+        `DasPublisher` serves the full `/shadows` list from the `ShadowCache`
+        shared by every assistant in the process, so it is downloaded at most
+        once every `SHADOW_CACHE_INTERVAL` seconds
+
+        NOTE: A `DasApplicationNotRunningError` is not handled here, it ends
+        the evaluation and is elaborated by the worker that ran it. Once the
+        `CircuitBreaker` opens, a `CircuitOpenError` is raised instead. The
+        lookup is not retried past the deadline of the evaluation
         """
-        url: str = BASE_URL + '/shadows'
-        try:
-            response: Response = get(url, headers=HEADERS)
-        except (requests_exceptions.ConnectionError,
-                url_exceptions.NewConnectionError):
-            e: DasApplicationNotRunningError = (
-                DasApplicationNotRunningError(self.name))
-            e.elaborate()
-            exit()
-        if response.ok:
-            for signal in loads(response.content):
-                if signal['zoneId'] == self.zone_id:
-                    return signal
-            raise NoSignalError(self.name, self.zone_id)
-        else:
-            raise ConnectionFailedError(self.name,
-                                        'GET',
-                                        response.status_code)
+        with get_metrics_registry().time(self.name, 'shadow_get'):
+            return get_publisher().get_signal(self.name,
+                                              self.zone_id,
+                                              self._deadline_at)
 
     def _set_values_if_changed(self,
                                color: str,
                                message: str,
                                is_blinking: bool = False):
+        """Publishes the values unless they are already displayed on the zone
+
+        NOTE: The values last published by the assistant are remembered, so
+        evaluations that produce unchanged values make no requests at all.
+        Only once every `RECONCILIATION_INTERVAL` seconds are the values
+        compared against the Das API, which republishes any signal that was
+        dismissed from the Das Keyboard Dashboard
+        """
+        values: Tuple[str, str, bool] = (color, message, is_blinking)
+        is_reconciliation_due: bool = (
+            monotonic() - self._last_reconciled_at >= RECONCILIATION_INTERVAL)
+        if self._last_published_values is None or is_reconciliation_due:
+            self._reconcile_values(color, message, is_blinking)
+        elif values != self._last_published_values:
+            self._set_values(color, message, is_blinking)
+        else:
+            get_metrics_registry().increment(self.name, 'publishes', 'skipped')
+            return
+        self._last_published_values = values
+        self._last_reconciled_at = monotonic()
+
+    def _reconcile_values(self,
+                          color: str,
+                          message: str,
+                          is_blinking: bool = False):
         all_values: Dict[str, str]
         try:
             all_values = self._get_all_signals()
         except ConnectionFailedError:
             raise
-        except NoSignalError as e:
+        except (CircuitOpenError, NoSignalError) as e:
+            # while the Das API is down, the values are held by the
+            # `PublishQueue` and published once it recovers
             e.elaborate()
             self._set_values(color, message, is_blinking)
             return
@@ -153,11 +667,19 @@ class Assistant:
         current_message: str = all_values['message']
         if current_color != color or current_message != message:
             self._set_values(color, message, is_blinking)
+        else:
+            get_metrics_registry().increment(self.name, 'publishes', 'skipped')
 
     def _set_values(self,
                     color: str,
                     message: str,
                     is_blinking: bool = False):
+        """
+        NOTE: The values are not posted here, they are handed to the
+        `Publisher` of the process. The `DasPublisher` queues them in the
+        `PublishQueue` whose single writer thread posts only the newest values
+        of each zone, most urgent first, with the priority of the last state
+        """
         set_color_request: Dict[str, str] = {
             'pid': PID,
             'zoneId': self.zone_id,
@@ -166,35 +688,98 @@ class Assistant:
             'name': self.name,
             'effect': 'BLINK' if is_blinking else 'SET_COLOR'
         }
-        try:
-            response: Response = post(BASE_URL,
-                                      data=dumps(set_color_request),
-                                      headers=HEADERS)
-        except (requests_exceptions.ConnectionError,
-                url_exceptions.NewConnectionError):
-            e: DasApplicationNotRunningError = (
-                DasApplicationNotRunningError(self.name))
-            e.elaborate()
-            exit()
-        if not response.ok:
-            raise ConnectionFailedError(self.name,
-                                        'POST',
-                                        response.status_code)
+        get_publisher().put(self.name,
+                            set_color_request,
+                            self._forget_published_values,
+                            self._get_priority())
+
+    def _forget_published_values(self):
+        self._last_published_values = None
 
     def _set_error_if_changed(self):
         self._set_values_if_changed(self._ERROR_COLOR,
                                     self._ERROR_MESSAGE,
                                     True)
 
+    def _set_timeout_if_changed(self):
+        self._set_values_if_changed(self._TIMEOUT_COLOR,
+                                    self._TIMEOUT_MESSAGE,
+                                    False)
+
+    def _emit_state_change(self,
+                           state: Optional[str],
+                           color: str,
+                           message: str,
+                           started_at: float):
+        """Emits the change from `self._last_state` to the given state
+
+        NOTE: A state of `None` means the evaluation failed, or for the old
+        state, that there was no evaluation before
+        """
+        now: float = monotonic()
+        get_event_bus().emit({
+            'assistant': self.name,
+            'zone_id': self.zone_id,
+            'old_state': self._last_state,
+            'new_state': state,
+            'color': color,
+            'message': message,
+            'time': time(),
+            'evaluation_seconds': now - started_at,
+            'old_state_seconds': (None if self._state_changed_at is None
+                                  else now - self._state_changed_at),
+        })
+        self._state_changed_at = now
+
     def _evaluate_values(self):
+        metrics: MetricsRegistry = get_metrics_registry()
+        metrics.increment(self.name, 'evaluations')
+        started_at: float = monotonic()
+        self._deadline_at = started_at + self.deadline
         try:
-            state: str = self.state_identifier()
-            color: str = self.color_identifier(state)
-            message: str = self.message_identifier(state)
+            with metrics.time(self.name, 'state_identifier'):
+                state: str = self.state_identifier()
+            with metrics.time(self.name, 'color_identifier'):
+                color: str = self.color_identifier(state)
+            with metrics.time(self.name, 'message_identifier'):
+                message: str = self.message_identifier(state)
+            if self._is_past_deadline():
+                # the values are late even if nothing noticed the deadline,
+                # so they are never displayed as if they were on time
+                raise DeadlineExceededError(self.name, self.deadline)
         except AssistantError as e:
             e.elaborate()
-            self._set_error_if_changed()
+            metrics.increment(self.name, 'errors', type(e).__name__)
+            is_past_deadline: bool = self._is_past_deadline()
+            if self._last_state is not None:
+                metrics.increment(self.name, 'state_changes')
+                if is_past_deadline:
+                    self._emit_state_change(None,
+                                            self._TIMEOUT_COLOR,
+                                            self._TIMEOUT_MESSAGE,
+                                            started_at)
+                else:
+                    self._emit_state_change(None,
+                                            self._ERROR_COLOR,
+                                            self._ERROR_MESSAGE,
+                                            started_at)
+            self._update_current_delay(None)
+            if is_past_deadline:
+                self._set_timeout_if_changed()
+            else:
+                self._set_error_if_changed()
             return
+        if state != self._last_state:
+            metrics.increment(self.name, 'state_changes')
+            self._emit_state_change(state,
+                                    color,
+                                    '' if self.is_muted else message,
+                                    started_at)
+        self._update_current_delay(state)
         self._set_values_if_changed(color,
                                     '' if self.is_muted else message,
                                     False)
+        if IS_STATE_STORE_ENABLED:
+            self._record_snapshot(state,
+                                  (color, '' if self.is_muted else message,
+                                   False))
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+from argparse import ArgumentParser, Namespace
+from das_client import set_das_base_url
+from fake_das_server import FakeDasServer
+from json import dumps
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from os import path
+from psutil import Process as SystemProcess
+from publisher import (create_publisher,
+                       get_publisher,
+                       MemoryPublisher,
+                       Publisher,
+                       set_publisher)
+from scheduler import Scheduler
+from settings import (BASE_URL,
+                      DAS_PUBLISHER,
+                      MEMORY_PUBLISHER,
+                      NULL_PUBLISHER,
+                      SHUTDOWN_GRACE_PERIOD,
+                      STATE_FLUSH_INTERVAL,
+                      STATE_PATH)
+from state_store import set_state_store, StateStore
+from synthetic_assistant import SyntheticAssistant
+from tempfile import TemporaryDirectory
+from time import monotonic, sleep
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+
+def run_fake_server(connection: Connection,
+                    port: int,
+                    latency: float,
+                    error_rate: float,
+                    is_recording: bool):
+    """Serves the fake Das API until the benchmark asks for its records
+
+    NOTE: The server runs in its own process so that its CPU, memory and
+    threads are not counted as the driver's
+    """
+    server: FakeDasServer = FakeDasServer('127.0.0.1',
+                                          port,
+                                          urlsplit(BASE_URL).path,
+                                          latency,
+                                          error_rate,
+                                          is_recording)
+    server.start()
+    connection.send(server.get_base_url())
+    connection.recv()
+    server.stop()
+    connection.send((server.request_counts, server.received_signals))
+
+
+def use_temporary_state_store() -> TemporaryDirectory:
+    """Keeps the snapshots of the synthetic assistants in a new directory
+
+    NOTE: Otherwise they would replace the snapshots in `STATE_PATH`, which
+    the driver restores its zones from. The snapshots are still written like
+    the driver does, so their cost is measured
+
+    Returns:
+        TemporaryDirectory: the directory, to clean up once done
+    """
+    state_directory: TemporaryDirectory = TemporaryDirectory()
+    set_state_store(StateStore(path.join(state_directory.name,
+                                         path.basename(STATE_PATH)),
+                               STATE_FLUSH_INTERVAL))
+    return state_directory
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if len(sorted_values) == 0:
+        return 0.0
+    index: int = min(len(sorted_values) - 1,
+                     int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def measure_publish_latencies(
+        assistants: List[SyntheticAssistant],
+        received_signals: List[Tuple[float, Dict[str, str]]]) -> List[float]:
+    """Returns the seconds from identifying every state to receiving it
+
+    NOTE: Only the first time a message was received counts, so a state that
+    was republished after a failed request includes the time to recover
+    """
+    assistants_by_zone: Dict[str, SyntheticAssistant] = {
+        assistant.zone_id: assistant for assistant in assistants}
+    received: Set[Tuple[str, str]] = set()
+    latencies: List[float] = []
+    for received_at, signal in received_signals:
+        key: Tuple[str, str] = (signal['zoneId'], signal['message'])
+        if key in received or signal['zoneId'] not in assistants_by_zone:
+            continue
+        received.add(key)
+        changed_at: Dict[str, float] = (
+            assistants_by_zone[signal['zoneId']].changed_at)
+        if signal['message'] in changed_at:
+            latencies.append(received_at - changed_at[signal['message']])
+    return sorted(latencies)
+
+
+def run_benchmark(arguments: Namespace) -> Dict[str, object]:
+    """Runs synthetic assistants against a fake Das API and reports on them
+
+    The assistants are scheduled exactly like the driver does in
+    `EVENT_LOOP_MODE`, and every resource is sampled from this process only
+
+    NOTE: With the memory or null publisher, no fake Das API is started and
+    the assistants publish without any network, so only their own cost is
+    measured
+    """
+    publisher: Publisher = create_publisher(arguments.publisher)
+    if isinstance(publisher, MemoryPublisher):
+        publisher.is_recording = True
+    set_publisher(publisher)
+    connection, server_connection = Pipe()
+    server: Optional[Process] = None
+    if arguments.publisher == DAS_PUBLISHER:
+        server = Process(target=run_fake_server,
+                         args=(server_connection,
+                               arguments.port,
+                               arguments.latency,
+                               arguments.error_rate,
+                               True),
+                         daemon=True)
+        server.start()
+        set_das_base_url(connection.recv())
+    state_directory: TemporaryDirectory = use_temporary_state_store()
+    assistants: List[SyntheticAssistant] = [
+        SyntheticAssistant('Synthetic ' + str(index),
+                           arguments.delay,
+                           'BENCH_' + str(index),
+                           False,
+                           arguments.cpu_cost,
+                           arguments.io_cost,
+                           arguments.change_interval)
+        for index in range(arguments.assistants)]
+    process: SystemProcess = SystemProcess()
+    cpu_before: float = sum(process.cpu_times()[:2])
+    rss_samples: List[int] = [process.memory_info().rss]
+    thread_samples: List[int] = [process.num_threads()]
+    scheduler: Scheduler = Scheduler(assistants)
+    started_at: float = monotonic()
+    scheduler.start()
+    while monotonic() - started_at < arguments.duration:
+        sleep(arguments.sample_interval)
+        rss_samples.append(process.memory_info().rss)
+        thread_samples.append(process.num_threads())
+    scheduler.stop(SHUTDOWN_GRACE_PERIOD)
+    get_publisher().close(SHUTDOWN_GRACE_PERIOD)
+    elapsed: float = monotonic() - started_at
+    state_directory.cleanup()
+    cpu_seconds: float = sum(process.cpu_times()[:2]) - cpu_before
+    request_counts: Dict[str, int] = {}
+    received_signals: List[Tuple[float, Dict[str, str]]] = []
+    if server is not None:
+        connection.send('stop')
+        request_counts, received_signals = connection.recv()
+        server.join()
+    elif isinstance(publisher, MemoryPublisher):
+        received_signals = publisher.received_signals
+    evaluation_count: int = sum(assistant.evaluation_count
+                                for assistant in assistants)
+    latencies: List[float] = measure_publish_latencies(assistants,
+                                                       received_signals)
+    return {
+        'parameters': vars(arguments),
+        'elapsed_seconds': elapsed,
+        'evaluations': evaluation_count,
+        'requests': request_counts,
+        'requests_per_evaluation': (sum(request_counts.values()) /
+                                    max(1, evaluation_count)),
+        'publish_latency_seconds': {
+            'count': len(latencies),
+            'p50': percentile(latencies, 0.50),
+            'p90': percentile(latencies, 0.90),
+            'p99': percentile(latencies, 0.99),
+            'max': latencies[-1] if len(latencies) > 0 else 0.0,
+        },
+        'cpu_percent': 100 * cpu_seconds / elapsed,
+        'rss_bytes': {
+            'start': rss_samples[0],
+            'peak': max(rss_samples),
+            'end': rss_samples[-1],
+        },
+        'threads': {
+            'start': thread_samples[0],
+            'peak': max(thread_samples),
+            'end': thread_samples[-1],
+        },
+        'peak_concurrency': scheduler.get_peak_concurrency(),
+        'overruns': sum(assistant.overrun_count for assistant in assistants),
+    }
+
+
+def parse_arguments() -> Namespace:
+    parser: ArgumentParser = ArgumentParser(
+        description='Benchmarks the driver against a fake Das API')
+    parser.add_argument('--assistants', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=30.0,
+                        help='seconds to run the assistants for')
+    parser.add_argument('--delay', type=float, default=1.0,
+                        help='seconds between evaluations of an assistant')
+    parser.add_argument('--cpu-cost', type=float, default=0.001,
+                        help='seconds of CPU every evaluation spends')
+    parser.add_argument('--io-cost', type=float, default=0.05,
+                        help='seconds every evaluation blocks for')
+    parser.add_argument('--change-interval', type=int, default=5,
+                        help='evaluations between two state changes')
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='seconds the fake Das API takes to answer')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of requests answered with a 500')
+    parser.add_argument('--port', type=int, default=27311,
+                        help='port of the fake Das API')
+    parser.add_argument('--publisher',
+                        choices=[DAS_PUBLISHER,
+                                 MEMORY_PUBLISHER,
+                                 NULL_PUBLISHER],
+                        default=DAS_PUBLISHER,
+                        help='publish to a fake Das API, to memory, or ' +
+                             'nowhere')
+    parser.add_argument('--sample-interval', type=float, default=0.25,
+                        help='seconds between samples of RSS and threads')
+    parser.add_argument('--output',
+                        help='file to write the results to instead of stdout')
+    return parser.parse_args()
+
+
+def main():
+    """Runs one benchmark and prints its results as JSON
+
+    NOTE: The benchmark can simply be run by navigating to this directory and
+    running `./benchmark.py`, see `./benchmark.py --help` for its parameters.
+    Runs are compared by diffing their JSON results
+    """
+    results: Dict[str, object] = run_benchmark(parse_arguments())
+    output: str = dumps(results, indent=2, sort_keys=True)
+    if results['parameters']['output'] is None:
+        print(output)
+    else:
+        with open(results['parameters']['output'], 'w') as output_file:
+            output_file.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
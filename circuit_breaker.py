@@ -0,0 +1,92 @@
+from errors import CircuitOpenError
+from math import inf
+from threading import Lock
+from time import monotonic
+from typing import Callable, List
+
+
+# the states of a `CircuitBreaker`
+CLOSED: str = 'closed'
+OPEN: str = 'open'
+HALF_OPEN: str = 'half open'
+
+
+class CircuitBreaker:
+    """Stops calling the Das API once it keeps failing, until it recovers
+
+    `CLOSED`: every call goes through, until `failure_threshold` calls in a
+        row fail and the breaker opens
+    `OPEN`: every call fails right away with a `CircuitOpenError`, without
+        touching the network, for `recovery_interval` seconds
+    `HALF_OPEN`: a single call goes through as a probe while every other
+        call still fails right away. If the probe succeeds, the breaker
+        closes and every recovery callback is called, otherwise it opens
+        again
+
+    NOTE: Every call must be preceded by `before_call()` and followed by
+    either `record_success()` or `record_failure()`
+
+    Attributes:
+        failure_threshold (int): failed calls in a row that open the breaker
+        recovery_interval (float): seconds between two probes
+        state (str): `CLOSED`, `OPEN` or `HALF_OPEN`
+    """
+    def __init__(self, failure_threshold: int, recovery_interval: float):
+        self.failure_threshold: int = failure_threshold
+        self.recovery_interval: float = recovery_interval
+        self.state: str = CLOSED
+        self._failure_count: int = 0
+        self._opened_at: float = -inf
+        self._is_probing: bool = False
+        self._recovery_callbacks: List[Callable[[], None]] = []
+        self._lock: Lock = Lock()
+
+    def before_call(self, name: str):
+        """Raises a `CircuitOpenError` unless the call may go through
+
+        Arguments:
+            name (str): name of the caller, used for errors
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if (self.state == OPEN and
+                    monotonic() - self._opened_at >= self.recovery_interval):
+                self.state = HALF_OPEN
+                self._is_probing = False
+            if self.state == HALF_OPEN and not self._is_probing:
+                self._is_probing = True
+                return
+            raise CircuitOpenError(name, self._get_time_until_probe())
+
+    def record_success(self):
+        with self._lock:
+            is_recovering: bool = self.state != CLOSED
+            self.state = CLOSED
+            self._failure_count = 0
+            self._is_probing = False
+            recovery_callbacks: List[Callable[[], None]] = list(
+                self._recovery_callbacks)
+        if is_recovering:
+            for recovery_callback in recovery_callbacks:
+                recovery_callback()
+
+    def record_failure(self):
+        with self._lock:
+            self._failure_count += 1
+            if (self.state == HALF_OPEN or
+                    self._failure_count >= self.failure_threshold):
+                self.state = OPEN
+                self._opened_at = monotonic()
+                self._is_probing = False
+
+    def add_recovery_callback(self, recovery_callback: Callable[[], None]):
+        """Calls back whenever the breaker closes after having opened"""
+        with self._lock:
+            self._recovery_callbacks.append(recovery_callback)
+
+    def _get_time_until_probe(self) -> float:
+        if self.state == HALF_OPEN:
+            # the probe in flight opens the breaker again unless it succeeds
+            return self.recovery_interval
+        return max(0.0, self._opened_at + self.recovery_interval - monotonic())
@@ -0,0 +1,398 @@
+from assistant import Assistant
+from hashlib import sha256
+from inspect import Parameter, signature, Signature
+from json import dump, dumps, load
+from os import replace
+from registry import ASSISTANT_MODULES, get_assistant_registry
+from typing import (Callable,
+                    Dict,
+                    get_type_hints,
+                    List,
+                    Optional,
+                    Tuple,
+                    Union)
+
+
+# the keys of an assistant entry that are not constructor arguments
+TYPE_KEY: str = 'type'
+CONFIGURE_KEY: str = 'configure'
+
+# an assistant compiled from the config:
+# {'type': class name, 'arguments': {...}, 'configure': {...}}
+AssistantSpec = Dict[str, object]
+
+
+class ConfigError(ValueError):
+    """Raised when the config cannot be turned into assistants
+
+    Every problem found is listed, not only the first one
+
+    Attributes:
+        problems (List[str]): what is wrong with the config
+    """
+    def __init__(self, problems: List[str]):
+        ValueError.__init__(self, '\n'.join(problems))
+        self.problems: List[str] = problems
+
+
+def load_config(path: str, cache_path: str) -> List[Assistant]:
+    """Builds the assistants declared in the YAML config at the given path
+
+    The config lists the assistants by the name of their class, along with
+    their constructor arguments and, under `configure`, the arguments of
+    their `set_...()` methods:
+    ```
+    assistants:
+      - type: CPUAssistant
+        name: Python CPU
+        delay: 5
+        zone_id: '8,0'
+        is_muted: true
+        process_name: python
+        configure:
+          overrun_policy: coalesce
+          adaptive_polling: {max_delay: 60, growth_factor: 2}
+    ```
+
+    NOTE: The config is validated once, then compiled into specs that are
+    cached at `cache_path` along with a hash of the config, so a restart with
+    an unchanged config neither parses YAML nor validates anything again
+
+    NOTE: A `ConfigError` is raised if the config is invalid
+    """
+    return build_assistants(load_specs(path, cache_path))
+
+
+def load_specs(path: str, cache_path: str) -> List[AssistantSpec]:
+    """Returns the compiled specs of the YAML config at the given path
+
+    NOTE: The specs are served from the cache at `cache_path` while the
+    config is unchanged, see `load_config()`
+    """
+    with open(path, 'rb') as config_file:
+        source: bytes = config_file.read()
+    digest: str = _hash_source(source)
+    specs: Optional[List[AssistantSpec]] = _load_cached_specs(cache_path,
+                                                              digest)
+    if specs is None:
+        specs = compile_config(_parse_yaml(path, source))
+        _save_cached_specs(cache_path, digest, specs)
+    return specs
+
+
+def compile_config(document: object) -> List[AssistantSpec]:
+    """Validates the parsed config and compiles it into assistant specs
+
+    Every entry is checked against the constructor of its class and the
+    `set_...()` methods it configures, including the types of the values
+    wherever they are annotated. The assistant is then built and configured
+    once, so the setters reject values such as an unknown priority or a
+    negative deadline before the specs are cached
+
+    NOTE: A `ConfigError` is raised listing every problem found. Names,
+    zones and delays are checked across every entry, even the entries that
+    have other problems
+    """
+    if not isinstance(document, dict) or not isinstance(
+            document.get('assistants'), list):
+        raise ConfigError(['The config must be a mapping with a list of ' +
+                           '`assistants`'])
+    problems: List[str] = []
+    specs: List[AssistantSpec] = []
+    for index, entry in enumerate(document['assistants']):
+        spec: Optional[AssistantSpec] = _compile_entry(index, entry, problems)
+        if spec is not None:
+            specs.append(spec)
+    problems.extend(check_specs([
+        {TYPE_KEY: entry.get(TYPE_KEY),
+         'arguments': _get_arguments(entry)}
+        for entry in document['assistants'] if isinstance(entry, dict)]))
+    if len(problems) > 0:
+        raise ConfigError(problems)
+    return specs
+
+
+def check_specs(specs: List[AssistantSpec]) -> List[str]:
+    """Returns every name or zone used twice and every delay that is invalid
+    """
+    problems: List[str] = []
+    names: Dict[str, int] = {}
+    zone_ids: Dict[str, str] = {}
+    for spec in specs:
+        arguments: Dict[str, object] = spec['arguments']
+        name: str = get_spec_name(spec)
+        names[name] = names.get(name, 0) + 1
+        if names[name] == 2:
+            problems.append('More than one assistant is named ' + name)
+        zone_id: str = str(arguments.get('zone_id'))
+        if zone_id in zone_ids:
+            problems.append(name + ' is bound to zone ' + zone_id +
+                            ', which is already bound to ' +
+                            zone_ids[zone_id])
+        else:
+            zone_ids[zone_id] = name
+        delay: object = arguments.get('delay')
+        if not _is_valid_delay(delay):
+            problems.append(name + ' must have a positive delay, not ' +
+                            str(delay))
+    return problems
+
+
+def get_spec_name(spec: AssistantSpec) -> str:
+    """Returns the name of the assistant of a compiled spec"""
+    return str(spec['arguments'].get('name'))
+
+
+def diff_specs(
+        running_specs: Dict[str, AssistantSpec],
+        specs: List[AssistantSpec]) -> Tuple[List[str], List[str], List[str]]:
+    """Compares compiled specs against the running ones by assistant name
+
+    NOTE: An assistant whose arguments or `configure` settings differ in any
+    way is changed, and a renamed assistant is removed and added
+
+    Arguments:
+        running_specs (Dict[str, AssistantSpec]): the specs of the running
+            assistants, by name
+        specs (List[AssistantSpec]): the specs of the new config
+
+    Returns:
+        Tuple[List[str], List[str], List[str]]: the names of the assistants
+            that were added, removed and changed
+    """
+    names: List[str] = [get_spec_name(spec) for spec in specs]
+    added: List[str] = [name for name in names if name not in running_specs]
+    removed: List[str] = [name for name in running_specs if name not in names]
+    changed: List[str] = [get_spec_name(spec) for spec in specs
+                          if get_spec_name(spec) in running_specs and
+                          running_specs[get_spec_name(spec)] != spec]
+    return added, removed, changed
+
+
+def check_assistants(assistants: List[Assistant]) -> List[str]:
+    """Returns every name or zone used twice and every delay that is invalid
+
+    NOTE: Used for assistants built by `init_assistants()` in config.py
+    """
+    return check_specs([{TYPE_KEY: type(assistant).__name__,
+                         'arguments': {'name': assistant.name,
+                                       'zone_id': assistant.zone_id,
+                                       'delay': assistant.delay}}
+                        for assistant in assistants])
+
+
+def build_assistants(specs: List[AssistantSpec]) -> List[Assistant]:
+    """Builds and configures the assistants of compiled specs
+
+    NOTE: A `ConfigError` listing every assistant that cannot be built is
+    raised, which only happens when an assistant class or the settings it
+    is validated against (such as `SHARD_COUNT`) changed since the specs
+    were compiled
+    """
+    assistants: List[Assistant] = []
+    problems: List[str] = []
+    for spec in specs:
+        try:
+            assistants.append(build_assistant(spec))
+        except (TypeError, ValueError) as e:
+            problems.append(get_spec_name(spec) + ': ' + str(e))
+    if len(problems) > 0:
+        raise ConfigError(problems)
+    return assistants
+
+
+def build_assistant(spec: AssistantSpec) -> Assistant:
+    """Builds and configures the assistant of a single compiled spec"""
+    assistant: Assistant = get_assistant_registry().create(
+        spec[TYPE_KEY],
+        **spec['arguments'])
+    for setting, value in spec[CONFIGURE_KEY].items():
+        _configure(assistant, setting, value)
+    return assistant
+
+
+def _configure(assistant: Assistant, setting: str, value: object):
+    setter: Callable[..., None] = getattr(assistant, 'set_' + setting)
+    if isinstance(value, dict):
+        setter(**value)
+    else:
+        setter(value)
+
+
+def _get_arguments(entry: Dict[str, object]) -> Dict[str, object]:
+    return {key: value for key, value in entry.items()
+            if key not in (TYPE_KEY, CONFIGURE_KEY)}
+
+
+def _is_valid_delay(delay: object) -> bool:
+    return (isinstance(delay, (int, float)) and
+            not isinstance(delay, bool) and delay > 0)
+
+
+def _compile_entry(index: int,
+                   entry: object,
+                   problems: List[str]) -> Optional[AssistantSpec]:
+    if not isinstance(entry, dict) or TYPE_KEY not in entry:
+        problems.append('Assistant #' + str(index + 1) + ' must be a ' +
+                        'mapping with a `' + TYPE_KEY + '`')
+        return None
+    arguments: Dict[str, object] = _get_arguments(entry)
+    label: str = str(arguments.get('name', 'Assistant #' + str(index + 1)))
+    try:
+        assistant_class: type = get_assistant_registry().get_class(
+            str(entry[TYPE_KEY]))
+    except (ImportError, ValueError) as e:
+        problems.append(label + ': ' + str(e))
+        return None
+    initial_problem_count: int = len(problems)
+    _check_call(label, assistant_class.__init__, arguments, problems)
+    configure: object = entry.get(CONFIGURE_KEY, {})
+    if not isinstance(configure, dict):
+        problems.append(label + ': `' + CONFIGURE_KEY + '` must be a ' +
+                        'mapping of settings')
+        return None
+    for setting, value in configure.items():
+        setter: Optional[Callable[..., None]] = getattr(
+            assistant_class, 'set_' + str(setting), None)
+        if setter is None:
+            problems.append(label + ': there is no setting ' + str(setting))
+            continue
+        setter_arguments: Dict[str, object]
+        if isinstance(value, dict):
+            setter_arguments = value
+        else:
+            # a single value is the first argument after `self`
+            first_parameter: str = list(
+                signature(setter).parameters.keys())[1]
+            setter_arguments = {first_parameter: value}
+        _check_call(label + ' (' + str(setting) + ')',
+                    setter,
+                    setter_arguments,
+                    problems)
+    if len(problems) > initial_problem_count:
+        return None
+    spec: AssistantSpec = {TYPE_KEY: entry[TYPE_KEY],
+                           'arguments': arguments,
+                           CONFIGURE_KEY: configure}
+    if _is_valid_delay(arguments.get('delay')):
+        # an invalid delay is reported by `check_specs()` instead
+        _check_settings(label, spec, problems)
+    if len(problems) > initial_problem_count:
+        return None
+    return spec
+
+
+def _check_settings(label: str, spec: AssistantSpec, problems: List[str]):
+    # the setters validate what their annotations cannot express, such as
+    # the allowed priorities or the range of a shard
+    try:
+        assistant: Assistant = get_assistant_registry().create(
+            spec[TYPE_KEY],
+            **spec['arguments'])
+    except (TypeError, ValueError) as e:
+        problems.append(label + ': ' + str(e))
+        return
+    for setting, value in spec[CONFIGURE_KEY].items():
+        try:
+            _configure(assistant, setting, value)
+        except (TypeError, ValueError) as e:
+            problems.append(label + ' (' + setting + '): ' + str(e))
+
+
+def _check_call(label: str,
+                function: Callable[..., object],
+                arguments: Dict[str, object],
+                problems: List[str]):
+    function_signature: Signature = signature(function)
+    try:
+        function_signature.bind(None, **arguments)
+    except TypeError as e:
+        problems.append(label + ': ' + str(e))
+        return
+    type_hints: Dict[str, object] = get_type_hints(function)
+    # delays are checked by `check_specs()`, and fractions of a second are
+    # fine even where a delay is annotated as an int
+    type_hints.pop('delay', None)
+    for parameter_name, value in arguments.items():
+        parameter: Parameter = function_signature.parameters[parameter_name]
+        if parameter.name in type_hints and not _matches_type(
+                value, type_hints[parameter.name]):
+            problems.append(label + ': ' + parameter_name + ' must be ' +
+                            _describe_type(type_hints[parameter.name]) +
+                            ', not ' + dumps(value, default=str))
+
+
+def _matches_type(value: object, annotation: object) -> bool:
+    origin: object = getattr(annotation, '__origin__', None)
+    type_arguments: Tuple[object, ...] = getattr(annotation, '__args__', ())
+    if origin is Union:
+        return any(_matches_type(value, type_argument)
+                   for type_argument in type_arguments)
+    if origin is list:
+        return isinstance(value, list) and all(
+            _matches_type(item, type_arguments[0]) for item in value)
+    if origin is dict:
+        return isinstance(value, dict) and all(
+            _matches_type(key, type_arguments[0]) and
+            _matches_type(item, type_arguments[1])
+            for key, item in value.items())
+    if annotation is type(None):
+        return value is None
+    if annotation is float:
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if annotation is int:
+        return isinstance(value, int) and not isinstance(value, bool)
+    if isinstance(annotation, type):
+        return isinstance(value, annotation)
+    # anything more elaborate is left to the constructor
+    return True
+
+
+def _describe_type(annotation: object) -> str:
+    if isinstance(annotation, type):
+        return annotation.__name__
+    return str(annotation).replace('typing.', '')
+
+
+def _hash_source(source: bytes) -> str:
+    # the registered modules are hashed too, since they decide what is valid
+    return sha256(source + dumps(ASSISTANT_MODULES,
+                                 sort_keys=True).encode()).hexdigest()
+
+
+def _parse_yaml(path: str, source: bytes) -> object:
+    # YAML is only needed when the config changed since it was cached
+    from yaml import load as load_yaml, YAMLError
+    try:
+        from yaml import CSafeLoader as SafeLoader
+    except ImportError:
+        from yaml import SafeLoader
+    try:
+        return load_yaml(source, Loader=SafeLoader)
+    except YAMLError as e:
+        raise ConfigError([path + ' is not valid YAML: ' + str(e)])
+
+
+def _load_cached_specs(cache_path: str,
+                       digest: str) -> Optional[List[AssistantSpec]]:
+    try:
+        with open(cache_path) as cache_file:
+            cache: Dict[str, object] = load(cache_file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or cache.get('digest') != digest:
+        return None
+    return cache.get('specs')
+
+
+def _save_cached_specs(cache_path: str,
+                       digest: str,
+                       specs: List[AssistantSpec]):
+    try:
+        with open(cache_path + '.tmp', 'w') as cache_file:
+            dump({'digest': digest, 'specs': specs}, cache_file)
+        replace(cache_path + '.tmp', cache_path)
+    except (OSError, TypeError):
+        # values JSON cannot hold, such as YAML dates, are not cached, and
+        # without a cache the next start simply compiles the config again
+        return
@@ -34,7 +34,9 @@ class CPUAssistant(Assistant):
         try:
             for process in process_iter():
                 if self.process_name.lower() in process.name().lower():
-                    cpu_pct: float = process.cpu_percent(interval=self.delay)
+                    # sample over half of the time left before the deadline
+                    cpu_pct: float = process.cpu_percent(
+                        interval=self._get_remaining_time() / 2)
                     if cpu_pct is None or  0.0 < cpu_pct <= 50.0:
                         return self.LOW
                     elif 50.0 < cpu_pct <= 100.0:
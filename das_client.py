@@ -0,0 +1,194 @@
+from circuit_breaker import CircuitBreaker
+from errors import ConnectionFailedError, DasApplicationNotRunningError
+from json import dumps, loads
+from math import inf
+from requests import exceptions as requests_exceptions, Response, Session
+from requests.adapters import HTTPAdapter
+from retry import RetryPolicy
+from settings import (BASE_URL,
+                      DAS_CONNECT_TIMEOUT,
+                      DAS_FAILURE_THRESHOLD,
+                      DAS_POOL_SIZE,
+                      DAS_READ_TIMEOUT,
+                      DAS_RECOVERY_INTERVAL,
+                      DAS_RETRY_ATTEMPTS,
+                      DAS_RETRY_BASE_DELAY,
+                      DAS_RETRY_MAX_DELAY,
+                      HEADERS,
+                      PID)
+from threading import Lock
+from typing import Dict, List, Optional
+from urllib3 import exceptions as url_exceptions
+
+
+class DasClient:
+    """A client for the Das Keyboard signals API built on a keep-alive pool
+
+    Every request goes through one `requests.Session`, so connections to the
+    Das API are kept alive and reused rather than opened and torn down for
+    every call
+
+    NOTE: If the Das API cannot be reached, does not answer within the
+    timeouts, or answers with a response that cannot be read, a
+    `DasApplicationNotRunningError` is raised. If it answers with a status
+    code that is not ok, a `ConnectionFailedError` is raised
+
+    NOTE: Every request goes through the `circuit_breaker`, so once the Das
+    API keeps failing, a `CircuitOpenError` is raised right away instead.
+    Only unreachable Das APIs and server errors count as failures
+
+    NOTE: Requests failing with a transient error are retried by the
+    `retry_policy`, every attempt going through the `circuit_breaker`
+
+    Attributes:
+        base_url (str): the url of the signals API
+        connect_timeout (float): seconds to wait for a connection
+        read_timeout (float): seconds to wait for a response
+        pool_size (int): the maximum amount of kept-alive connections
+        circuit_breaker (CircuitBreaker): shared by every request
+        retry_policy (RetryPolicy): retries every request
+    """
+    def __init__(self,
+                 base_url: str,
+                 connect_timeout: float,
+                 read_timeout: float,
+                 pool_size: int,
+                 circuit_breaker: CircuitBreaker,
+                 retry_policy: RetryPolicy):
+        self.base_url: str = base_url
+        self.connect_timeout: float = connect_timeout
+        self.read_timeout: float = read_timeout
+        self.pool_size: int = pool_size
+        self.circuit_breaker: CircuitBreaker = circuit_breaker
+        self.retry_policy: RetryPolicy = retry_policy
+        self._session: Session = Session()
+        self._session.headers.update(HEADERS)
+        adapter: HTTPAdapter = HTTPAdapter(pool_connections=1,
+                                           pool_maxsize=pool_size)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def list_shadows(self,
+                     name: str,
+                     deadline_at: float = inf) -> List[Dict[str, str]]:
+        """Returns every signal currently displayed on the keyboard
+
+        Arguments:
+            name (str): name of the caller, used for errors
+            deadline_at (float): the `monotonic()` time after which no
+                retry starts, such as the deadline of an evaluation
+        """
+        response: Response = self._request(name,
+                                           'GET',
+                                           self.base_url + '/shadows',
+                                           deadline_at=deadline_at)
+        try:
+            return loads(response.content)
+        except ValueError:
+            raise DasApplicationNotRunningError(name)
+
+    def set_signal(self, name: str, signal: Dict[str, str]):
+        """Displays the signal on the zone given by its `zoneId`
+
+        Arguments:
+            name (str): name of the caller, used for errors
+            signal (Dict[str, str]): the signal to display
+        """
+        self._request(name, 'POST', self.base_url, dumps(signal))
+
+    def delete_signal(self, name: str, zone_id: str):
+        """Clears the signal this application displays on the given zone
+
+        Arguments:
+            name (str): name of the caller, used for errors
+            zone_id (str): the zone_id of the signal
+        """
+        self._request(name,
+                      'DELETE',
+                      self.base_url + '/pid/' + PID + '/zoneId/' + zone_id)
+
+    def close(self):
+        """Closes every kept-alive connection"""
+        self._session.close()
+
+    def _request(self,
+                 name: str,
+                 method: str,
+                 url: str,
+                 data: Optional[str] = None,
+                 deadline_at: float = inf) -> Response:
+        return self.retry_policy.call(
+            name,
+            lambda: self._request_once(name, method, url, data),
+            deadline_at)
+
+    def _request_once(self,
+                      name: str,
+                      method: str,
+                      url: str,
+                      data: Optional[str]) -> Response:
+        self.circuit_breaker.before_call(name)
+        try:
+            response: Response = self._session.request(
+                method,
+                url,
+                data=data,
+                timeout=(self.connect_timeout, self.read_timeout))
+        except (requests_exceptions.RequestException,
+                url_exceptions.NewConnectionError,
+                ValueError):
+            # such as refused connections, timeouts, or a broken response
+            self.circuit_breaker.record_failure()
+            raise DasApplicationNotRunningError(name)
+        except Exception:
+            # a probe that neither succeeds nor fails would block every probe
+            self.circuit_breaker.record_failure()
+            raise
+        if response.status_code >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+        if not response.ok:
+            raise ConnectionFailedError(name, method, response.status_code)
+        return response
+
+
+_das_client: Optional[DasClient] = None
+_das_client_lock: Lock = Lock()
+_das_base_url: str = BASE_URL
+
+
+def get_das_client() -> DasClient:
+    """Returns the `DasClient` shared by everything in this process
+
+    NOTE: The client is created lazily so that forked bindings never inherit
+    the kept-alive connections of their parent
+    """
+    global _das_client
+    with _das_client_lock:
+        if _das_client is None:
+            _das_client = DasClient(_das_base_url,
+                                    DAS_CONNECT_TIMEOUT,
+                                    DAS_READ_TIMEOUT,
+                                    DAS_POOL_SIZE,
+                                    CircuitBreaker(DAS_FAILURE_THRESHOLD,
+                                                   DAS_RECOVERY_INTERVAL),
+                                    RetryPolicy(DAS_RETRY_ATTEMPTS,
+                                                DAS_RETRY_BASE_DELAY,
+                                                DAS_RETRY_MAX_DELAY))
+        return _das_client
+
+
+def set_das_base_url(base_url: str):
+    """Points the `DasClient` of this process at another signals API
+
+    NOTE: Only clients created afterwards are affected, so this should be
+    called before anything is published, such as by the benchmarks, which
+    run against `fake_das_server.py`
+
+    Arguments:
+        base_url (str): the url of the signals API
+    """
+    global _das_base_url
+    with _das_client_lock:
+        _das_base_url = base_url
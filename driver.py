@@ -1,34 +1,273 @@
 #!/usr/bin/env python3
 from assistant import Assistant
-from config import init_assistants
-from errors import DasApplicationNotRunningError
-from json import loads
-from multiprocessing import Process
-from requests import delete, exceptions as requests_exceptions, get, Response
-from settings import BASE_URL, HEADERS, PID
-from typing import List
-from urllib3 import exceptions as url_exceptions
+from concurrent.futures import ThreadPoolExecutor
+from config_loader import (AssistantSpec,
+                           build_assistants,
+                           check_assistants,
+                           ConfigError,
+                           diff_specs,
+                           get_spec_name,
+                           load_specs)
+from das_client import get_das_client
+from errors import AssistantError
+from event_bus import (ChannelEventBus,
+                       EventStreamServer,
+                       get_event_bus,
+                       set_event_bus)
+from metrics import (ChannelMetricsRegistry,
+                     get_metrics_registry,
+                     MetricsRegistry,
+                     set_metrics_registry,
+                     start_metrics_server)
+from multiprocessing import Process, Queue
+from os import path, stat, stat_result
+from profiler import apply_profiling_forever, get_profiler
+from publisher import get_publisher, Publisher
+from scheduler import compute_phases, Scheduler
+from settings import (CONFIG_CACHE_PATH,
+                      CONFIG_PATH,
+                      CONFIG_RELOAD_INTERVAL,
+                      DAS_POOL_SIZE,
+                      DRIVER_MODE,
+                      EVENT_LOOP_MODE,
+                      EVENT_SOCKET_PATH,
+                      IS_CONFIG_RELOAD_ENABLED,
+                      IS_EVENT_STREAM_ENABLED,
+                      IS_METRICS_ENABLED,
+                      IS_STATE_STORE_ENABLED,
+                      METRICS_FORWARD_INTERVAL,
+                      METRICS_HOST,
+                      METRICS_PORT,
+                      PROCESS_MODE,
+                      PROFILED_ASSISTANTS,
+                      SHARD_COSTS_PATH,
+                      SHARD_COUNT,
+                      SHARDED_MODE,
+                      SHUTDOWN_GRACE_PERIOD)
+from shard import ShardSupervisor
+from signal import SIGINT, SIG_IGN, SIGTERM, signal
+from state_store import (AssistantSnapshot,
+                         ChannelStateStore,
+                         get_state_store,
+                         set_state_store,
+                         StateStore)
+from sys import exit
+from threading import Event, Lock, Thread
+from time import monotonic
+from traceback import print_exception
+from types import FrameType
+from typing import Dict, List, Optional, Set, Tuple
+from worker_pool import get_worker_pool
 
 
+DRIVER_NAME: str = 'Keyboard Driver'
+
 all_bindings: List[Process] = []
+all_bindings_by_name: Dict[str, Process] = {}
+# the channels profiling is toggled through, by the name of the binding
+all_profile_channels_by_name: Dict[str, Queue] = {}
+all_schedulers: List[Scheduler] = []
+all_supervisors: List[ShardSupervisor] = []
+all_event_stream_servers: List[EventStreamServer] = []
+all_assistants_by_name: Dict[str, Assistant] = {}
+# the compiled specs of the bound assistants, when they come from the YAML
+# config, by name
+all_specs: Dict[str, AssistantSpec] = {}
+# the names of the assistants being profiled, in whichever process
+profiled_names: Set[str] = set(PROFILED_ASSISTANTS)
+# held while bindings are initiated or killed
+bindings_lock: Lock = Lock()
+# held for a whole reload, so that two reloads never diff the same specs
+reload_lock: Lock = Lock()
+extinguished: Event = Event()
 
 
-def kill_all_bindings():
-    for binding in all_bindings:
-        binding.terminate()
-    url: str = BASE_URL + '/shadows'
+def load_assistants() -> List[Assistant]:
+    """Builds every assistant the driver should bind
+
+    The assistants declared in the YAML config at `CONFIG_PATH` are built if
+    it exists, otherwise `init_assistants()` is imported from config.py
+
+    NOTE: A `ConfigError` is raised if the assistants are invalid, such as
+    two assistants bound to the same zone, before anything is bound
+    """
+    if path.exists(CONFIG_PATH):
+        specs: List[AssistantSpec] = load_specs(CONFIG_PATH, CONFIG_CACHE_PATH)
+        all_specs.clear()
+        all_specs.update({get_spec_name(spec): spec for spec in specs})
+        return build_assistants(specs)
+    from config import init_assistants
+    all_assistants: List[Assistant] = init_assistants()
+    problems: List[str] = check_assistants(all_assistants)
+    if len(problems) > 0:
+        raise ConfigError(problems)
+    return all_assistants
+
+
+def clear_zone(publisher: Publisher, zone_id: str):
     try:
-        response: Response = get(url, headers=HEADERS)
-    except (requests_exceptions.ConnectionError,
-            url_exceptions.NewConnectionError):
-        e: DasApplicationNotRunningError = (
-            DasApplicationNotRunningError('Keyboard Driver'))
+        publisher.clear_signal(DRIVER_NAME, zone_id)
+    except AssistantError as e:
         e.elaborate()
-        exit()
-    for signal in loads(response.content):
-        zone_id: str = signal['zoneId']
-        delete(BASE_URL + '/pid/' + PID + '/zoneId/' + zone_id,
-               headers=HEADERS)
+
+
+def clear_zones(zone_ids: List[str]):
+    publisher: Publisher = get_publisher()
+    with ThreadPoolExecutor(max_workers=DAS_POOL_SIZE) as executor:
+        for zone_id in zone_ids:
+            executor.submit(clear_zone, publisher, zone_id)
+
+
+def kill_all_bindings():
+    """Shuts every binding down and clears the zones they were bound to
+
+    Scheduling stops first, then running evaluations are given up to
+    `SHUTDOWN_GRACE_PERIOD` seconds to finish, and finally every zone bound
+    to an assistant of this driver is cleared with concurrent requests
+
+    NOTE: Signals displayed by other applications are left untouched
+    """
+    extinguished.set()
+    with bindings_lock:
+        started_at: float = monotonic()
+        grace_deadline: float = started_at + SHUTDOWN_GRACE_PERIOD
+        for scheduler in all_schedulers:
+            scheduler.stop(SHUTDOWN_GRACE_PERIOD)
+            print('Peak concurrent evaluations: ' +
+                  str(scheduler.get_peak_concurrency()))
+        get_publisher().close(max(0.0, grace_deadline - monotonic()))
+        for binding in all_bindings:
+            binding.terminate()
+        for binding in all_bindings:
+            binding.join(max(0.0, grace_deadline - monotonic()))
+            if binding.is_alive():
+                binding.kill()
+        for supervisor in all_supervisors:
+            supervisor.save_costs(max(0.0, grace_deadline - monotonic()))
+        get_state_store().flush()
+        clear_zones([assistant.zone_id
+                     for assistant in all_assistants_by_name.values()])
+        get_das_client().close()
+        for server in all_event_stream_servers:
+            server.stop()
+        print('Extinguished in ' + format(monotonic() - started_at, '.2f') +
+              ' seconds')
+
+
+def kill_bindings(assistants: List[Assistant], kept_zone_ids: List[str]):
+    """Shuts the bindings of some assistants down while the driver runs
+
+    Like in `kill_all_bindings()`, running evaluations of the assistants are
+    given up to `SHUTDOWN_GRACE_PERIOD` seconds to finish, and then their
+    zones are cleared, except for the `kept_zone_ids` that other assistants
+    are about to be bound to
+
+    NOTE: The bindings of every other assistant keep running undisturbed
+    """
+    grace_deadline: float = monotonic() + SHUTDOWN_GRACE_PERIOD
+    zone_ids: List[str] = [assistant.zone_id for assistant in assistants]
+    if DRIVER_MODE == EVENT_LOOP_MODE:
+        all_schedulers[0].remove(assistants, SHUTDOWN_GRACE_PERIOD)
+        get_publisher().discard(zone_ids,
+                                max(0.0, grace_deadline - monotonic()))
+    elif DRIVER_MODE == PROCESS_MODE:
+        bindings: List[Process] = [
+            all_bindings_by_name.pop(assistant.name)
+            for assistant in assistants]
+        for binding in bindings:
+            binding.terminate()
+        for binding in bindings:
+            binding.join(max(0.0, grace_deadline - monotonic()))
+            if binding.is_alive():
+                binding.kill()
+            all_bindings.remove(binding)
+        for assistant in assistants:
+            del all_profile_channels_by_name[assistant.name]
+    else:
+        all_supervisors[0].remove_assistants(assistants,
+                                             SHUTDOWN_GRACE_PERIOD)
+    for assistant in assistants:
+        del all_assistants_by_name[assistant.name]
+    get_state_store().forget([assistant.name for assistant in assistants])
+    clear_zones([zone_id for zone_id in zone_ids
+                 if zone_id not in kept_zone_ids])
+
+
+def raise_keyboard_interrupt(signal_number: int, frame: Optional[FrameType]):
+    raise KeyboardInterrupt
+
+
+def run_binding(assistant: Assistant,
+                phase: float,
+                event_channel: Queue,
+                state_channel: Queue,
+                metrics_channel: Queue,
+                profile_channel: Queue):
+    """Runs the binding of the assistant inside its own process
+
+    The process ignores SIGINT and leaves shutting down to the driver, which
+    sends SIGTERM. The binding then stops, waits for a running evaluation to
+    finish, and drops any signal that was not published yet
+
+    NOTE: State changes are sent to the `EventBus` of the driver over the
+    `event_channel`, snapshots to its `StateStore` over the `state_channel`,
+    and metrics to its `MetricsRegistry` over the `metrics_channel`. The
+    driver toggles profiling over the `profile_channel`
+    """
+    signal(SIGINT, SIG_IGN)
+    signal(SIGTERM, raise_keyboard_interrupt)
+    set_event_bus(ChannelEventBus(event_channel))
+    set_state_store(ChannelStateStore(state_channel))
+    metrics: ChannelMetricsRegistry = ChannelMetricsRegistry(
+        metrics_channel, METRICS_FORWARD_INTERVAL)
+    set_metrics_registry(metrics)
+    Thread(target=apply_profiling_forever,
+           args=(profile_channel,),
+           name='Profiling',
+           daemon=True).start()
+    assistant.create_binding(phase)
+    get_worker_pool().shutdown(wait=True)
+    get_publisher().close(SHUTDOWN_GRACE_PERIOD)
+    metrics.flush()
+
+
+def set_profiling(name: str, is_enabled: bool):
+    """Enables or disables profiling in the process evaluating the assistant
+
+    NOTE: Binding processes and shards are told over a channel, and dump
+    their stats to `PROFILE_DIRECTORY` themselves
+    """
+    if DRIVER_MODE == EVENT_LOOP_MODE:
+        get_profiler().set_enabled(name, is_enabled)
+    elif DRIVER_MODE == PROCESS_MODE:
+        all_profile_channels_by_name[name].put((name, is_enabled))
+    else:
+        all_supervisors[0].set_profiling(name, is_enabled)
+
+
+def apply_profiling(assistants: List[Assistant]):
+    # new binding processes and shards only profile `PROFILED_ASSISTANTS`
+    for assistant in assistants:
+        is_enabled: bool = assistant.name in profiled_names
+        if is_enabled != (assistant.name in PROFILED_ASSISTANTS):
+            set_profiling(assistant.name, is_enabled)
+
+
+def toggle_profiling(name: str):
+    with bindings_lock:
+        if name not in all_assistants_by_name:
+            print('There is no assistant named ' + name)
+            return
+        is_enabled: bool = name not in profiled_names
+        if is_enabled:
+            profiled_names.add(name)
+        else:
+            profiled_names.discard(name)
+        set_profiling(name, is_enabled)
+    if is_enabled:
+        print('Profiling ' + name)
+    else:
+        print('Stopped profiling ' + name)
 
 
 def initiate_binding(binding: Process):
@@ -36,6 +275,177 @@ def initiate_binding(binding: Process):
     all_bindings.append(binding)
 
 
+def initiate_processes(all_assistants: List[Assistant]):
+    phases: Dict[Assistant, float] = compute_phases(all_assistants)
+    for assistant in all_assistants:
+        profile_channel: Queue = Queue()
+        binding: Process = Process(target=run_binding,
+                                   args=(assistant,
+                                         phases[assistant],
+                                         get_event_bus().get_channel(),
+                                         get_state_store().get_channel(),
+                                         get_metrics_registry().get_channel(),
+                                         profile_channel))
+        initiate_binding(binding)
+        all_bindings_by_name[assistant.name] = binding
+        all_profile_channels_by_name[assistant.name] = profile_channel
+
+
+def initiate_scheduler(scheduler: Scheduler):
+    scheduler.start()
+    all_schedulers.append(scheduler)
+
+
+def initiate_supervisor(supervisor: ShardSupervisor,
+                        all_assistants: List[Assistant]):
+    supervisor.start(all_assistants)
+    all_supervisors.append(supervisor)
+    all_bindings.extend(supervisor.processes)
+
+
+def initiate_event_stream_server(server: EventStreamServer):
+    server.start()
+    all_event_stream_servers.append(server)
+
+
+def restore_assistants(assistants: List[Assistant]):
+    """Restores the assistants from the snapshots the last run left behind
+
+    NOTE: The restored values are published as soon as the bindings start,
+    see `Assistant._restore_snapshot()`
+    """
+    state_store: StateStore = get_state_store()
+    for assistant in assistants:
+        snapshot: Optional[AssistantSnapshot] = state_store.get_snapshot(
+            assistant.name)
+        if snapshot is not None and assistant._restore_snapshot(snapshot):
+            # kept until the assistant records a snapshot of its own
+            state_store.record(assistant.name, snapshot)
+
+
+def initiate_all_bindings(all_assistants: List[Assistant]):
+    if IS_STATE_STORE_ENABLED:
+        restore_assistants(all_assistants)
+    with bindings_lock:
+        for assistant in all_assistants:
+            all_assistants_by_name[assistant.name] = assistant
+        if DRIVER_MODE == EVENT_LOOP_MODE:
+            initiate_scheduler(Scheduler(all_assistants))
+        elif DRIVER_MODE == PROCESS_MODE:
+            initiate_processes(all_assistants)
+        elif DRIVER_MODE == SHARDED_MODE:
+            initiate_supervisor(ShardSupervisor(SHARD_COUNT,
+                                                SHARD_COSTS_PATH),
+                                all_assistants)
+        else:
+            raise ValueError('Unknown DRIVER_MODE: ' + DRIVER_MODE)
+
+
+def initiate_bindings(assistants: List[Assistant]):
+    """Binds more assistants while the driver runs
+
+    NOTE: The bindings of every other assistant keep running undisturbed
+    """
+    for assistant in assistants:
+        all_assistants_by_name[assistant.name] = assistant
+    if DRIVER_MODE == EVENT_LOOP_MODE:
+        all_schedulers[0].add(assistants)
+    elif DRIVER_MODE == PROCESS_MODE:
+        initiate_processes(assistants)
+    else:
+        all_bindings.extend(all_supervisors[0].add_assistants(assistants))
+    apply_profiling(assistants)
+
+
+def reload_config():
+    """Applies the changes made to the YAML config to the running bindings
+
+    The new config is compiled and compared against the running assistants
+    by name. Only the bindings of assistants that were removed or changed in
+    any way are killed, and only those of assistants that were added or
+    changed are initiated, so the zones of every other assistant keep their
+    signal
+
+    NOTE: If the new config is invalid, its problems are printed and the
+    running bindings are left untouched
+
+    NOTE: How long the reload took and how many bindings it affected is
+    printed and recorded in the metrics of the driver
+
+    NOTE: Reloads run one at a time, so a reload from the watcher and one
+    from 'R' never both apply the same changes
+    """
+    with reload_lock:
+        started_at: float = monotonic()
+        try:
+            specs: List[AssistantSpec] = load_specs(CONFIG_PATH,
+                                                    CONFIG_CACHE_PATH)
+            added, removed, changed = diff_specs(all_specs, specs)
+            specs_by_name: Dict[str, AssistantSpec] = {
+                get_spec_name(spec): spec for spec in specs}
+            new_assistants: List[Assistant] = build_assistants(
+                [specs_by_name[name] for name in added + changed])
+        except ConfigError as e:
+            print('The config was not reloaded, it is invalid:')
+            for problem in e.problems:
+                print('  ' + problem)
+            return
+        except OSError as e:
+            print('The config was not reloaded: ' + str(e))
+            return
+        with bindings_lock:
+            if extinguished.is_set():
+                return
+            kill_bindings([all_assistants_by_name[name]
+                           for name in removed + changed],
+                          [str(spec['arguments'].get('zone_id'))
+                           for spec in specs])
+            initiate_bindings(new_assistants)
+            all_specs.clear()
+            all_specs.update(specs_by_name)
+        seconds: float = monotonic() - started_at
+        metrics: MetricsRegistry = get_metrics_registry()
+        metrics.observe(DRIVER_NAME, 'config_reload', seconds)
+        for action, names in (('started', added),
+                              ('stopped', removed),
+                              ('restarted', changed)):
+            for _ in names:
+                metrics.increment(DRIVER_NAME, 'reloaded_bindings', action)
+        print('Reloaded the config in ' + format(seconds * 1000, '.1f') +
+              ' ms: ' + str(len(added)) + ' started, ' + str(len(removed)) +
+              ' stopped, ' + str(len(changed)) + ' restarted')
+
+
+def get_config_version() -> Optional[Tuple[int, int]]:
+    try:
+        config_stat: stat_result = stat(CONFIG_PATH)
+    except OSError:
+        return None
+    return config_stat.st_mtime_ns, config_stat.st_size
+
+
+def watch_config_forever(version: Optional[Tuple[int, int]]):
+    """Reloads the YAML config whenever it changes until the driver shuts down
+
+    NOTE: The modification time and size of the config are compared every
+    `CONFIG_RELOAD_INTERVAL` seconds
+
+    Arguments:
+        version (Optional[Tuple[int, int]]): the modification time and size
+            of the config the running assistants were built from
+    """
+    while not extinguished.wait(CONFIG_RELOAD_INTERVAL):
+        current_version: Optional[Tuple[int, int]] = get_config_version()
+        if current_version is None or current_version == version:
+            continue
+        version = current_version
+        try:
+            reload_config()
+        except Exception as e:
+            # hot reload must survive whatever a single reload runs into
+            print_exception(type(e), e, e.__traceback__)
+
+
 def main():
     """The Driver of the application that spawns a thread for each binding
 
@@ -43,20 +453,57 @@ def main():
     own thread. The main thread of the driver will continually parse the input
     from the user listening for the shutdown command
 
+    NOTE: If `DRIVER_MODE` in `settings.py` is set to `EVENT_LOOP_MODE`, the
+    Driver does not fork at all. A single `Scheduler` evaluates every
+    assistant from a timer heap on a bounded pool of
+    `EVALUATION_POOL_SIZE` threads
+
+    NOTE: If `DRIVER_MODE` is set to `SHARDED_MODE`, the Driver forks
+    `SHARD_COUNT` processes that each schedule their share of the assistants
+    like `EVENT_LOOP_MODE` does, and publishes every signal they send back
+
     NOTE: The driver can simply be run by navigating to this directory and
     running `./driver.py`
 
-    NOTE: All assistants should be created in `init_assistants()` in
-    `config.py`
+    NOTE: All assistants should be declared in the YAML config at
+    `CONFIG_PATH` (see `example_config.yaml`), or created in
+    `init_assistants()` in `config.py`. Either way, they are validated before
+    anything is bound
+
+    NOTE: Changes to the YAML config are applied while the driver runs, see
+    `reload_config()`, and 'R' reloads it right away
 
     NOTE: Every assistant returned in the List from `init_assistants()` has
     thier binding managed by the driver - once an assistant is added to that
     list, there is nothing more needed to orchestrate an additional assistant
     """
     print("Igniting kindling...")
-    all_assistants: List[Assistant] = init_assistants()
-    for assistant in all_assistants:
-        initiate_binding(Process(target=assistant.create_binding))
+    config_version: Optional[Tuple[int, int]] = get_config_version()
+    try:
+        all_assistants: List[Assistant] = load_assistants()
+    except ConfigError as e:
+        print('The config is invalid:')
+        for problem in e.problems:
+            print('  ' + problem)
+        exit(1)
+    # the servers start before binding, so a busy port or socket cannot
+    # strand any binding
+    if IS_METRICS_ENABLED:
+        try:
+            start_metrics_server(METRICS_HOST, METRICS_PORT)
+        except OSError as e:
+            print('Metrics are not served: ' + str(e))
+    if IS_EVENT_STREAM_ENABLED:
+        try:
+            initiate_event_stream_server(EventStreamServer(EVENT_SOCKET_PATH))
+        except OSError as e:
+            print('Events are not streamed: ' + str(e))
+    initiate_all_bindings(all_assistants)
+    if IS_CONFIG_RELOAD_ENABLED and len(all_specs) > 0:
+        Thread(target=watch_config_forever,
+               args=(config_version,),
+               name='Config Watcher',
+               daemon=True).start()
     print("")
     print(" (    (        )     *                     )           (                    ")
     print(" )\ ) )\ )  ( /(   (  `          *   )  ( /(           )\ )     (  (    (   ")
@@ -73,6 +520,10 @@ def main():
             key = input('Press Q + <ENTER> to extinguish:\n')
             if key == 'Q':
                 raise KeyboardInterrupt
+            elif key.startswith('P '):
+                toggle_profiling(key[2:])
+            elif key == 'R' and len(all_specs) > 0:
+                reload_config()
             else:
                 print('Unexpected Input')
         except KeyboardInterrupt:
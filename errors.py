@@ -40,8 +40,10 @@ class AssistantError(Exception):
 class OverrideError(AssistantError):
     """Raised when an assistant failed to override a necessary method
 
+    NOTE: Also raised by a `Publisher` that failed to override one
+
     Attributes:
-        name (str): name of the assistant
+        name (str): name of the assistant, or class of the publisher
         method (str): name of the method (state, color, or message)
     """
     def __init__(self, name: str, method: str):
@@ -166,20 +168,13 @@ class NoInternetError(AssistantError):
 class DasApplicationNotRunningError(AssistantError):
     """Raised when it is noticed that the Das Application is not open
 
-    NOTE: This will error means that the assistant will not be able to
-    communicate with the Das Keyboard, and therefore should be immediately be
-    elaborated and then `exit()` which is not handled in the `elaborate()`:
-    ```
-    from requests import exceptions as requests_exceptions
-    from urllib3 import exceptions as url_exceptions
+    NOTE: The `DasClient` raises this error whenever the Das API cannot be
+    reached. It only ends the current evaluation or publish, since the
+    `CircuitBreaker` of the `DasClient` stops calling the Das API until it
+    recovers, see `CircuitOpenError`
 
-    except (requests_exceptions.ConnectionError,
-            url_exceptions.NewConnectionError):
-        e: DasApplicationNotRunningError = (
-            DasApplicationNotRunningError(self.name))
-        e.elaborate()
-        exit()
-    ```
+    Attributes:
+        name (str): name of the assistant
     """
     def __init__(self, name: str):
         AssistantError.__init__(self)
@@ -209,3 +204,65 @@ class InvalidPathToGitRepoError(AssistantError):
         if IS_DEBUG_MODE:
             print(self.name + ': The path to the git repo ' + self.path +
                   ' was invalid')
+
+
+class DeadlineExceededError(AssistantError):
+    """Raised when an evaluation runs out of time before it could finish
+
+    Attributes:
+        name (str): name of the assistant
+        deadline (float): seconds the evaluation was allowed to take
+    """
+
+    def __init__(self, name: str, deadline: float):
+        AssistantError.__init__(self)
+        self.name: str = name
+        self.deadline: float = deadline
+
+    def elaborate(self):
+        if IS_DEBUG_MODE:
+            print(self.name + ': The evaluation did not finish within its ' +
+                  'deadline of ' + str(self.deadline) + ' seconds')
+
+
+class WatchFailedError(AssistantError):
+    """Raised when the paths of an assistant cannot be watched
+
+    NOTE: The assistant is polled every `delay` instead
+
+    Attributes:
+        name (str): name of the assistant
+        reason (str): why the paths cannot be watched
+    """
+
+    def __init__(self, name: str, reason: str):
+        AssistantError.__init__(self)
+        self.name: str = name
+        self.reason: str = reason
+
+    def elaborate(self):
+        if IS_DEBUG_MODE:
+            print(self.name + ': The paths cannot be watched, polling ' +
+                  'instead: ' + self.reason)
+
+
+class CircuitOpenError(DasApplicationNotRunningError):
+    """Raised instead of calling the Das API while it keeps failing
+
+    NOTE: Nothing is sent to the Das API while its `CircuitBreaker` is open,
+    and the `PublishQueue` holds every signal until the Das API recovers
+
+    Attributes:
+        name (str): name of the assistant
+        retry_delay (float): seconds until the Das API is probed again
+    """
+
+    def __init__(self, name: str, retry_delay: float):
+        DasApplicationNotRunningError.__init__(self, name)
+        self.retry_delay: float = retry_delay
+
+    def elaborate(self):
+        if IS_DEBUG_MODE:
+            print(self.name + ': The Das Keyboard has not been reachable ' +
+                  'lately, it will be tried again in ' +
+                  format(self.retry_delay, '.1f') + ' seconds')
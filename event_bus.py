@@ -0,0 +1,253 @@
+from collections import deque
+from json import dumps
+from metrics import get_metrics_registry
+from multiprocessing import Queue
+from errno import EADDRINUSE
+from os import path, strerror, unlink
+from settings import EVENT_SUBSCRIBER_QUEUE_SIZE
+from socket import AF_UNIX, socket, SOCK_STREAM
+from socketserver import StreamRequestHandler, ThreadingUnixStreamServer
+from threading import Condition, Lock, Thread
+from traceback import print_exception
+from typing import Callable, Deque, Dict, List, Optional
+
+
+# emitted whenever the state of an assistant changes:
+# {'assistant', 'zone_id', 'old_state', 'new_state', 'color', 'message',
+#  'time', 'evaluation_seconds', 'old_state_seconds'}
+# where a state of `None` means the evaluation failed
+StateChangeEvent = Dict[str, object]
+
+
+class Subscription:
+    """A subscriber of the `EventBus` with its own queue and delivery thread
+
+    Events are queued without ever blocking whoever emits them and the
+    callback is called with one event at a time on the delivery thread. If
+    the callback falls `max_pending` events behind, the oldest pending event
+    is dropped for every new one
+
+    Attributes:
+        callback (Callable[[StateChangeEvent], None]): receives every event
+        max_pending (int): the most events waiting for the callback
+        dropped_count (int): amount of events dropped so far
+    """
+    def __init__(self,
+                 callback: Callable[[StateChangeEvent], None],
+                 max_pending: int):
+        self.callback: Callable[[StateChangeEvent], None] = callback
+        self.max_pending: int = max_pending
+        self.dropped_count: int = 0
+        self._pending: Deque[StateChangeEvent] = deque()
+        self._condition: Condition = Condition()
+        self._is_cancelled: bool = False
+        Thread(target=self._deliver_forever,
+               name='Event Subscriber',
+               daemon=True).start()
+
+    def offer(self, event: StateChangeEvent):
+        """Queues the event for the callback, dropping the oldest if full"""
+        with self._condition:
+            if self._is_cancelled:
+                return
+            if len(self._pending) >= self.max_pending:
+                dropped_event: StateChangeEvent = self._pending.popleft()
+                self.dropped_count += 1
+                get_metrics_registry().increment(
+                    str(dropped_event['assistant']),
+                    'dropped_events')
+            self._pending.append(event)
+            self._condition.notify()
+
+    def cancel(self):
+        """Drops every pending event and stops the delivery thread"""
+        with self._condition:
+            self._is_cancelled = True
+            self._pending.clear()
+            self._condition.notify()
+
+    def _deliver_forever(self):
+        while 1:
+            with self._condition:
+                while len(self._pending) == 0 and not self._is_cancelled:
+                    self._condition.wait()
+                if self._is_cancelled:
+                    return
+                event: StateChangeEvent = self._pending.popleft()
+            try:
+                self.callback(event)
+            except Exception as e:
+                print_exception(type(e), e, e.__traceback__)
+
+
+class EventBus:
+    """Hands every state change of the assistants to every subscriber
+
+    NOTE: `emit()` never blocks and never waits on a subscriber, every
+    subscriber is delivered its events by its own `Subscription`
+    """
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []
+        self._channel: Optional[Queue] = None
+        self._lock: Lock = Lock()
+
+    def subscribe(
+            self,
+            callback: Callable[[StateChangeEvent], None],
+            max_pending: int = EVENT_SUBSCRIBER_QUEUE_SIZE) -> Subscription:
+        """Calls back with every event emitted from now on
+
+        Arguments:
+            callback (Callable[[StateChangeEvent], None]): receives the events
+            max_pending (int): the most events waiting for the callback
+
+        Returns:
+            Subscription: the subscription, to pass to `unsubscribe()`
+        """
+        subscription: Subscription = Subscription(callback, max_pending)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions = [other for other in self._subscriptions
+                                   if other is not subscription]
+        subscription.cancel()
+
+    def emit(self, event: StateChangeEvent):
+        """Queues the event for every subscriber"""
+        # the list is replaced rather than changed, so it needs no lock here
+        for subscription in self._subscriptions:
+            subscription.offer(event)
+
+    def get_channel(self) -> Queue:
+        """Returns a channel whose events are emitted by this bus
+
+        NOTE: Binding processes and shards send their events to the driver
+        through it, see `ChannelEventBus`. The channel and the thread that
+        drains it are created on first use
+        """
+        with self._lock:
+            if self._channel is None:
+                self._channel = Queue()
+                Thread(target=self._forward_forever,
+                       args=(self._channel,),
+                       name='Event Forwarder',
+                       daemon=True).start()
+            return self._channel
+
+    def _forward_forever(self, channel: Queue):
+        while 1:
+            self.emit(channel.get())
+
+
+class ChannelEventBus(EventBus):
+    """Sends the events of a binding process or shard to the driver
+
+    NOTE: The events are emitted by the `EventBus` of the driver, which is
+    the one external subscribers are connected to
+
+    Attributes:
+        channel (Queue): carries the events to the driver
+    """
+    def __init__(self, channel: Queue):
+        EventBus.__init__(self)
+        self.channel: Queue = channel
+
+    def emit(self, event: StateChangeEvent):
+        # a multiprocessing queue hands the event to its feeder thread
+        self.channel.put(event)
+
+
+class EventStreamRequestHandler(StreamRequestHandler):
+    """Streams every event as a line of JSON until the client disconnects"""
+
+    def handle(self):
+        subscription: Subscription = get_event_bus().subscribe(self._send)
+        try:
+            # nothing is expected from the client but closing the connection
+            while self.rfile.readline() != b'':
+                continue
+        except OSError:
+            pass
+        get_event_bus().unsubscribe(subscription)
+
+    def _send(self, event: StateChangeEvent):
+        try:
+            self.wfile.write((dumps(event) + '\n').encode())
+        except OSError:
+            # the client disconnected, which `handle()` notices as well
+            return
+
+
+class EventStreamServer(ThreadingUnixStreamServer):
+    """Streams the events of the `EventBus` of this process on a Unix socket
+
+    Every client receives one line of JSON per `StateChangeEvent`, e.g.
+    `socat - UNIX-CONNECT:<socket_path>`
+
+    NOTE: A socket left behind at the path is replaced, but an `OSError` is
+    raised if another process still accepts clients on it
+
+    Attributes:
+        socket_path (str): the path of the Unix socket
+    """
+    daemon_threads: bool = True
+
+    def __init__(self, socket_path: str):
+        self.socket_path: str = socket_path
+        if path.exists(socket_path):
+            if self._is_served(socket_path):
+                raise OSError(EADDRINUSE, strerror(EADDRINUSE), socket_path)
+            # left behind by a driver that did not shut down cleanly
+            unlink(socket_path)
+        ThreadingUnixStreamServer.__init__(self,
+                                           socket_path,
+                                           EventStreamRequestHandler)
+
+    def _is_served(self, socket_path: str) -> bool:
+        probe: socket = socket(AF_UNIX, SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+        except OSError:
+            return False
+        finally:
+            probe.close()
+        return True
+
+    def start(self):
+        Thread(target=self.serve_forever,
+               name='Event Stream',
+               daemon=True).start()
+
+    def stop(self):
+        """Stops accepting clients and removes the socket"""
+        self.shutdown()
+        self.server_close()
+        if path.exists(self.socket_path):
+            unlink(self.socket_path)
+
+
+_event_bus: Optional[EventBus] = None
+_event_bus_lock: Lock = Lock()
+
+
+def set_event_bus(event_bus: EventBus):
+    """Replaces the `EventBus` shared by every assistant in this process
+
+    NOTE: Used by binding processes and shards, whose events are forwarded
+    to the driver rather than emitted by the process itself
+    """
+    global _event_bus
+    with _event_bus_lock:
+        _event_bus = event_bus
+
+
+def get_event_bus() -> EventBus:
+    """Returns the `EventBus` shared by every assistant in this process"""
+    global _event_bus
+    with _event_bus_lock:
+        if _event_bus is None:
+            _event_bus = EventBus()
+        return _event_bus
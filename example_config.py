@@ -1,14 +1,6 @@
 from assistant import Assistant
-from clock_assistant import ClockAssistant
-from cpu_assistant import CPUAssistant
-from git_branch_assistant import GitBranchAssistant
-from git_fetch_assistant import GitFetchAssistant
-from git_status_assistant import GitStatusAssistant
-from message_assistant import MessageAssistant
-from metra_assistant import MetraAssistant
+from registry import AssistantRegistry, get_assistant_registry
 from typing import List, Optional
-from vagrant_assistant import VagrantAssistant
-from yaml_assistant import YamlAssistant
 
 """Example Configuration class for the keyboard driver
 
@@ -28,10 +20,19 @@ from global_config import init_global_assistants
 def init_assistants() -> List[Assistant]:
     return init_global_assistants()
 ```
+
+NOTE: Assistants are created through the `AssistantRegistry` by the name of
+their class. A custom assistant is registered along with its module first:
+```
+registry.register('CustomAssistant', 'custom_assistant')
+```
 """
 
 
 def init_assistants() -> List[Assistant]:
+    # assistant modules, and the packages they need, are only imported once
+    # an assistant of that type is created
+    registry: AssistantRegistry = get_assistant_registry()
     all_assistants: List[Assistant] = []
 
     # NCS metra_assistant
@@ -42,7 +43,8 @@ def init_assistants() -> List[Assistant]:
     NCS_METRA_ACCESS_KEY: str = 'access-key'
     NCS_METRA_SECRET_KEY: str = 'secret-key'
     NCS_METRA_ROUTE_ID: str = 'NCS'
-    NCS_METRA: MetraAssistant = MetraAssistant(
+    NCS_METRA: Assistant = registry.create(
+        'MetraAssistant',
         NCS_METRA_NAME,
         NCS_METRA_DELAY,
         NCS_METRA_ZONE_ID,
@@ -66,7 +68,8 @@ def init_assistants() -> List[Assistant]:
     JOHN_MESSAGE_IS_NAMES_INCLUDE: bool = True
     JOHN_MESSAGE_GROUPCHAT_NAMES_CRITERIA: List[Optional[str]] = [None]
     JOHN_MESSAGE_IS_GROUPCHAT_NAMES_INCLUDE: bool = True
-    JOHN_MESSAGE: MessageAssistant = MessageAssistant(
+    JOHN_MESSAGE: Assistant = registry.create(
+        'MessageAssistant',
         JOHN_MESSAGE_NAME,
         JOHN_MESSAGE_DELAY,
         JOHN_MESSAGE_ZONE_ID,
@@ -92,7 +95,8 @@ def init_assistants() -> List[Assistant]:
     FAMILY_MESSAGE_IS_NAMES_INCLUDE: bool = True
     FAMILY_MESSAGE_GROUPCHAT_NAMES_CRITERIA: List[Optional[str]] = [None]
     FAMILY_MESSAGE_IS_GROUPCHAT_NAMES_INCLUDE: bool = True
-    FAMILY_MESSAGE: MessageAssistant = MessageAssistant(
+    FAMILY_MESSAGE: Assistant = registry.create(
+        'MessageAssistant',
         FAMILY_MESSAGE_NAME,
         FAMILY_MESSAGE_DELAY,
         FAMILY_MESSAGE_ZONE_ID,
@@ -115,7 +119,8 @@ def init_assistants() -> List[Assistant]:
     GROUPS_MESSAGE_IS_NAMES_INCLUDE: bool = False
     GROUPS_MESSAGE_GROUPCHAT_NAMES_CRITERIA: List[Optional[str]] = [None]
     GROUPS_MESSAGE_IS_GROUPCHAT_NAMES_INCLUDE: bool = False
-    GROUPS_MESSAGE: MessageAssistant = MessageAssistant(
+    GROUPS_MESSAGE: Assistant = registry.create(
+        'MessageAssistant',
         GROUPS_MESSAGE_NAME,
         GROUPS_MESSAGE_DELAY,
         GROUPS_MESSAGE_ZONE_ID,
@@ -142,7 +147,8 @@ def init_assistants() -> List[Assistant]:
     OTHER_MESSAGE_IS_NAMES_INCLUDE: bool = False
     OTHER_MESSAGE_GROUPCHAT_NAMES_CRITERIA: List[Optional[str]] = [None]
     OTHER_MESSAGE_IS_GROUPCHAT_NAMES_INCLUDE: bool = True
-    OTHER_MESSAGE: MessageAssistant = MessageAssistant(
+    OTHER_MESSAGE: Assistant = registry.create(
+        'MessageAssistant',
         OTHER_MESSAGE_NAME,
         OTHER_MESSAGE_DELAY,
         OTHER_MESSAGE_ZONE_ID,
@@ -162,7 +168,8 @@ def init_assistants() -> List[Assistant]:
     PYTHON_CPU_ZONE_ID: str = '8,0'
     PYTHON_CPU_IS_MUTED: bool = True
     PYTHON_CPU_PROCESS_NAME: str = 'python'
-    PYTHON_CPU: CPUAssistant = CPUAssistant(
+    PYTHON_CPU: Assistant = registry.create(
+        'CPUAssistant',
         PYTHON_CPU_NAME,
         PYTHON_CPU_DELAY,
         PYTHON_CPU_ZONE_ID,
@@ -177,7 +184,8 @@ def init_assistants() -> List[Assistant]:
     TEAMS_CPU_ZONE_ID: str = '9,0'
     TEAMS_CPU_IS_MUTED: bool = True
     TEAMS_CPU_PROCESS_NAME: str = 'teams'
-    TEAMS_CPU: CPUAssistant = CPUAssistant(
+    TEAMS_CPU: Assistant = registry.create(
+        'CPUAssistant',
         TEAMS_CPU_NAME,
         TEAMS_CPU_DELAY,
         TEAMS_CPU_ZONE_ID,
@@ -193,7 +201,8 @@ def init_assistants() -> List[Assistant]:
     DEFAULT_VAGRANT_IS_MUTED: bool = False
     DEFAULT_VAGRANT_VM_NAME: str = 'default'
     DEFAULT_VAGRANT_VM_ID: str = 'default-vagrant-id'
-    DEFAULT_VAGRANT: VagrantAssistant = VagrantAssistant(
+    DEFAULT_VAGRANT: Assistant = registry.create(
+        'VagrantAssistant',
         DEFAULT_VAGRANT_NAME,
         DEFAULT_VAGRANT_DELAY,
         DEFAULT_VAGRANT_ZONE_ID,
@@ -211,7 +220,8 @@ def init_assistants() -> List[Assistant]:
     UI_YAML_URL: str = 'https://pubspec-url.com/pubspec.txt'
     UI_YAML_ARGUMENTS: List[str] = ['packages', 'product_name', 'version']
     UI_YAML_NOTIFICATION_DURATION: int = 60
-    UI_YAML: YamlAssistant = YamlAssistant(
+    UI_YAML: Assistant = registry.create(
+        'YamlAssistant',
         UI_YAML_NAME,
         UI_YAML_DELAY,
         UI_YAML_ZONE_ID,
@@ -234,7 +244,8 @@ def init_assistants() -> List[Assistant]:
     STANDUP_CLOCK_LOC_HOURS: int = 9
     STANDUP_CLOCK_LOC_MINUTES: int = 25
     STANDUP_CLOCK_NOTIFICATION_DURATION: int = 5
-    STANDUP_CLOCK: ClockAssistant = ClockAssistant(
+    STANDUP_CLOCK: Assistant = registry.create(
+        'ClockAssistant',
         STANDUP_CLOCK_NAME,
         STANDUP_CLOCK_DELAY,
         STANDUP_CLOCK_ZONE_ID,
@@ -256,7 +267,8 @@ def init_assistants() -> List[Assistant]:
     WORKOUT_CLOCK_LOC_HOURS: int = 13
     WORKOUT_CLOCK_LOC_MINUTES: int = 00
     WORKOUT_CLOCK_NOTIFICATION_DURATION: int = 30
-    WORKOUT_CLOCK: ClockAssistant = ClockAssistant(
+    WORKOUT_CLOCK: Assistant = registry.create(
+        'ClockAssistant',
         WORKOUT_CLOCK_NAME,
         WORKOUT_CLOCK_DELAY,
         WORKOUT_CLOCK_ZONE_ID,
@@ -278,7 +290,8 @@ def init_assistants() -> List[Assistant]:
     TRAIN_CLOCK_LOC_HOURS: int = 17
     TRAIN_CLOCK_LOC_MINUTES: int = 15
     TRAIN_CLOCK_NOTIFICATION_DURATION: int = 30
-    TRAIN_CLOCK: ClockAssistant = ClockAssistant(
+    TRAIN_CLOCK: Assistant = registry.create(
+        'ClockAssistant',
         TRAIN_CLOCK_NAME,
         TRAIN_CLOCK_DELAY,
         TRAIN_CLOCK_ZONE_ID,
@@ -300,7 +313,8 @@ def init_assistants() -> List[Assistant]:
     SS_BRANCH_ZONE_ID: str = '16,1'
     SS_BRANCH_IS_MUTED: bool = False
     SS_BRANCH_MAIN_BRANCH_NAME = 'master'
-    SS_BRANCH: GitBranchAssistant = GitBranchAssistant(
+    SS_BRANCH: Assistant = registry.create(
+        'GitBranchAssistant',
         SS_BRANCH_NAME,
         SS_BRANCH_DELAY,
         SS_BRANCH_ZONE_ID,
@@ -315,7 +329,8 @@ def init_assistants() -> List[Assistant]:
     SS_STATUS_DELAY: int = 5
     SS_STATUS_ZONE_ID: str = '17,1'
     SS_STATUS_IS_MUTED: bool = False
-    SS_STATUS: GitStatusAssistant = GitStatusAssistant(
+    SS_STATUS: Assistant = registry.create(
+        'GitStatusAssistant',
         SS_STATUS_NAME,
         SS_STATUS_DELAY,
         SS_STATUS_ZONE_ID,
@@ -329,7 +344,8 @@ def init_assistants() -> List[Assistant]:
     SS_FETCH_DELAY: int = 300
     SS_FETCH_ZONE_ID: str = '18,1'
     SS_FETCH_IS_MUTED: bool = False
-    SS_FETCH: GitFetchAssistant = GitFetchAssistant(
+    SS_FETCH: Assistant = registry.create(
+        'GitFetchAssistant',
         SS_FETCH_NAME,
         SS_FETCH_DELAY,
         SS_FETCH_ZONE_ID,
@@ -347,7 +363,8 @@ def init_assistants() -> List[Assistant]:
     CS_BRANCH_ZONE_ID: str = '16,2'
     CS_BRANCH_IS_MUTED: bool = False
     CS_BRANCH_MAIN_BRANCH_NAME = 'master'
-    CS_BRANCH: GitBranchAssistant = GitBranchAssistant(
+    CS_BRANCH: Assistant = registry.create(
+        'GitBranchAssistant',
         CS_BRANCH_NAME,
         CS_BRANCH_DELAY,
         CS_BRANCH_ZONE_ID,
@@ -362,7 +379,8 @@ def init_assistants() -> List[Assistant]:
     CS_STATUS_DELAY: int = 5
     CS_STATUS_ZONE_ID: str = '17,2'
     CS_STATUS_IS_MUTED: bool = False
-    CS_STATUS: GitStatusAssistant = GitStatusAssistant(
+    CS_STATUS: Assistant = registry.create(
+        'GitStatusAssistant',
         CS_STATUS_NAME,
         CS_STATUS_DELAY,
         CS_STATUS_ZONE_ID,
@@ -376,7 +394,8 @@ def init_assistants() -> List[Assistant]:
     CS_FETCH_DELAY: int = 300
     CS_FETCH_ZONE_ID: str = '18,2'
     CS_FETCH_IS_MUTED: bool = False
-    CS_FETCH: GitFetchAssistant = GitFetchAssistant(
+    CS_FETCH: Assistant = registry.create(
+        'GitFetchAssistant',
         CS_FETCH_NAME,
         CS_FETCH_DELAY,
         CS_FETCH_ZONE_ID,
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+from argparse import ArgumentParser, Namespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps, loads
+from random import random
+from threading import Lock, Thread
+from time import perf_counter, sleep
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class FakeDasServer(ThreadingHTTPServer):
+    """A local stand-in for the Das Keyboard signals API
+
+    Implements the three endpoints the assistants use, relative to the path
+    of `BASE_URL`: `GET /shadows`, `POST /` and
+    `DELETE /pid/{pid}/zoneId/{zone}`. Every request is answered after
+    `latency` seconds, and a `error_rate` fraction of them are answered with
+    a 500 instead
+
+    NOTE: Every request is counted, and if `is_recording` is set every
+    received signal is recorded as well, so benchmarks can measure publish
+    latencies. Long runs should not record, since the recording only grows
+
+    Attributes:
+        host (str): the address to listen on
+        port (int): the port to listen on
+        base_path (str): the path the signals API is served under
+        latency (float): seconds to wait before answering a request
+        error_rate (float): fraction of requests answered with a 500
+        is_recording (bool): flag to record every received signal
+        request_counts (Dict[str, int]): requests received by method
+        received_signals (List[Tuple[float, Dict[str, str]]]): every signal
+            received while recording, along with the `perf_counter()` it was
+            received at
+    """
+    # benchmarks open many connections at once
+    request_queue_size: int = 128
+    daemon_threads: bool = True
+
+    def __init__(self,
+                 host: str,
+                 port: int,
+                 base_path: str,
+                 latency: float,
+                 error_rate: float,
+                 is_recording: bool):
+        ThreadingHTTPServer.__init__(self, (host, port), FakeDasRequestHandler)
+        self.host: str = host
+        self.port: int = port
+        self.base_path: str = base_path.rstrip('/')
+        self.latency: float = latency
+        self.error_rate: float = error_rate
+        self.is_recording: bool = is_recording
+        self.request_counts: Dict[str, int] = {'GET': 0,
+                                               'POST': 0,
+                                               'DELETE': 0}
+        self.received_signals: List[Tuple[float, Dict[str, str]]] = []
+        self._shadows: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._lock: Lock = Lock()
+        self._thread: Optional[Thread] = None
+
+    def get_base_url(self) -> str:
+        """Returns the url to point a `DasClient` at"""
+        return 'http://' + self.host + ':' + str(self.port) + self.base_path
+
+    def start(self):
+        """Serves requests on a background thread until `stop()` is called"""
+        self._thread = Thread(target=self.serve_forever,
+                              name='Fake Das',
+                              daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def get_request_count(self) -> int:
+        with self._lock:
+            return sum(self.request_counts.values())
+
+    def list_shadows(self) -> List[Dict[str, str]]:
+        with self._lock:
+            return list(reversed(list(self._shadows.values())))
+
+    def set_signal(self, signal: Dict[str, str]):
+        with self._lock:
+            key: Tuple[str, str] = (signal['pid'], signal['zoneId'])
+            # the newest signal of a zone is listed first, like the Das API
+            self._shadows.pop(key, None)
+            self._shadows[key] = signal
+            if self.is_recording:
+                self.received_signals.append((perf_counter(), signal))
+
+    def delete_signal(self, pid: str, zone_id: str) -> bool:
+        with self._lock:
+            return self._shadows.pop((pid, zone_id), None) is not None
+
+    def _count_request(self, method: str):
+        with self._lock:
+            self.request_counts[method] += 1
+
+
+class FakeDasRequestHandler(BaseHTTPRequestHandler):
+    """Answers a request to the `FakeDasServer` like the Das API would"""
+    server: FakeDasServer
+    protocol_version: str = 'HTTP/1.1'
+    # the headers and the body are written separately, which Nagle's
+    # algorithm would hold back until the client acknowledges the headers
+    disable_nagle_algorithm: bool = True
+
+    def do_GET(self):
+        if not self._begin('GET'):
+            return
+        if self._get_path() != '/shadows':
+            self._respond(404)
+            return
+        self._respond(200, self.server.list_shadows())
+
+    def do_POST(self):
+        body: bytes = self.rfile.read(int(self.headers['Content-Length'] or 0))
+        if not self._begin('POST'):
+            return
+        if self._get_path() != '':
+            self._respond(404)
+            return
+        try:
+            signal: Dict[str, str] = loads(body)
+            self.server.set_signal(signal)
+        except (ValueError, KeyError, TypeError):
+            self._respond(400)
+            return
+        self._respond(200, {})
+
+    def do_DELETE(self):
+        if not self._begin('DELETE'):
+            return
+        parts: List[str] = self._get_path().split('/')
+        if len(parts) != 5 or parts[1] != 'pid' or parts[3] != 'zoneId':
+            self._respond(404)
+            return
+        if self.server.delete_signal(parts[2], parts[4]):
+            self._respond(200)
+        else:
+            self._respond(404)
+
+    def log_message(self, format: str, *args: object):
+        # benchmarks send far too many requests to be worth logging
+        return
+
+    def _get_path(self) -> str:
+        path: str = urlsplit(self.path).path.rstrip('/')
+        if not path.startswith(self.server.base_path):
+            return '/not found'
+        return path[len(self.server.base_path):]
+
+    def _begin(self, method: str) -> bool:
+        self.server._count_request(method)
+        if self.server.latency > 0:
+            sleep(self.server.latency)
+        if random() < self.server.error_rate:
+            self._respond(500)
+            return False
+        return True
+
+    def _respond(self, status: int, content: Optional[object] = None):
+        body: bytes = b'' if content is None else dumps(content).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def parse_arguments() -> Namespace:
+    parser: ArgumentParser = ArgumentParser(
+        description='Serves a local stand-in for the Das Keyboard signals API')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=27301)
+    parser.add_argument('--base-path', default='/api/1.0/signals')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds to wait before answering a request')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of requests answered with a 500')
+    return parser.parse_args()
+
+
+def main():
+    """Serves the fake Das API until interrupted
+
+    NOTE: With the default arguments the fake server listens where
+    `BASE_URL` in `settings.py` points, so the driver can be run against it
+    without a keyboard attached
+    """
+    arguments: Namespace = parse_arguments()
+    server: FakeDasServer = FakeDasServer(arguments.host,
+                                          arguments.port,
+                                          arguments.base_path,
+                                          arguments.latency,
+                                          arguments.error_rate,
+                                          False)
+    print('Serving a fake Das API on ' + server.get_base_url())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
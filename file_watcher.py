@@ -0,0 +1,262 @@
+from itertools import count
+from os import path, stat, stat_result
+from settings import FILE_WATCH_DEBOUNCE, FILE_WATCH_POLL_INTERVAL
+from threading import Condition, Lock, Thread
+from time import monotonic, sleep
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+# what the stat of a path is compared by: (mtime, size, inode)
+PathSignature = Optional[Tuple[int, int, int]]
+
+# the kinds of watchdog events that change a path, as opposed to reading it
+CHANGE_EVENT_TYPES: Tuple[str, ...] = ('created',
+                                       'deleted',
+                                       'modified',
+                                       'moved',
+                                       'closed')
+
+
+class WatchedPaths:
+    """The paths an assistant is evaluated on whenever they change
+
+    NOTE: A change inside an ignored tree is only watched if it is also
+    inside a tree nested even deeper, which lets an assistant watch a
+    working tree, ignore its `.git` directory, but still watch `.git/refs`
+
+    Attributes:
+        files (List[str]): files to watch, including being replaced by a
+            rename the way git replaces them
+        trees (List[str]): directories to watch with everything inside them
+        ignored_trees (List[str]): directories inside `trees` to ignore
+    """
+    def __init__(self,
+                 files: List[str],
+                 trees: List[str],
+                 ignored_trees: List[str]):
+        self.files: List[str] = [path.abspath(file) for file in files]
+        self.trees: List[str] = [path.abspath(tree) for tree in trees]
+        self.ignored_trees: List[str] = [path.abspath(tree)
+                                         for tree in ignored_trees]
+
+    def is_watched(self, changed_path: str) -> bool:
+        """Returns whether a change to the given path concerns these paths"""
+        changed_path = path.abspath(changed_path)
+        if changed_path in self.files:
+            return True
+        deepest_tree: str = ''
+        is_watched: bool = False
+        trees: List[Tuple[str, bool]] = (
+            [(tree, False) for tree in self.trees] +
+            [(tree, True) for tree in self.ignored_trees])
+        for tree, is_ignored in trees:
+            if ((changed_path == tree or
+                    changed_path.startswith(tree.rstrip(path.sep) +
+                                            path.sep)) and
+                    len(tree) > len(deepest_tree)):
+                deepest_tree = tree
+                is_watched = not is_ignored
+        return is_watched
+
+
+class _WatchdogHandler:
+    # watchdog only needs `dispatch()`, so watchdog is not imported until a
+    # path is actually watched
+    def __init__(self,
+                 watched_paths: WatchedPaths,
+                 notify: Callable[[], None]):
+        self.watched_paths: WatchedPaths = watched_paths
+        self.notify: Callable[[], None] = notify
+
+    def dispatch(self, event: object):
+        if getattr(event, 'event_type', None) not in CHANGE_EVENT_TYPES:
+            return
+        for event_path in (getattr(event, 'src_path', ''),
+                           getattr(event, 'dest_path', '')):
+            if event_path and self.watched_paths.is_watched(str(event_path)):
+                self.notify()
+                return
+
+
+class FileWatcher:
+    """Calls back whenever watched paths change
+
+    Changes are reported by watchdog (inotify, FSEvents, etc.) if it is
+    installed. Otherwise, the watched files and the roots of the watched
+    trees are compared by their stat every `poll_interval` seconds, which
+    notices files being replaced or added to a tree, but not files being
+    edited deeper inside a tree (see `is_recursive`)
+
+    NOTE: Callbacks are debounced: a callback runs once its paths stopped
+    changing for `debounce` seconds, but never later than ten times that
+    after the first change, so that a burst of changes (such as a
+    `git checkout`) causes a single callback
+
+    Attributes:
+        debounce (float): seconds the paths must be quiet before a callback
+        poll_interval (float): seconds between two polls without watchdog
+        is_recursive (bool): whether every change deep inside a watched tree
+            is noticed, which requires watchdog
+    """
+    def __init__(self, debounce: float, poll_interval: float):
+        self.debounce: float = debounce
+        self.poll_interval: float = poll_interval
+        self._watches: Dict[int, Tuple[WatchedPaths, Callable[[], None]]] = {}
+        self._watch_ids: Iterator[int] = count()
+        self._signatures: Dict[int, List[PathSignature]] = {}
+        self._observed_watches: Dict[int,
+                                     List[Tuple[_WatchdogHandler,
+                                                object]]] = {}
+        self._first_changed_at: Dict[int, float] = {}
+        self._callback_at: Dict[int, float] = {}
+        self._condition: Condition = Condition()
+        self._observer: Optional[object] = None
+        try:
+            from watchdog.observers import Observer
+            self._observer = Observer()
+            self._observer.start()
+        except ImportError:
+            Thread(target=self._poll_forever,
+                   name='File Poller',
+                   daemon=True).start()
+        self.is_recursive: bool = self._observer is not None
+        Thread(target=self._call_back_forever,
+               name='File Watcher',
+               daemon=True).start()
+
+    def watch(self,
+              watched_paths: WatchedPaths,
+              callback: Callable[[], None]) -> int:
+        """Calls back whenever any of the paths change until `unwatch()`
+
+        NOTE: An `OSError` is raised if a watched tree, or the directory of
+        a watched file, does not exist
+
+        Returns:
+            int: the id of the watch, to pass to `unwatch()`
+        """
+        with self._condition:
+            watch_id: int = next(self._watch_ids)
+        if self._observer is None:
+            signatures: List[PathSignature] = self._sign(watched_paths)
+            with self._condition:
+                self._signatures[watch_id] = signatures
+                self._watches[watch_id] = (watched_paths, callback)
+            return watch_id
+        handler: _WatchdogHandler = _WatchdogHandler(
+            watched_paths,
+            lambda: self._notify(watch_id))
+        observed_watches: List[Tuple[_WatchdogHandler, object]] = []
+        try:
+            for directory in sorted(set(path.dirname(file)
+                                        for file in watched_paths.files)):
+                observed_watches.append(
+                    (handler,
+                     self._observer.schedule(handler,
+                                             directory,
+                                             recursive=False)))
+            for tree in watched_paths.trees:
+                observed_watches.append(
+                    (handler,
+                     self._observer.schedule(handler,
+                                             tree,
+                                             recursive=True)))
+        except OSError:
+            self._unschedule(observed_watches)
+            raise
+        with self._condition:
+            self._observed_watches[watch_id] = observed_watches
+            self._watches[watch_id] = (watched_paths, callback)
+        return watch_id
+
+    def unwatch(self, watch_id: int):
+        """Stops calling back for the watch, including a pending callback"""
+        with self._condition:
+            self._watches.pop(watch_id, None)
+            self._signatures.pop(watch_id, None)
+            self._first_changed_at.pop(watch_id, None)
+            self._callback_at.pop(watch_id, None)
+            observed_watches: List[Tuple[_WatchdogHandler, object]] = (
+                self._observed_watches.pop(watch_id, []))
+        self._unschedule(observed_watches)
+
+    def _unschedule(self,
+                    observed_watches: List[Tuple[_WatchdogHandler, object]]):
+        # only the handler is removed, since watchdog shares the watch of a
+        # directory with every other handler scheduled for it
+        for handler, observed_watch in observed_watches:
+            self._observer.remove_handler_for_watch(handler, observed_watch)
+
+    def _notify(self, watch_id: int):
+        with self._condition:
+            if watch_id not in self._watches:
+                return
+            now: float = monotonic()
+            first_changed_at: float = self._first_changed_at.setdefault(
+                watch_id, now)
+            self._callback_at[watch_id] = min(
+                now + self.debounce,
+                first_changed_at + 10 * self.debounce)
+            self._condition.notify_all()
+
+    def _call_back_forever(self):
+        while 1:
+            with self._condition:
+                while len(self._callback_at) == 0:
+                    self._condition.wait()
+                watch_id, callback_at = min(self._callback_at.items(),
+                                            key=lambda item: item[1])
+                if callback_at > monotonic():
+                    self._condition.wait(callback_at - monotonic())
+                    continue
+                del self._callback_at[watch_id]
+                del self._first_changed_at[watch_id]
+                callback: Callable[[], None] = self._watches[watch_id][1]
+            callback()
+
+    def _sign(self, watched_paths: WatchedPaths) -> List[PathSignature]:
+        signatures: List[PathSignature] = []
+        for watched_path in watched_paths.files + watched_paths.trees:
+            try:
+                path_stat: stat_result = stat(watched_path)
+            except OSError:
+                signatures.append(None)
+                continue
+            signatures.append((path_stat.st_mtime_ns,
+                               path_stat.st_size,
+                               path_stat.st_ino))
+        return signatures
+
+    def _poll_forever(self):
+        while 1:
+            sleep(self.poll_interval)
+            with self._condition:
+                watches: List[Tuple[int, WatchedPaths]] = [
+                    (watch_id, watched_paths)
+                    for watch_id, (watched_paths, _) in self._watches.items()]
+            for watch_id, watched_paths in watches:
+                signatures: List[PathSignature] = self._sign(watched_paths)
+                with self._condition:
+                    if self._signatures.get(watch_id,
+                                            signatures) == signatures:
+                        continue
+                    self._signatures[watch_id] = signatures
+                self._notify(watch_id)
+
+
+_file_watcher: Optional[FileWatcher] = None
+_file_watcher_lock: Lock = Lock()
+
+
+def get_file_watcher() -> FileWatcher:
+    """Returns the `FileWatcher` shared by every assistant in this process
+
+    NOTE: The watcher is created lazily so that forked bindings never inherit
+    a watcher whose threads only exist in their parent
+    """
+    global _file_watcher
+    with _file_watcher_lock:
+        if _file_watcher is None:
+            _file_watcher = FileWatcher(FILE_WATCH_DEBOUNCE,
+                                        FILE_WATCH_POLL_INTERVAL)
+        return _file_watcher
@@ -3,9 +3,11 @@ from errors import (AssistantError,
                     StateNotFoundError,
                     InvalidPathToGitRepoError,
                     ValueNotFoundError)
-from git import Repo, NoSuchPathError
-from settings import COLORS
-from typing import Dict
+from file_watcher import WatchedPaths
+from git import InvalidGitRepositoryError, NoSuchPathError, Repo
+from os import path
+from settings import COLORS, PRIORITY_LOW
+from typing import Dict, Optional
 
 
 class GitBranchAssistant(Assistant):
@@ -38,6 +40,7 @@ class GitBranchAssistant(Assistant):
         Assistant.__init__(self, name, delay, zone_id, is_muted)
         self.path_to_repo: str = path_to_repo
         self.main_branch_name: str = main_branch_name
+        self.priority = PRIORITY_LOW
         self.current_branch_name: str = ''
         self.MAIN_BRANCH: str = 'main branch'
         self.FEATURE_BRANCH: str = 'feature branch'
@@ -54,6 +57,14 @@ class GitBranchAssistant(Assistant):
         except NoSuchPathError:
             raise InvalidPathToGitRepoError(self.name, self.path_to_repo)
 
+    def _get_watched_paths(self) -> Optional[WatchedPaths]:
+        # git replaces HEAD whenever another branch is checked out
+        try:
+            git_dir: str = Repo(self.path_to_repo).git_dir
+        except (InvalidGitRepositoryError, NoSuchPathError):
+            raise InvalidPathToGitRepoError(self.name, self.path_to_repo)
+        return WatchedPaths([path.join(git_dir, 'HEAD')], [], [])
+
     def state_identifier(self) -> str:
         try:
             self._set_current_branch_name()
@@ -57,7 +57,10 @@ class GitFetchAssistant(Assistant):
             raise InvalidPathToGitRepoError(self.name, self.path_to_repo)
         try:
             if not self.repo.head.is_detached:
-                self.repo.remote().fetch()
+                # the `git fetch` process is killed once the deadline passes
+                self.repo.git.fetch(
+                    self.repo.remote().name,
+                    kill_after_timeout=self._get_remaining_time())
         except CommandError:
             raise GitFetchError(self.name)
 
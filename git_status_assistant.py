@@ -3,9 +3,11 @@ from errors import (AssistantError,
                     StateNotFoundError,
                     InvalidPathToGitRepoError,
                     ValueNotFoundError)
-from git import Repo, NoSuchPathError
+from file_watcher import WatchedPaths
+from git import InvalidGitRepositoryError, NoSuchPathError, Repo
+from os import path
 from settings import COLORS
-from typing import Dict
+from typing import Dict, List, Optional
 
 
 class GitStatusAssistant(Assistant):
@@ -39,6 +41,22 @@ class GitStatusAssistant(Assistant):
         except NoSuchPathError:
             raise InvalidPathToGitRepoError(self.name, self.path_to_repo)
 
+    def _get_watched_paths(self) -> Optional[WatchedPaths]:
+        try:
+            repo: Repo = Repo(self.path_to_repo)
+        except (InvalidGitRepositoryError, NoSuchPathError):
+            raise InvalidPathToGitRepoError(self.name, self.path_to_repo)
+        # staging and checkouts replace the index and HEAD, and commits the
+        # refs, while the rest of the git directory changes with every git
+        # command, including the ones this assistant runs
+        files: List[str] = [path.join(repo.git_dir, 'HEAD'),
+                            path.join(repo.git_dir, 'index'),
+                            path.join(repo.git_dir, 'packed-refs')]
+        trees: List[str] = [path.join(repo.git_dir, 'refs', 'heads')]
+        if repo.working_tree_dir is not None:
+            trees.append(repo.working_tree_dir)
+        return WatchedPaths(files, trees, [repo.git_dir])
+
     def state_identifier(self) -> str:
         try:
             return (self.BRANCH_DIRTY
@@ -1,11 +1,12 @@
 from assistant import Assistant
 from errors import (AssistantError,
+                    DeadlineExceededError,
                     NoInternetError,
                     StateNotFoundError,
                     ValueNotFoundError)
 from jenkins import Jenkins, JenkinsException
 from requests import exceptions as requests_exceptions
-from settings import COLORS, IS_DEBUG_MODE
+from settings import COLORS, IS_DEBUG_MODE, PRIORITY_HIGH
 from typing import Dict
 from urllib3 import exceptions as url_exceptions
 
@@ -35,23 +36,30 @@ class JenkinsAssistant(Assistant):
         Assistant.__init__(self, name, delay, zone_id, is_muted)
         self.job_name: str = job_name
         self.server_url: str = server_url
+        # a broken build matters more than any routine check
+        self.state_priorities = {'FAILURE': PRIORITY_HIGH}
 
     def _contact_jenkins_server(self) -> str:
         try:
-            server: Jenkins = Jenkins(self.server_url)
+            server: Jenkins = Jenkins(self.server_url,
+                                      timeout=self._get_remaining_time())
             last_build_number: int = (server.get_job_info(self.job_name)
                                       ['lastBuild']['number'])
+            # the timeout applies per call, so it shrinks with the deadline
+            server.timeout = self._get_remaining_time()
             return (server.get_build_info(self.job_name, last_build_number)
                     ['result'])
         except JenkinsException:
             raise StateNotFoundError(self.name)
+        except requests_exceptions.Timeout:
+            raise DeadlineExceededError(self.name, self.deadline)
         except (requests_exceptions.ConnectionError,
                 url_exceptions.NewConnectionError):
             raise NoInternetError(self.name)
 
     def state_identifier(self) -> str:
         try:
-            return self._contact_jenkins_server()
+            return self._retry(self._contact_jenkins_server)
         except AssistantError as e:
             e.elaborate()
             raise StateNotFoundError(self.name)
@@ -1,8 +1,9 @@
 from assistant import Assistant
+from contextlib import closing
 from sqlite3 import connect, Connection, Cursor, OperationalError
 from errors import AssistantError, StateNotFoundError, ValueNotFoundError
 from re import sub
-from settings import COLORS, IS_DEBUG_MODE
+from settings import COLORS, IS_DEBUG_MODE, PRIORITY_HIGH
 from typing import Dict, List, Optional
 
 
@@ -125,6 +126,7 @@ class MessageAssistant(Assistant):
         self._desired_messages: List[Message] = []
         self.READ_MESSAGES: str = 'read messages'
         self.UNREAD_MESSAGES: str = 'unread messages'
+        self.state_priorities = {self.UNREAD_MESSAGES: PRIORITY_HIGH}
 
     def _convert_phone_number_to_sql(self, phone_number: str) -> str:
         filtered_phone_number: str = sub(r'\D', '', phone_number)
@@ -145,36 +147,33 @@ class MessageAssistant(Assistant):
             raise DatabaseConnectionError(self.name,
                                           'Chat',
                                           self.chat_db_path)
-        cursor: Cursor = connection.cursor()
-        cmd: str = ('SELECT id, text, display_name FROM message ' +
-                    'LEFT JOIN chat_message_join ON message.ROWID = ' +
-                    'message_id LEFT JOIN chat ON chat.ROWID = chat_id ' +
-                    'LEFT JOIN handle ON handle_id = handle.ROWID WHERE ' +
-                    'NOT is_from_me AND NOT is_read AND item_type = 0;')
-        for value in cursor.execute(cmd):
-            if len(value) == 3:
-                if value[2] == '':
-                    all_unread_messages.append(Message(value[0],
-                                                       value[1],
-                                                       None))
+        with closing(connection):
+            cursor: Cursor = connection.cursor()
+            cmd: str = ('SELECT id, text, display_name FROM message ' +
+                        'LEFT JOIN chat_message_join ON message.ROWID = ' +
+                        'message_id LEFT JOIN chat ON chat.ROWID = chat_id ' +
+                        'LEFT JOIN handle ON handle_id = handle.ROWID WHERE ' +
+                        'NOT is_from_me AND NOT is_read AND item_type = 0;')
+            for value in cursor.execute(cmd):
+                if len(value) == 3:
+                    if value[2] == '':
+                        all_unread_messages.append(Message(value[0],
+                                                           value[1],
+                                                           None))
+                    else:
+                        all_unread_messages.append(Message(value[0],
+                                                           value[1],
+                                                           value[2]))
                 else:
-                    all_unread_messages.append(Message(value[0],
-                                                       value[1],
-                                                       value[2]))
-            else:
-                raise UnexpectedDBResponseError(self.name,
-                                                'Chat',
-                                                self.chat_db_path)
+                    raise UnexpectedDBResponseError(self.name,
+                                                    'Chat',
+                                                    self.chat_db_path)
         return all_unread_messages
 
-    def _query_contact_info_for_phone_number(self, phone_number: str) -> str:
+    def _query_contact_info_for_phone_number(self,
+                                             connection: Connection,
+                                             phone_number: str) -> str:
         sql_phone_number: str = self._convert_phone_number_to_sql(phone_number)
-        try:
-            connection: Connection = connect(self.addressbook_db_path)
-        except OperationalError:
-            raise DatabaseConnectionError(self.name,
-                                          'AddressBook',
-                                          self.addressbook_db_path)
         cursor: Cursor = connection.cursor()
         cmd: str = ('SELECT ZFIRSTNAME, ZLASTNAME FROM ZABCDPHONENUMBER ' +
                     'LEFT JOIN ZABCDRECORD ON ZABCDPHONENUMBER.ZOWNER = '
@@ -191,9 +190,20 @@ class MessageAssistant(Assistant):
         return phone_number
 
     def _populate_all_contact_info(self, messages: List[Message]):
-        for message in messages:
-            message.sender = self._query_contact_info_for_phone_number(
-                message.sender)
+        if len(messages) == 0:
+            return
+        try:
+            connection: Connection = connect(self.addressbook_db_path)
+        except OperationalError:
+            raise DatabaseConnectionError(self.name,
+                                          'AddressBook',
+                                          self.addressbook_db_path)
+        # one connection serves every lookup and is closed even on errors
+        with closing(connection):
+            for message in messages:
+                message.sender = self._query_contact_info_for_phone_number(
+                    connection,
+                    message.sender)
 
     def _names_filter(self, message: Message) -> bool:
         if len(self.names_criteria) == 0:
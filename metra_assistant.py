@@ -1,6 +1,7 @@
 from assistant import Assistant
 from errors import (AssistantError,
                     ConnectionFailedError,
+                    DeadlineExceededError,
                     NoInternetError,
                     StateNotFoundError,
                     ValueNotFoundError)
@@ -70,20 +71,23 @@ class MetraAssistant(Assistant):
         session: Session = Session()
         session.auth = (self.access_key, self.secret_key)
         try:
-            response: Response = session.get(url)
+            response: Response = session.get(
+                url, timeout=self._get_remaining_time())
             if response.ok:
                 self.num_alerts = self._get_amount_of_alerts(response.content)
             else:
                 raise ConnectionFailedError(self.name,
                                             'GET',
                                             response.status_code)
+        except requests_exceptions.Timeout:
+            raise DeadlineExceededError(self.name, self.deadline)
         except (requests_exceptions.ConnectionError,
                 url_exceptions.NewConnectionError):
             raise NoInternetError(self.name)
 
     def state_identifier(self) -> str:
         try:
-            self._set_amount_of_alerts()
+            self._retry(self._set_amount_of_alerts)
             if self.num_alerts > 0:
                 return self.UNREAD_ALERT
             else:
@@ -0,0 +1,329 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import Queue
+from threading import Lock, Thread
+from time import perf_counter, sleep
+from typing import Dict, Iterator, List, Optional, Tuple
+from worker_pool import get_concurrency_gauge
+
+
+# what a `ChannelMetricsRegistry` sends for every recording: the name of the
+# `MetricsRegistry` method that records it, and its arguments
+MetricsRecord = Tuple[str, Tuple[object, ...]]
+
+
+class Histogram:
+    """A cumulative histogram of durations in seconds
+
+    Attributes:
+        buckets (Tuple[float, ...]): the upper bounds of the buckets
+    """
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets: Tuple[float, ...] = buckets
+        self.bucket_counts: List[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Every latency and counter recorded by the assistants of this process
+
+    Latencies are recorded per assistant and operation (`state_identifier`,
+    `color_identifier`, `message_identifier`, `shadow_get`, `publish_post`),
+    counters per assistant and an optional label such as the error type.
+    The driver records its config reloads (`config_reload`) the same way,
+    under its own name. How long evaluations and signals wait before they
+    run or are posted is recorded per queue and priority instead
+
+    NOTE: `render()` produces the Prometheus text exposition format
+
+    NOTE: Binding processes and shards record into a
+    `ChannelMetricsRegistry`, which forwards everything to the registry of
+    the driver, so its endpoint serves the metrics of every process
+    """
+    BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1,
+                                  0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+    PREFIX: str = 'prometheus5q_'
+    COUNTERS: Dict[str, Tuple[str, str]] = {
+        'evaluations': ('', 'Evaluations started'),
+        'state_changes': ('', 'Evaluations whose state differed from the ' +
+                          'previous state'),
+        'errors': ('error', 'AssistantErrors raised, by subclass'),
+        'retries': ('error', 'Calls retried after a transient ' +
+                    'AssistantError, by subclass'),
+        'publishes': ('result', 'Signals sent, skipped because they were ' +
+                      'unchanged, superseded by a newer signal, failed, ' +
+                      'held while the Das API was down, or republished ' +
+                      'once it recovered'),
+        'overruns': ('', 'Evaluations due while the previous one was still ' +
+                     'running'),
+        'triggers': ('', 'Changes to watched paths that triggered an ' +
+                     'evaluation'),
+        'dropped_events': ('', 'State change events dropped because a ' +
+                           'subscriber fell behind'),
+        'reloaded_bindings': ('action', 'Bindings started, stopped or ' +
+                              'restarted by config reloads'),
+    }
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._counters: Dict[Tuple[str, str, str], int] = {}
+        self._queueing_histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._lock: Lock = Lock()
+        self._channel: Optional[Queue] = None
+
+    def observe(self, name: str, operation: str, seconds: float):
+        """Records the duration of an operation of the assistant
+
+        Arguments:
+            name (str): name of the assistant
+            operation (str): name of the operation
+            seconds (float): how long the operation took
+        """
+        with self._lock:
+            key: Tuple[str, str] = (name, operation)
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(self.BUCKETS)
+            self._histograms[key].observe(seconds)
+
+    def observe_queueing_delay(self,
+                               queue: str,
+                               priority: str,
+                               seconds: float):
+        """Records how long work of the priority waited in the queue
+
+        Arguments:
+            queue (str): `evaluation` for the worker pool, `publish` for the
+                signals waiting to be posted
+            priority (str): one of the `PRIORITIES` in settings
+            seconds (float): how long the work waited
+        """
+        with self._lock:
+            key: Tuple[str, str] = (queue, priority)
+            if key not in self._queueing_histograms:
+                self._queueing_histograms[key] = Histogram(self.BUCKETS)
+            self._queueing_histograms[key].observe(seconds)
+
+    @contextmanager
+    def time(self, name: str, operation: str) -> Iterator[None]:
+        """Records how long the body of the `with` statement takes
+
+        NOTE: The duration is recorded even if the body raises
+        """
+        started_at: float = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, operation, perf_counter() - started_at)
+
+    def increment(self, name: str, counter: str, label: str = ''):
+        """Increments one of the `COUNTERS` of the assistant
+
+        Arguments:
+            name (str): name of the assistant
+            counter (str): name of the counter
+            label (str): value of the counter's label, if it has one
+        """
+        with self._lock:
+            key: Tuple[str, str, str] = (name, counter, label)
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+    def get_channel(self) -> Queue:
+        """Returns a channel whose records are recorded by this registry
+
+        NOTE: Binding processes and shards send their metrics to the driver
+        through it, see `ChannelMetricsRegistry`. The channel and the thread
+        that drains it are created on first use
+        """
+        with self._lock:
+            if self._channel is None:
+                self._channel = Queue()
+                Thread(target=self._forward_forever,
+                       args=(self._channel,),
+                       name='Metrics Forwarder',
+                       daemon=True).start()
+            return self._channel
+
+    def _forward_forever(self, channel: Queue):
+        while 1:
+            records: List[MetricsRecord] = channel.get()
+            for method_name, arguments in records:
+                getattr(self, method_name)(*arguments)
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self._lock:
+            self._render_histograms(lines)
+            self._render_queueing_histograms(lines)
+            self._render_counters(lines)
+        gauge_name: str = self.PREFIX + 'concurrent_evaluations'
+        lines.append('# HELP ' + gauge_name + ' Evaluations running now')
+        lines.append('# TYPE ' + gauge_name + ' gauge')
+        lines.append(gauge_name + ' ' +
+                     str(get_concurrency_gauge().get_current()))
+        return '\n'.join(lines) + '\n'
+
+    def _render_histograms(self, lines: List[str]):
+        metric: str = self.PREFIX + 'operation_duration_seconds'
+        lines.append('# HELP ' + metric + ' Duration of assistant operations')
+        lines.append('# TYPE ' + metric + ' histogram')
+        for (name, operation), histogram in sorted(self._histograms.items()):
+            labels: str = ('assistant="' + _escape(name) + '",operation="' +
+                           operation + '"')
+            _render_histogram(lines, metric, labels, histogram)
+
+    def _render_queueing_histograms(self, lines: List[str]):
+        metric: str = self.PREFIX + 'queueing_delay_seconds'
+        lines.append('# HELP ' + metric + ' Time waited for a worker ' +
+                     'thread or for the Das API, by priority')
+        lines.append('# TYPE ' + metric + ' histogram')
+        for (queue, priority), histogram in sorted(
+                self._queueing_histograms.items()):
+            labels: str = ('queue="' + queue + '",priority="' +
+                           _escape(priority) + '"')
+            _render_histogram(lines, metric, labels, histogram)
+
+    def _render_counters(self, lines: List[str]):
+        for counter, (label_name, description) in self.COUNTERS.items():
+            metric: str = self.PREFIX + counter + '_total'
+            lines.append('# HELP ' + metric + ' ' + description)
+            lines.append('# TYPE ' + metric + ' counter')
+            for (name, key, label), value in sorted(self._counters.items()):
+                if key != counter:
+                    continue
+                labels: str = 'assistant="' + _escape(name) + '"'
+                if label_name != '':
+                    labels += ',' + label_name + '="' + _escape(label) + '"'
+                lines.append(metric + '{' + labels + '} ' + str(value))
+
+
+class ChannelMetricsRegistry(MetricsRegistry):
+    """Sends the metrics of a binding process or shard to the driver
+
+    Records are batched and sent every `forward_interval` seconds, so the
+    evaluations never wait on the channel
+
+    NOTE: Nothing is kept here, so `render()` of this registry is empty
+    except for the evaluations running in this process
+
+    Attributes:
+        channel (Queue): carries the records to the driver
+        forward_interval (float): seconds between two batches
+    """
+    def __init__(self, channel: Queue, forward_interval: float):
+        MetricsRegistry.__init__(self)
+        self.channel: Queue = channel
+        self.forward_interval: float = forward_interval
+        self._records: List[MetricsRecord] = []
+        Thread(target=self._send_forever,
+               name='Metrics Sender',
+               daemon=True).start()
+
+    def observe(self, name: str, operation: str, seconds: float):
+        self._add(('observe', (name, operation, seconds)))
+
+    def observe_queueing_delay(self,
+                               queue: str,
+                               priority: str,
+                               seconds: float):
+        self._add(('observe_queueing_delay', (queue, priority, seconds)))
+
+    def increment(self, name: str, counter: str, label: str = ''):
+        self._add(('increment', (name, counter, label)))
+
+    def flush(self):
+        """Sends every record that was not sent yet right away"""
+        with self._lock:
+            records: List[MetricsRecord] = self._records
+            self._records = []
+        if len(records) > 0:
+            self.channel.put(records)
+
+    def _add(self, record: MetricsRecord):
+        with self._lock:
+            self._records.append(record)
+
+    def _send_forever(self):
+        while 1:
+            sleep(self.forward_interval)
+            self.flush()
+
+
+def _render_histogram(lines: List[str],
+                      metric: str,
+                      labels: str,
+                      histogram: Histogram):
+    cumulative_count: int = 0
+    bounds: List[str] = [str(b) for b in histogram.buckets] + ['+Inf']
+    for bound, count in zip(bounds, histogram.bucket_counts):
+        cumulative_count += count
+        lines.append(metric + '_bucket{' + labels + ',le="' + bound + '"} ' +
+                     str(cumulative_count))
+    lines.append(metric + '_sum{' + labels + '} ' + str(histogram.sum))
+    lines.append(metric + '_count{' + labels + '} ' + str(histogram.count))
+
+
+def _escape(label_value: str) -> str:
+    return (label_value.replace('\\', '\\\\')
+            .replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serves the metrics of this process on `/metrics`"""
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body: bytes = get_metrics_registry().render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object):
+        # scrapes are far too frequent to be worth logging
+        return
+
+
+_metrics_registry: MetricsRegistry = MetricsRegistry()
+_metrics_registry_lock: Lock = Lock()
+
+
+def set_metrics_registry(metrics_registry: MetricsRegistry):
+    """Replaces the `MetricsRegistry` shared by everything in this process
+
+    NOTE: Used by binding processes and shards, whose metrics are served by
+    the driver rather than by the process itself
+    """
+    global _metrics_registry
+    with _metrics_registry_lock:
+        _metrics_registry = metrics_registry
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Returns the `MetricsRegistry` shared by everything in this process"""
+    with _metrics_registry_lock:
+        return _metrics_registry
+
+
+def start_metrics_server(host: str, port: int) -> ThreadingHTTPServer:
+    """Serves the metrics of this process on `http://host:port/metrics`
+
+    Arguments:
+        host (str): the address to listen on
+        port (int): the port to listen on
+    """
+    server: ThreadingHTTPServer = ThreadingHTTPServer(
+        (host, port), MetricsRequestHandler)
+    Thread(target=server.serve_forever, name='Metrics', daemon=True).start()
+    return server
@@ -0,0 +1,190 @@
+from cProfile import Profile
+from multiprocessing import Queue
+from os import makedirs, path
+from re import sub
+from settings import (IS_TRACEMALLOC_ENABLED,
+                      PROFILE_DIRECTORY,
+                      PROFILE_DUMP_INTERVAL,
+                      PROFILED_ASSISTANTS)
+from threading import Lock
+from tracemalloc import is_tracing, start, stop, take_snapshot
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class AssistantProfiler:
+    """Profiles the evaluations of individual assistants on demand
+
+    While an assistant is profiled, each of its evaluations runs under its
+    own `cProfile.Profile`. Every `dump_interval` evaluations the aggregated
+    stats are written to `<directory>/<assistant>.pstats` (readable with
+    `pstats` or snakeviz), along with a tracemalloc snapshot
+    `<directory>/<assistant>-<evaluations>.tracemalloc` if
+    `is_tracemalloc_enabled` is set
+
+    NOTE: Assistants that are not profiled only pay for one dict lookup per
+    evaluation
+
+    NOTE: Profiled evaluations run one at a time, since only one profiler
+    can be active at once on some Python versions. tracemalloc traces the
+    whole process while any assistant is profiled. Enabling or disabling
+    profiling never waits for a profiled evaluation to end, an assistant
+    disabled mid-evaluation is dumped once that evaluation ends
+
+    Attributes:
+        directory (str): directory the stats and snapshots are written to
+        dump_interval (int): evaluations between two dumps
+        is_tracemalloc_enabled (bool): flag to also take tracemalloc snapshots
+    """
+    def __init__(self,
+                 directory: str,
+                 dump_interval: int,
+                 is_tracemalloc_enabled: bool):
+        self.directory: str = directory
+        self.dump_interval: int = dump_interval
+        self.is_tracemalloc_enabled: bool = is_tracemalloc_enabled
+        self._profiles: Dict[str, Profile] = {}
+        self._evaluation_counts: Dict[str, int] = {}
+        # the profile of the evaluation running now, and the profiles that
+        # were disabled during it and are dumped once it ends
+        self._running_profile: Optional[Profile] = None
+        self._disabled_profiles: Dict[str, Tuple[Profile, int]] = {}
+        # guards the profiles, while `_run_lock` is held by the profiled
+        # evaluation running now
+        self._lock: Lock = Lock()
+        self._run_lock: Lock = Lock()
+
+    def enable(self, name: str):
+        """Starts profiling the evaluations of the assistant
+
+        Arguments:
+            name (str): name of the assistant
+        """
+        with self._lock:
+            if name in self._profiles:
+                return
+            self._profiles[name] = Profile()
+            self._evaluation_counts[name] = 0
+            if self.is_tracemalloc_enabled and not is_tracing():
+                start()
+
+    def disable(self, name: str):
+        """Stops profiling the assistant after dumping what was collected
+
+        Arguments:
+            name (str): name of the assistant
+        """
+        with self._lock:
+            if name not in self._profiles:
+                return
+            profile: Profile = self._profiles.pop(name)
+            evaluation_count: int = self._evaluation_counts.pop(name)
+            if profile is self._running_profile:
+                self._disabled_profiles[name] = (profile, evaluation_count)
+            else:
+                self._dump(name, profile, evaluation_count)
+            if len(self._profiles) == 0 and is_tracing():
+                stop()
+
+    def set_enabled(self, name: str, is_enabled: bool):
+        """Enables or disables profiling of the assistant
+
+        Arguments:
+            name (str): name of the assistant
+            is_enabled (bool): flag to profile the assistant
+        """
+        if is_enabled:
+            self.enable(name)
+        else:
+            self.disable(name)
+
+    def toggle(self, name: str) -> bool:
+        """Enables profiling of the assistant if disabled, or the other way
+
+        Returns:
+            bool: whether the assistant is profiled now
+        """
+        if self.is_enabled(name):
+            self.disable(name)
+            return False
+        self.enable(name)
+        return True
+
+    def is_enabled(self, name: str) -> bool:
+        return name in self._profiles
+
+    def run(self, name: str, evaluation: Callable[[], None]):
+        """Runs the evaluation, profiled if the assistant is profiled
+
+        Arguments:
+            name (str): name of the assistant
+            evaluation (Callable[[], None]): the evaluation to run
+        """
+        if name not in self._profiles:
+            evaluation()
+            return
+        with self._run_lock:
+            with self._lock:
+                profile: Optional[Profile] = self._profiles.get(name)
+                self._running_profile = profile
+            if profile is None:
+                # profiling was disabled while waiting for the lock
+                evaluation()
+                return
+            profile.enable()
+            try:
+                evaluation()
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._running_profile = None
+                    self._finish_evaluation(name, profile)
+
+    def _finish_evaluation(self, name: str, profile: Profile):
+        if name in self._disabled_profiles:
+            _, evaluation_count = self._disabled_profiles.pop(name)
+            self._dump(name, profile, evaluation_count + 1)
+            return
+        self._evaluation_counts[name] += 1
+        if self._evaluation_counts[name] % self.dump_interval == 0:
+            self._dump(name, profile, self._evaluation_counts[name])
+
+    def _dump(self, name: str, profile: Profile, evaluation_count: int):
+        makedirs(self.directory, exist_ok=True)
+        file_name: str = sub(r'\W+', '_', name)
+        profile.dump_stats(path.join(self.directory, file_name + '.pstats'))
+        if is_tracing():
+            take_snapshot().dump(path.join(
+                self.directory,
+                file_name + '-' + str(evaluation_count) + '.tracemalloc'))
+
+
+def apply_profiling_forever(channel: Queue):
+    """Enables or disables profiling as the driver asks over the channel
+
+    NOTE: Binding processes receive `(name, is_enabled)` tuples from the
+    driver through it, since profiling is toggled in the driver
+    """
+    while 1:
+        name, is_enabled = channel.get()
+        get_profiler().set_enabled(name, is_enabled)
+
+
+def _create_profiler(names: List[str]) -> AssistantProfiler:
+    profiler: AssistantProfiler = AssistantProfiler(PROFILE_DIRECTORY,
+                                                    PROFILE_DUMP_INTERVAL,
+                                                    IS_TRACEMALLOC_ENABLED)
+    for name in names:
+        profiler.enable(name)
+    return profiler
+
+
+_profiler: AssistantProfiler = _create_profiler(PROFILED_ASSISTANTS)
+
+
+def get_profiler() -> AssistantProfiler:
+    """Returns the `AssistantProfiler` shared by everything in this process
+
+    NOTE: Every assistant named in `PROFILED_ASSISTANTS` is profiled from the
+    start
+    """
+    return _profiler
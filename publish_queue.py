@@ -0,0 +1,229 @@
+from das_client import get_das_client
+from errors import AssistantError, CircuitOpenError
+from metrics import get_metrics_registry, MetricsRegistry
+from settings import DEFAULT_PRIORITY, PRIORITIES
+from shadow_cache import get_shadow_cache
+from threading import Condition, Lock, Thread
+from time import monotonic
+from traceback import print_exception
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# what a `PublishQueue` holds per zone: name, signal, on_failure, priority
+PendingSignal = Tuple[str, Dict[str, str], Callable[[], None], str]
+
+
+class PublishQueue:
+    """A latest-wins queue of signals waiting to be published, one per zone
+
+    Assistants never POST to the Das API themselves, the `DasPublisher`
+    `put()`s their signal here and a single writer thread drains the queue.
+    If a zone already has a signal waiting, the newer signal replaces it, so
+    a slow Das API can never receive an older color after a newer one, and
+    there is never more than one request in flight nor more than one pending
+    signal per zone
+
+    NOTE: The writer posts the pending signal of the highest priority first,
+    in the order of `PRIORITIES`, and the longest pending one within a
+    priority. A replaced signal keeps its place in the queue
+
+    NOTE: If publishing fails, the error is elaborated (or printed, if it is
+    not an `AssistantError`) and `on_failure` of that signal is called so
+    the assistant knows its signal never made it. The writer keeps running
+    whatever it fails with
+
+    NOTE: While the `CircuitBreaker` of the `DasClient` is open, signals are
+    held rather than failed, and the writer waits for the next probe instead
+    of posting. Once the Das API recovers, the newest signal of every zone is
+    published again in a single batch, since the Das API may have lost them
+
+    NOTE: Once `close()` is called, every signal is silently dropped
+    """
+    def __init__(self):
+        self._pending: Dict[str, PendingSignal] = {}
+        self._desired: Dict[str, PendingSignal] = {}
+        self._pending_since: Dict[str, float] = {}
+        self._condition: Condition = Condition()
+        self._writer: Optional[Thread] = None
+        self._is_writing: bool = False
+        self._writing_zone_id: Optional[str] = None
+        self._is_closed: bool = False
+
+    def put(self,
+            name: str,
+            signal: Dict[str, str],
+            on_failure: Callable[[], None],
+            priority: str = DEFAULT_PRIORITY):
+        """Queues the signal, replacing any signal still waiting for its zone
+
+        Arguments:
+            name (str): name of the assistant publishing, used for errors
+            signal (Dict[str, str]): the signal to display
+            on_failure (Callable[[], None]): called if publishing fails
+            priority (str): one of the `PRIORITIES` in settings
+        """
+        with self._condition:
+            if self._is_closed:
+                return
+            if signal['zoneId'] in self._pending:
+                get_metrics_registry().increment(
+                    self._pending[signal['zoneId']][0],
+                    'publishes',
+                    'superseded')
+            else:
+                self._pending_since[signal['zoneId']] = monotonic()
+            self._pending[signal['zoneId']] = (name,
+                                               signal,
+                                               on_failure,
+                                               priority)
+            self._desired[signal['zoneId']] = (name,
+                                               signal,
+                                               on_failure,
+                                               priority)
+            if self._writer is None:
+                get_das_client().circuit_breaker.add_recovery_callback(
+                    self._republish_all)
+                self._writer = Thread(target=self._write_forever,
+                                      name='Publisher',
+                                      daemon=True)
+                self._writer.start()
+            self._condition.notify_all()
+
+    def close(self, timeout: float) -> bool:
+        """Drops every pending signal and waits for the one being published
+
+        Arguments:
+            timeout (float): the most seconds to wait
+
+        Returns:
+            bool: whether no signal is being published anymore
+        """
+        with self._condition:
+            self._is_closed = True
+            self._pending.clear()
+            self._desired.clear()
+            self._pending_since.clear()
+            return self._condition.wait_for(lambda: not self._is_writing,
+                                            timeout)
+
+    def discard(self, zone_ids: List[str], timeout: float) -> bool:
+        """Drops the pending signals of the zones and waits for the one of
+        them being published
+
+        NOTE: Used when assistants are unbound, so that none of their signals
+        can reach the Das API after their zones are cleared
+
+        Arguments:
+            zone_ids (List[str]): the zone_ids whose signals are dropped
+            timeout (float): the most seconds to wait
+
+        Returns:
+            bool: whether no signal of the zones is being published anymore
+        """
+        with self._condition:
+            for zone_id in zone_ids:
+                self._pending.pop(zone_id, None)
+                self._desired.pop(zone_id, None)
+                self._pending_since.pop(zone_id, None)
+            return self._condition.wait_for(
+                lambda: self._writing_zone_id not in zone_ids,
+                timeout)
+
+    def _republish_all(self):
+        # called back by the `CircuitBreaker` once the Das API recovers,
+        # without replacing any newer signal that is still pending. The
+        # signal being posted, such as the probe that closed the breaker,
+        # is already on its way
+        with self._condition:
+            for zone_id, pending_signal in self._desired.items():
+                if (zone_id not in self._pending and
+                        zone_id != self._writing_zone_id):
+                    get_metrics_registry().increment(pending_signal[0],
+                                                     'publishes',
+                                                     'republished')
+                    self._pending[zone_id] = pending_signal
+                    self._pending_since[zone_id] = monotonic()
+            self._condition.notify_all()
+
+    def _hold(self, pending_signal: PendingSignal, retry_delay: float):
+        # puts the signal back unless a newer one replaced it meanwhile, and
+        # waits for the next probe or for any other signal to be put
+        zone_id: str = pending_signal[1]['zoneId']
+        with self._condition:
+            if self._is_closed or self._desired.get(zone_id) is None:
+                return
+            get_metrics_registry().increment(pending_signal[0],
+                                             'publishes',
+                                             'held')
+            if zone_id not in self._pending:
+                self._pending[zone_id] = pending_signal
+                self._pending_since[zone_id] = monotonic()
+            self._is_writing = False
+            self._writing_zone_id = None
+            self._condition.notify_all()
+            self._condition.wait(retry_delay)
+
+    def _take_next(self) -> PendingSignal:
+        with self._condition:
+            self._is_writing = False
+            self._writing_zone_id = None
+            self._condition.notify_all()
+            while len(self._pending) == 0:
+                self._condition.wait()
+            # `min()` keeps the first of equal ranks, and dicts keep the
+            # order zones became pending in
+            zone_id: str = min(
+                self._pending,
+                key=lambda z: PRIORITIES.index(self._pending[z][3]))
+            self._is_writing = True
+            self._writing_zone_id = zone_id
+            pending_signal: PendingSignal = self._pending.pop(zone_id)
+            get_metrics_registry().observe_queueing_delay(
+                'publish',
+                pending_signal[3],
+                monotonic() - self._pending_since.pop(zone_id))
+            return pending_signal
+
+    def _write_forever(self):
+        metrics: MetricsRegistry = get_metrics_registry()
+        while 1:
+            pending_signal: PendingSignal = self._take_next()
+            name, signal, on_failure, _ = pending_signal
+            try:
+                with metrics.time(name, 'publish_post'):
+                    get_das_client().set_signal(name, signal)
+            except CircuitOpenError as e:
+                self._hold(pending_signal, e.retry_delay)
+                continue
+            except AssistantError as e:
+                e.elaborate()
+                metrics.increment(name, 'errors', type(e).__name__)
+                metrics.increment(name, 'publishes', 'failed')
+                on_failure()
+                continue
+            except Exception as e:
+                # a dead writer would silently never publish anything again
+                print_exception(type(e), e, e.__traceback__)
+                metrics.increment(name, 'errors', type(e).__name__)
+                metrics.increment(name, 'publishes', 'failed')
+                on_failure()
+                continue
+            metrics.increment(name, 'publishes', 'sent')
+            get_shadow_cache().update_signal(signal)
+
+
+_publish_queue: Optional[PublishQueue] = None
+_publish_queue_lock: Lock = Lock()
+
+
+def get_publish_queue() -> PublishQueue:
+    """Returns the `PublishQueue` shared by every assistant in this process
+
+    NOTE: The queue is created lazily so that forked bindings never inherit a
+    queue whose writer thread only exists in their parent
+    """
+    global _publish_queue
+    with _publish_queue_lock:
+        if _publish_queue is None:
+            _publish_queue = PublishQueue()
+        return _publish_queue
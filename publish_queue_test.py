@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+from circuit_breaker import CircuitBreaker
+from das_client import DasClient
+from errors import DasApplicationNotRunningError
+from publish_queue import PublishQueue
+from requests import exceptions as requests_exceptions, Response
+from retry import RetryPolicy
+from threading import Event
+from time import monotonic, sleep
+from typing import Dict, List
+from unittest import main, TestCase
+from unittest.mock import patch
+
+
+class BrokenDasClient:
+    """Fails to post the first signal with an error that is not an
+    `AssistantError`, and posts every later signal
+    """
+    def __init__(self):
+        self.circuit_breaker: CircuitBreaker = CircuitBreaker(3, 5.0)
+        self.posted_signals: List[Dict[str, str]] = []
+        self._is_broken: bool = True
+
+    def set_signal(self, name: str, signal: Dict[str, str]):
+        if self._is_broken:
+            self._is_broken = False
+            raise KeyError('zoneId')
+        self.posted_signals.append(signal)
+
+
+class PublishQueueTest(TestCase):
+    def test_writer_survives_unexpected_errors(self):
+        client: BrokenDasClient = BrokenDasClient()
+        queue: PublishQueue = PublishQueue()
+        failed: Event = Event()
+        with patch('publish_queue.get_das_client', return_value=client), \
+                patch('publish_queue.print_exception'):
+            queue.put('Broken', {'zoneId': '1,1'}, failed.set)
+            self.assertTrue(failed.wait(5.0))
+            queue.put('Working', {'zoneId': '2,2'}, lambda: None)
+            started_at: float = monotonic()
+            while (len(client.posted_signals) == 0 and
+                   monotonic() - started_at < 5.0):
+                sleep(0.01)
+            queue.close(5.0)
+        self.assertEqual(client.posted_signals, [{'zoneId': '2,2'}])
+
+
+class DasClientTest(TestCase):
+    def setUp(self):
+        self.client: DasClient = DasClient('http://127.0.0.1:1',
+                                           1.0,
+                                           1.0,
+                                           1,
+                                           CircuitBreaker(3, 5.0),
+                                           RetryPolicy(1, 0.0, 0.0))
+
+    def test_broken_responses_are_assistant_errors(self):
+        with patch.object(self.client._session,
+                          'request',
+                          side_effect=requests_exceptions.ChunkedEncodingError):
+            with self.assertRaises(DasApplicationNotRunningError):
+                self.client.set_signal('Broken', {'zoneId': '1,1'})
+
+    def test_unreadable_shadows_are_assistant_errors(self):
+        response: Response = Response()
+        response.status_code = 200
+        response._content = b'not json'
+        with patch.object(self.client._session,
+                          'request',
+                          return_value=response):
+            with self.assertRaises(DasApplicationNotRunningError):
+                self.client.list_shadows('Broken')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,238 @@
+from das_client import get_das_client
+from errors import NoSignalError, OverrideError
+from math import inf
+from metrics import get_metrics_registry
+from publish_queue import get_publish_queue
+from settings import (DAS_PUBLISHER,
+                      DEFAULT_PRIORITY,
+                      MEMORY_PUBLISHER,
+                      NULL_PUBLISHER,
+                      PUBLISHER)
+from shadow_cache import get_shadow_cache
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class Publisher:
+    """Where assistants publish their signals and look up what is displayed
+
+    `Assistant._set_values()` and `Assistant._get_all_signals()` go through
+    the `Publisher` of the process, so the whole evaluation pipeline runs the
+    same way whichever publisher ends up with the signals
+
+    NOTE: `get_signal()` and `put()` must be overridden, otherwise they raise
+    an `OverrideError`, everything else does nothing by default
+    """
+    def get_signal(self,
+                   name: str,
+                   zone_id: str,
+                   deadline_at: float = inf) -> Dict[str, str]:
+        """Returns the signal currently displayed on the given zone
+
+        NOTE: A `NoSignalError` is raised if nothing is displayed on the zone
+
+        Arguments:
+            name (str): name of the assistant asking, used for errors
+            zone_id (str): the zone_id of the signal
+            deadline_at (float): the `monotonic()` time after which a lookup
+                that failed is not retried anymore
+        """
+        raise OverrideError(type(self).__name__, 'signal lookups')
+
+    def put(self,
+            name: str,
+            signal: Dict[str, str],
+            on_failure: Callable[[], None],
+            priority: str = DEFAULT_PRIORITY):
+        """Publishes the signal on the zone given by its `zoneId`
+
+        NOTE: Publishing may happen later, and a signal may be replaced by a
+        newer signal for its zone before it is published. Signals of a
+        higher priority should be published first
+
+        Arguments:
+            name (str): name of the assistant publishing, used for errors
+            signal (Dict[str, str]): the signal to display
+            on_failure (Callable[[], None]): called if publishing fails
+            priority (str): one of the `PRIORITIES` in settings
+        """
+        raise OverrideError(type(self).__name__, 'publishing')
+
+    def clear_signal(self, name: str, zone_id: str):
+        """Clears the signal this application displays on the given zone
+
+        Arguments:
+            name (str): name of the caller, used for errors
+            zone_id (str): the zone_id of the signal
+        """
+        return
+
+    def discard(self, zone_ids: List[str], timeout: float) -> bool:
+        """Drops the signals of the zones that were not published yet
+
+        Arguments:
+            zone_ids (List[str]): the zone_ids whose signals are dropped
+            timeout (float): the most seconds to wait for a signal of the
+                zones that is being published
+
+        Returns:
+            bool: whether no signal of the zones is being published anymore
+        """
+        return True
+
+    def close(self, timeout: float) -> bool:
+        """Drops every signal that was not published yet
+
+        Arguments:
+            timeout (float): the most seconds to wait for a signal that is
+                being published
+
+        Returns:
+            bool: whether no signal is being published anymore
+        """
+        return True
+
+
+class DasPublisher(Publisher):
+    """Publishes to the Das API through the `PublishQueue` of the process
+
+    NOTE: What is displayed is looked up in the `ShadowCache` of the process
+    """
+    def get_signal(self,
+                   name: str,
+                   zone_id: str,
+                   deadline_at: float = inf) -> Dict[str, str]:
+        return get_shadow_cache().get_signal(name, zone_id, deadline_at)
+
+    def put(self,
+            name: str,
+            signal: Dict[str, str],
+            on_failure: Callable[[], None],
+            priority: str = DEFAULT_PRIORITY):
+        get_publish_queue().put(name, signal, on_failure, priority)
+
+    def clear_signal(self, name: str, zone_id: str):
+        get_das_client().delete_signal(name, zone_id)
+        get_shadow_cache().forget_signal(zone_id)
+
+    def discard(self, zone_ids: List[str], timeout: float) -> bool:
+        return get_publish_queue().discard(zone_ids, timeout)
+
+    def close(self, timeout: float) -> bool:
+        return get_publish_queue().close(timeout)
+
+
+class MemoryPublisher(Publisher):
+    """Displays every signal in memory instead of on a keyboard
+
+    Signals are published right away and never fail, so assistants run at
+    full speed without any network, such as in benchmarks
+
+    Attributes:
+        signals (Dict[str, Dict[str, str]]): the signal displayed on every
+            zone, by zoneId
+        received_signals (List[Tuple[float, Dict[str, str]]]): every signal
+            along with the `perf_counter()` it was published at, if recording
+        is_recording (bool): flag to fill `received_signals`, which grows
+            with every signal, so it is only set by benchmarks
+    """
+    def __init__(self, is_recording: bool = False):
+        self.signals: Dict[str, Dict[str, str]] = {}
+        self.received_signals: List[Tuple[float, Dict[str, str]]] = []
+        self.is_recording: bool = is_recording
+        self._is_closed: bool = False
+        self._lock: Lock = Lock()
+
+    def get_signal(self,
+                   name: str,
+                   zone_id: str,
+                   deadline_at: float = inf) -> Dict[str, str]:
+        with self._lock:
+            if zone_id in self.signals:
+                return self.signals[zone_id]
+        raise NoSignalError(name, zone_id)
+
+    def put(self,
+            name: str,
+            signal: Dict[str, str],
+            on_failure: Callable[[], None],
+            priority: str = DEFAULT_PRIORITY):
+        with self._lock:
+            if self._is_closed:
+                return
+            self.signals[signal['zoneId']] = signal
+            if self.is_recording:
+                self.received_signals.append((perf_counter(), signal))
+        get_metrics_registry().increment(name, 'publishes', 'sent')
+
+    def clear_signal(self, name: str, zone_id: str):
+        with self._lock:
+            self.signals.pop(zone_id, None)
+
+    def close(self, timeout: float) -> bool:
+        with self._lock:
+            self._is_closed = True
+        return True
+
+
+class NullPublisher(Publisher):
+    """Drops every signal, for measuring what the assistants cost on their own
+
+    NOTE: Nothing is ever displayed, so every lookup raises a `NoSignalError`,
+    but every signal is still counted as sent like with a `MemoryPublisher`
+    """
+    def get_signal(self,
+                   name: str,
+                   zone_id: str,
+                   deadline_at: float = inf) -> Dict[str, str]:
+        raise NoSignalError(name, zone_id)
+
+    def put(self,
+            name: str,
+            signal: Dict[str, str],
+            on_failure: Callable[[], None],
+            priority: str = DEFAULT_PRIORITY):
+        get_metrics_registry().increment(name, 'publishes', 'sent')
+
+
+def create_publisher(kind: str) -> Publisher:
+    """Returns a new publisher of the given kind
+
+    Arguments:
+        kind (str): `DAS_PUBLISHER`, `MEMORY_PUBLISHER` or `NULL_PUBLISHER`
+    """
+    if kind == DAS_PUBLISHER:
+        return DasPublisher()
+    if kind == MEMORY_PUBLISHER:
+        return MemoryPublisher()
+    if kind == NULL_PUBLISHER:
+        return NullPublisher()
+    raise ValueError('Unknown publisher: ' + kind)
+
+
+_publisher: Optional[Publisher] = None
+_publisher_lock: Lock = Lock()
+
+
+def set_publisher(publisher: Publisher):
+    """Replaces the `Publisher` shared by every assistant in this process
+
+    NOTE: Used by shard workers, whose signals are forwarded to the driver,
+    and by benchmarks, which publish without a Das Keyboard
+    """
+    global _publisher
+    with _publisher_lock:
+        _publisher = publisher
+
+
+def get_publisher() -> Publisher:
+    """Returns the `Publisher` shared by every assistant in this process
+
+    NOTE: The publisher is created lazily, of the kind set by `PUBLISHER`
+    """
+    global _publisher
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = create_publisher(PUBLISHER)
+        return _publisher
@@ -0,0 +1,99 @@
+from assistant import Assistant
+from importlib import import_module
+from threading import Lock
+from time import perf_counter
+from typing import Dict, Type
+
+
+# the module every assistant class is defined in, by class name
+ASSISTANT_MODULES: Dict[str, str] = {
+    'ClockAssistant': 'clock_assistant',
+    'CPUAssistant': 'cpu_assistant',
+    'GitBranchAssistant': 'git_branch_assistant',
+    'GitFetchAssistant': 'git_fetch_assistant',
+    'GitStatusAssistant': 'git_status_assistant',
+    'JenkinsAssistant': 'jenkins_assistant',
+    'MessageAssistant': 'message_assistant',
+    'MetraAssistant': 'metra_assistant',
+    'SyntheticAssistant': 'synthetic_assistant',
+    'VagrantAssistant': 'vagrant_assistant',
+    'YamlAssistant': 'yaml_assistant',
+}
+
+
+class AssistantRegistry:
+    """Resolves assistant classes by name, importing their modules on first use
+
+    Assistant modules import heavy third-party packages (GitPython, psutil,
+    jenkins, yaml, dateutil), so a module is only imported once an assistant
+    of one of its classes is built, and never if the config does not use it
+
+    NOTE: How long every module took to import is recorded, see
+    `get_import_times()`
+
+    Attributes:
+        modules (Dict[str, str]): the module of every class, by class name
+    """
+    def __init__(self, modules: Dict[str, str]):
+        self.modules: Dict[str, str] = dict(modules)
+        self._classes: Dict[str, Type[Assistant]] = {}
+        self._import_times: Dict[str, float] = {}
+        self._lock: Lock = Lock()
+
+    def register(self, class_name: str, module_name: str):
+        """Registers a custom assistant class defined in the given module
+
+        Arguments:
+            class_name (str): name of the class
+            module_name (str): name of the module the class is defined in
+        """
+        with self._lock:
+            self.modules[class_name] = module_name
+
+    def get_class(self, class_name: str) -> Type[Assistant]:
+        """Returns the assistant class, importing its module if needed
+
+        NOTE: A `ValueError` is raised if the class is not registered or is
+        not an `Assistant`
+        """
+        with self._lock:
+            if class_name in self._classes:
+                return self._classes[class_name]
+            if class_name not in self.modules:
+                raise ValueError('Unknown assistant type: ' + class_name)
+            module_name: str = self.modules[class_name]
+            started_at: float = perf_counter()
+            assistant_class: object = getattr(import_module(module_name),
+                                              class_name,
+                                              None)
+            self._import_times.setdefault(module_name,
+                                          perf_counter() - started_at)
+            if not (isinstance(assistant_class, type) and
+                    issubclass(assistant_class, Assistant)):
+                raise ValueError(module_name + '.' + class_name +
+                                 ' is not an Assistant')
+            self._classes[class_name] = assistant_class
+            return assistant_class
+
+    def create(self,
+               class_name: str,
+               *args: object,
+               **kwargs: object) -> Assistant:
+        """Builds an assistant of the class with the given arguments"""
+        return self.get_class(class_name)(*args, **kwargs)
+
+    def get_import_times(self) -> Dict[str, float]:
+        """Returns the seconds every imported module took, by module name
+
+        NOTE: Packages imported by an earlier module are not counted again
+        """
+        with self._lock:
+            return dict(self._import_times)
+
+
+_assistant_registry: AssistantRegistry = AssistantRegistry(ASSISTANT_MODULES)
+
+
+def get_assistant_registry() -> AssistantRegistry:
+    """Returns the `AssistantRegistry` shared by everything in this process"""
+    return _assistant_registry
@@ -0,0 +1,113 @@
+from errors import (AssistantError,
+                    CircuitOpenError,
+                    ConnectionFailedError,
+                    DasApplicationNotRunningError,
+                    NoInternetError)
+from math import inf
+from metrics import get_metrics_registry
+from random import uniform
+from time import monotonic, sleep
+from typing import Callable, Tuple, TypeVar
+
+
+# the status codes a server answers with when trying again later may succeed
+RETRYABLE_STATUS_CODES: Tuple[int, ...] = (408, 429, 500, 502, 503, 504)
+
+T = TypeVar('T')
+
+
+def is_transient(error: AssistantError) -> bool:
+    """Returns whether trying again later may succeed where the error occurred
+
+    Dropped or refused connections and the status codes in
+    `RETRYABLE_STATUS_CODES` are transient. Anything else, such as a missing
+    job or an unexpected response, fails the same way every time
+
+    NOTE: A `CircuitOpenError` is never transient, the `CircuitBreaker`
+    already decided when the Das API is worth trying again
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, ConnectionFailedError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (DasApplicationNotRunningError, NoInternetError))
+
+
+class RetryPolicy:
+    """Calls a function again whenever it fails with a transient error
+
+    Between two attempts the policy backs off exponentially with full jitter:
+    the `n`th retry waits a random time between 0 and
+    `min(max_delay, base_delay * 2 ** (n - 1))`, so callers that failed
+    together do not retry together
+
+    NOTE: Only `AssistantError`'s are retried, and only if `is_retryable`
+    says so. Every retried error is elaborated, and the last error is raised
+    once the attempts are used up or the next attempt could not start before
+    the deadline
+
+    Attributes:
+        max_attempts (int): the most calls, including the first one
+        base_delay (float): the most seconds to wait before the first retry
+        max_delay (float): the most seconds to wait before any retry
+        is_retryable (Callable[[AssistantError], bool]): whether an error is
+            worth another attempt
+    """
+    def __init__(self,
+                 max_attempts: int,
+                 base_delay: float,
+                 max_delay: float,
+                 is_retryable: Callable[[AssistantError],
+                                        bool] = is_transient):
+        if max_attempts < 1:
+            raise ValueError('A retry policy needs at least one attempt: ' +
+                             str(max_attempts))
+        if base_delay < 0 or max_delay < base_delay:
+            raise ValueError('The delays of a retry policy must satisfy 0 ' +
+                             '<= base_delay <= max_delay: ' + str(base_delay) +
+                             ', ' + str(max_delay))
+        self.max_attempts: int = max_attempts
+        self.base_delay: float = base_delay
+        self.max_delay: float = max_delay
+        self.is_retryable: Callable[[AssistantError], bool] = is_retryable
+
+    def get_backoff(self, retry: int) -> float:
+        """Returns the jittered seconds to wait before the given retry
+
+        Arguments:
+            retry (int): 1 for the first retry, 2 for the second, etc.
+        """
+        return uniform(0.0, min(self.max_delay,
+                                self.base_delay * 2 ** (retry - 1)))
+
+    def call(self,
+             name: str,
+             function: Callable[[], T],
+             deadline_at: float = inf) -> T:
+        """Returns what the function returns, retrying transient errors
+
+        Arguments:
+            name (str): name of the caller, used for metrics
+            function (Callable[[], T]): the call to make
+            deadline_at (float): the `monotonic()` time by which the last
+                attempt must have started
+
+        Returns:
+            T: whatever the first successful attempt returned
+        """
+        retry: int = 0
+        while 1:
+            try:
+                return function()
+            except AssistantError as e:
+                retry += 1
+                if retry >= self.max_attempts or not self.is_retryable(e):
+                    raise
+                backoff: float = self.get_backoff(retry)
+                if monotonic() + backoff >= deadline_at:
+                    raise
+                e.elaborate()
+                get_metrics_registry().increment(name,
+                                                 'retries',
+                                                 type(e).__name__)
+            sleep(backoff)
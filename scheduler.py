@@ -0,0 +1,233 @@
+from assistant import Assistant
+from asyncio import (AbstractEventLoop,
+                     Event,
+                     TimeoutError as AsyncTimeoutError,
+                     new_event_loop,
+                     wait_for)
+from heapq import heappop, heappush
+from itertools import count
+from threading import Event as ThreadEvent, Thread
+from time import monotonic
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from worker_pool import get_concurrency_gauge, get_worker_pool
+
+
+def compute_phases(assistants: List[Assistant]) -> Dict[Assistant, float]:
+    """Spreads the first evaluation of assistants that share a delay
+
+    The n assistants that share a delay have their first evaluations spread
+    evenly across that delay, in the order they are given, so that they do
+    not evaluate in lockstep
+
+    Arguments:
+        assistants (List[Assistant]): the assistants to spread
+
+    Returns:
+        Dict[Assistant, float]: seconds to wait before the first evaluation
+    """
+    assistants_by_delay: Dict[float, List[Assistant]] = {}
+    for assistant in assistants:
+        assistants_by_delay.setdefault(assistant.delay, []).append(assistant)
+    phases: Dict[Assistant, float] = {}
+    for delay, same_delay_assistants in assistants_by_delay.items():
+        for index, assistant in enumerate(same_delay_assistants):
+            phases[assistant] = delay * index / len(same_delay_assistants)
+    return phases
+
+
+class Scheduler:
+    """A single-process scheduler that evaluates every assistant from a timer heap
+
+    Rather than forking a process per assistant and spawning a thread for
+    every evaluation, the `Scheduler` keeps a heap of
+    `(next evaluation time, sequence, assistant)` entries on one asyncio event
+    loop. Whenever the earliest entry is due, the evaluation of that assistant
+    is handed to the bounded worker pool so that blocking `state_identifier`
+    calls never stall the loop. While every worker is busy, the pool starts
+    the waiting evaluations by the priority of their assistant
+
+    NOTE: The `Assistant` subclass contract is unchanged, the scheduler
+    requests evaluations exactly the way `create_binding()` does, including
+    its overrun protection
+
+    NOTE: The first evaluations are spread by `compute_phases()`
+
+    Attributes:
+        assistants (List[Assistant]): the assistants to schedule
+    """
+    def __init__(self, assistants: List[Assistant]):
+        self.assistants: List[Assistant] = assistants
+        self._heap: List[Tuple[float, int, Assistant]] = []
+        self._sequence: Iterator[int] = count()
+        self._due: Dict[Assistant, Tuple[float, int]] = {}
+        self._loop: Optional[AbstractEventLoop] = None
+        self._wakeup: Optional[Event] = None
+        self._thread: Optional[Thread] = None
+        self._is_running: bool = False
+
+    def start(self):
+        """Runs the event loop on a background thread until `stop()` is called
+        """
+        self._is_running = True
+        for assistant in self.assistants:
+            assistant._expedite_hook = self._expedite
+            assistant._publish_restored_values()
+            assistant._start_watching()
+        self._thread = Thread(target=self._run_loop,
+                              name='Scheduler',
+                              daemon=True)
+        self._thread.start()
+
+    def stop(self, grace_period: float) -> bool:
+        """Stops scheduling new evaluations and waits for the running ones
+
+        NOTE: Evaluations that are already running are not interrupted, they
+        are given up to `grace_period` seconds to finish
+
+        Arguments:
+            grace_period (float): the most seconds to wait for evaluations
+
+        Returns:
+            bool: whether every running evaluation finished in time
+        """
+        self._is_running = False
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        if self._thread is not None:
+            self._thread.join()
+        return get_concurrency_gauge().wait_until_idle(grace_period)
+
+    def add(self, assistants: List[Assistant]):
+        """Starts scheduling more assistants while the scheduler is running
+
+        NOTE: The first evaluations of the added assistants are spread by
+        `compute_phases()` among themselves
+
+        Arguments:
+            assistants (List[Assistant]): the assistants to add
+        """
+        for assistant in assistants:
+            assistant._expedite_hook = self._expedite
+            assistant._publish_restored_values()
+            assistant._start_watching()
+            self.assistants.append(assistant)
+        self._call_in_loop(self._add_in_loop, assistants)
+
+    def remove(self, assistants: List[Assistant], grace_period: float) -> bool:
+        """Stops scheduling the assistants and waits for their evaluations
+
+        NOTE: Evaluations of other assistants are not waited for
+
+        Arguments:
+            assistants (List[Assistant]): the assistants to remove
+            grace_period (float): the most seconds to wait for evaluations
+
+        Returns:
+            bool: whether every evaluation of the assistants finished in time
+        """
+        deadline: float = monotonic() + grace_period
+        for assistant in assistants:
+            assistant._expedite_hook = None
+            assistant._stop_watching()
+            self.assistants.remove(assistant)
+        self._call_in_loop(self._remove_in_loop, assistants)
+        return all(assistant._wait_until_idle(
+                       max(0.0, deadline - monotonic()))
+                   for assistant in assistants)
+
+    def get_concurrency(self) -> int:
+        """Returns the amount of evaluations running right now"""
+        return get_concurrency_gauge().get_current()
+
+    def get_peak_concurrency(self) -> int:
+        """Returns the most evaluations that ran at once so far"""
+        return get_concurrency_gauge().get_peak()
+
+    def _run_loop(self):
+        self._loop = new_event_loop()
+        try:
+            self._loop.run_until_complete(self._schedule())
+        finally:
+            self._loop.close()
+
+    def _push(self, when: float, assistant: Assistant):
+        sequence: int = next(self._sequence)
+        self._due[assistant] = (when, sequence)
+        heappush(self._heap, (when, sequence, assistant))
+
+    def _call_in_loop(self, callback: Callable[..., None], *args: object):
+        # blocks until the callback ran, so that the heap is up to date
+        if self._loop is None or not self._is_running:
+            return
+        is_done: ThreadEvent = ThreadEvent()
+
+        def call():
+            callback(*args)
+            is_done.set()
+
+        try:
+            self._loop.call_soon_threadsafe(call)
+        except RuntimeError:
+            return
+        while not is_done.wait(0.1) and self._is_running:
+            continue
+
+    def _add_in_loop(self, assistants: List[Assistant]):
+        now: float = self._loop.time()
+        phases: Dict[Assistant, float] = compute_phases(assistants)
+        for assistant in assistants:
+            self._push(now + phases[assistant], assistant)
+        self._wakeup.set()
+
+    def _remove_in_loop(self, assistants: List[Assistant]):
+        # their entries on the heap go stale and are skipped when popped
+        for assistant in assistants:
+            self._due.pop(assistant, None)
+
+    def _expedite(self, assistant: Assistant, delay: float):
+        if self._loop is None or not self._is_running:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._expedite_in_loop,
+                                            assistant,
+                                            delay)
+        except RuntimeError:
+            # the loop was closed while the evaluation was running
+            return
+
+    def _expedite_in_loop(self, assistant: Assistant, delay: float):
+        when: float = self._loop.time() + delay
+        # removed assistants are never scheduled again
+        if assistant not in self._due or self._due[assistant][0] <= when:
+            return
+        # the entry already on the heap goes stale and is skipped when popped
+        self._push(when, assistant)
+        self._wakeup.set()
+
+    async def _schedule(self):
+        self._wakeup = Event()
+        now: float = self._loop.time()
+        phases: Dict[Assistant, float] = compute_phases(self.assistants)
+        for assistant in self.assistants:
+            self._push(now + phases[assistant], assistant)
+        while self._is_running:
+            # with no assistant left, wait for one to be added
+            timeout: Optional[float] = (
+                self._heap[0][0] - self._loop.time()
+                if len(self._heap) > 0 else None)
+            if timeout is None or timeout > 0:
+                try:
+                    await wait_for(self._wakeup.wait(), timeout)
+                except AsyncTimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            when, sequence, assistant = heappop(self._heap)
+            if self._due.get(assistant) != (when, sequence):
+                continue
+            assistant._request_evaluation(get_worker_pool())
+            next_time: float = when + assistant._get_next_delay()
+            if next_time < self._loop.time():
+                # never burst to catch up on ticks missed while lagging
+                next_time = self._loop.time() + assistant._get_next_delay()
+            self._push(next_time, assistant)
@@ -1,4 +1,5 @@
-from typing import Dict
+from os import cpu_count, path
+from typing import Dict, List
 
 """General class for commonly used variables
 """
@@ -7,6 +8,135 @@ IS_DEBUG_MODE: bool = False
 BASE_URL: str = 'http://localhost:27301/api/1.0/signals'
 PID: str = 'DK5QPID'
 HEADERS: Dict[str, str] = {'Content-type': 'application/json'}
+
+# `PROCESS_MODE` forks one process per assistant, `EVENT_LOOP_MODE` schedules
+# every assistant from a single process on a bounded pool of worker threads,
+# `SHARDED_MODE` packs the assistants into `SHARD_COUNT` worker processes
+PROCESS_MODE: str = 'process'
+EVENT_LOOP_MODE: str = 'event loop'
+SHARDED_MODE: str = 'sharded'
+DRIVER_MODE: str = PROCESS_MODE
+
+# `DAS_PUBLISHER` publishes the signals to the Das API, while
+# `MEMORY_PUBLISHER` displays them in memory and `NULL_PUBLISHER` drops them,
+# so assistants can be run and measured without a Das Keyboard
+DAS_PUBLISHER: str = 'das'
+MEMORY_PUBLISHER: str = 'memory'
+NULL_PUBLISHER: str = 'null'
+PUBLISHER: str = DAS_PUBLISHER
+
+# the driver builds the assistants declared in the YAML config if it exists,
+# otherwise the assistants returned by `init_assistants()` in config.py
+CONFIG_PATH: str = 'config.yaml'
+CONFIG_CACHE_PATH: str = '.config_cache.json'
+# the YAML config is checked for changes every so many seconds, and only the
+# assistants that changed are restarted
+IS_CONFIG_RELOAD_ENABLED: bool = True
+CONFIG_RELOAD_INTERVAL: float = 2.0
+
+# assistants without an explicit shard are balanced by the CPU they were
+# measured to use, which is remembered between runs in the costs file
+SHARD_COUNT: int = cpu_count() or 1
+SHARD_COSTS_PATH: str = '.shard_costs.json'
+
+# every evaluation runs on a pool of reused worker threads
+EVALUATION_POOL_SIZE: int = min(32, (cpu_count() or 1) + 4)
+
+# what happens when an evaluation is due while the previous one still runs
+OVERRUN_SKIP: str = 'skip'
+OVERRUN_COALESCE: str = 'coalesce'
+OVERRUN_QUEUE_ONE: str = 'queue one'
+OVERRUN_POLICIES: List[str] = [OVERRUN_SKIP,
+                               OVERRUN_COALESCE,
+                               OVERRUN_QUEUE_ONE]
+DEFAULT_OVERRUN_POLICY: str = OVERRUN_SKIP
+
+# under contention, evaluations and signals of a higher priority go first,
+# most urgent first in the list
+PRIORITY_HIGH: str = 'high'
+PRIORITY_NORMAL: str = 'normal'
+PRIORITY_LOW: str = 'low'
+PRIORITIES: List[str] = [PRIORITY_HIGH,
+                         PRIORITY_NORMAL,
+                         PRIORITY_LOW]
+DEFAULT_PRIORITY: str = PRIORITY_NORMAL
+
+# up to this fraction of the delay is randomly added to every delay, so that
+# assistants sharing a delay drift apart instead of evaluating in lockstep
+SCHEDULING_JITTER: float = 0.0
+
+# fraction of the delay that an evaluation may take unless set per assistant
+DEFAULT_DEADLINE_FRACTION: float = 0.8
+
+# the driver serves the metrics of its assistants on http://host:port/metrics
+IS_METRICS_ENABLED: bool = True
+METRICS_HOST: str = '127.0.0.1'
+METRICS_PORT: int = 27302
+# binding processes and shards send their metrics to the driver in batches,
+# at most this many seconds apart
+METRICS_FORWARD_INTERVAL: float = 1.0
+
+# every state change is emitted to the subscribers of the event bus, and
+# streamed as lines of JSON to every client of the Unix socket. A subscriber
+# that falls this many events behind loses the oldest ones
+IS_EVENT_STREAM_ENABLED: bool = True
+EVENT_SOCKET_PATH: str = 'prometheus5q.sock'
+EVENT_SUBSCRIBER_QUEUE_SIZE: int = 1000
+
+# the last state, published values and persisted fields of every assistant
+# are written to the state file at most every flush interval, and restored
+# when the driver starts so the keyboard lights up right away. The state file
+# is next to this file, wherever the driver is started from
+IS_STATE_STORE_ENABLED: bool = True
+STATE_PATH: str = path.join(path.dirname(path.abspath(__file__)),
+                            '.assistant_state.json')
+STATE_FLUSH_INTERVAL: float = 5.0
+
+# evaluations of the named assistants are profiled with cProfile (and
+# optionally tracemalloc), dumping to the directory every so many evaluations
+PROFILED_ASSISTANTS: List[str] = []
+PROFILE_DIRECTORY: str = 'profiles'
+PROFILE_DUMP_INTERVAL: int = 100
+IS_TRACEMALLOC_ENABLED: bool = False
+
+# assistants that watch paths (such as the git assistants) are evaluated
+# once their paths stopped changing for the debounce, and otherwise only
+# every safety delay. Without watchdog, the paths are polled instead
+IS_FILE_WATCHING_ENABLED: bool = True
+FILE_WATCH_DEBOUNCE: float = 0.1
+FILE_WATCH_SAFETY_DELAY: float = 60.0
+FILE_WATCH_POLL_INTERVAL: float = 1.0
+
+# seconds running evaluations are given to finish when the driver shuts down
+SHUTDOWN_GRACE_PERIOD: float = 5.0
+
+# minimum seconds between two downloads of the shared `/shadows` snapshot
+SHADOW_CACHE_INTERVAL: float = 1.0
+# seconds between two comparisons of an unchanged signal against the Das API
+RECONCILIATION_INTERVAL: float = 60.0
+
+# the Das API is reached through a pool of kept-alive connections
+DAS_CONNECT_TIMEOUT: float = 1.0
+DAS_READ_TIMEOUT: float = 5.0
+DAS_POOL_SIZE: int = 10
+
+# once this many calls in a row to the Das API failed, nothing is sent to it
+# but a single probe every recovery interval until it answers again, after
+# which every zone is republished
+DAS_FAILURE_THRESHOLD: int = 3
+DAS_RECOVERY_INTERVAL: float = 5.0
+
+# calls failing with a transient error (see `is_transient()` in retry.py)
+# are retried up to the attempts, backing off exponentially with jitter from
+# the base delay up to the max delay. Requests to the Das API are retried
+# quickly, requests of assistants (Jenkins, Metra, etc.) within their deadline
+DAS_RETRY_ATTEMPTS: int = 2
+DAS_RETRY_BASE_DELAY: float = 0.1
+DAS_RETRY_MAX_DELAY: float = 0.5
+DEFAULT_RETRY_ATTEMPTS: int = 3
+DEFAULT_RETRY_BASE_DELAY: float = 0.5
+DEFAULT_RETRY_MAX_DELAY: float = 4.0
+
 COLORS: Dict[str, str] = {
     'red': '#CC0000',
     'orange': '#FF8000',
@@ -18,4 +148,5 @@ COLORS: Dict[str, str] = {
     'purple': '#330033',
     'pink': '#FF0066',
     'error': '#FFFFFF',
+    'timeout': '#FF00FF',
 }
@@ -0,0 +1,136 @@
+from das_client import get_das_client
+from errors import NoSignalError
+from math import inf
+from settings import SHADOW_CACHE_INTERVAL
+from threading import Condition, Lock
+from time import monotonic
+from typing import Dict, Optional
+
+
+class ShadowCache:
+    """A shared snapshot of the Das API `/shadows` list indexed by zoneId
+
+    Every assistant needs to know what its own zone currently displays, but
+    the Das API only reliably reports that through the full `/shadows` list.
+    Rather than each evaluation downloading and scanning that list, every
+    assistant in the process is served from one snapshot that is refreshed
+    at most once every `refresh_interval` seconds
+
+    NOTE: Simultaneous requests for a stale snapshot are coalesced, only the
+    first caller fetches while every other caller waits for that fetch and
+    then shares its result (or its error)
+
+    NOTE: The cache is only shared within a process. In `PROCESS_MODE` every
+    binding process has a cache of its own, so lookups are neither shared
+    nor coalesced across assistants, and in `SHARDED_MODE` only within each
+    shard. Only `EVENT_LOOP_MODE` shares one cache between every assistant
+
+    Attributes:
+        refresh_interval (float): minimum seconds between two fetches
+    """
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval: float = refresh_interval
+        self._signals: Dict[str, Dict[str, str]] = {}
+        self._error: Optional[Exception] = None
+        self._fetched_at: float = -inf
+        self._is_fetching: bool = False
+        self._condition: Condition = Condition()
+
+    def get_signal(self,
+                   name: str,
+                   zone_id: str,
+                   deadline_at: float = inf) -> Dict[str, str]:
+        """Returns the signal currently displayed on the given zone
+
+        NOTE: A `NoSignalError` is raised if nothing is displayed on the zone
+
+        Arguments:
+            name (str): name of the assistant asking, used for errors
+            zone_id (str): the zone_id of the signal
+            deadline_at (float): the `monotonic()` time after which a fetch
+                made for this call starts no retry
+        """
+        signals: Dict[str, Dict[str, str]] = self._get_snapshot(name,
+                                                                deadline_at)
+        if zone_id in signals:
+            return signals[zone_id]
+        raise NoSignalError(name, zone_id)
+
+    def update_signal(self, signal: Dict[str, str]):
+        """Records a signal that was just published into the snapshot
+
+        Arguments:
+            signal (Dict[str, str]): the signal that was published
+        """
+        with self._condition:
+            signals: Dict[str, Dict[str, str]] = dict(self._signals)
+            signals[signal['zoneId']] = signal
+            self._signals = signals
+
+    def forget_signal(self, zone_id: str):
+        """Removes the signal of a zone that was just cleared from the snapshot
+
+        Arguments:
+            zone_id (str): the zone_id of the signal
+        """
+        with self._condition:
+            signals: Dict[str, Dict[str, str]] = dict(self._signals)
+            signals.pop(zone_id, None)
+            self._signals = signals
+
+    def _is_fresh(self) -> bool:
+        return monotonic() - self._fetched_at < self.refresh_interval
+
+    def _get_snapshot(self,
+                      name: str,
+                      deadline_at: float) -> Dict[str, Dict[str, str]]:
+        with self._condition:
+            while not self._is_fresh():
+                if not self._is_fetching:
+                    self._is_fetching = True
+                    break
+                self._condition.wait()
+            else:
+                if self._error is not None:
+                    raise self._error
+                return self._signals
+        signals: Dict[str, Dict[str, str]] = {}
+        error: Optional[Exception] = None
+        try:
+            signals = self._fetch(name, deadline_at)
+        except Exception as e:
+            error = e
+        with self._condition:
+            self._signals = signals
+            self._error = error
+            self._fetched_at = monotonic()
+            self._is_fetching = False
+            self._condition.notify_all()
+        if error is not None:
+            raise error
+        return signals
+
+    def _fetch(self,
+               name: str,
+               deadline_at: float) -> Dict[str, Dict[str, str]]:
+        signals: Dict[str, Dict[str, str]] = {}
+        for signal in get_das_client().list_shadows(name, deadline_at):
+            signals.setdefault(signal['zoneId'], signal)
+        return signals
+
+
+_shadow_cache: Optional[ShadowCache] = None
+_shadow_cache_lock: Lock = Lock()
+
+
+def get_shadow_cache() -> ShadowCache:
+    """Returns the `ShadowCache` shared by every assistant in this process
+
+    NOTE: The cache is created lazily so that forked bindings never inherit a
+    cache (or a held lock) from their parent
+    """
+    global _shadow_cache
+    with _shadow_cache_lock:
+        if _shadow_cache is None:
+            _shadow_cache = ShadowCache(SHADOW_CACHE_INTERVAL)
+        return _shadow_cache
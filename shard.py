@@ -0,0 +1,453 @@
+from assistant import Assistant
+from event_bus import ChannelEventBus, get_event_bus, set_event_bus
+from functools import partial
+from json import dump, load
+from math import inf
+from metrics import (ChannelMetricsRegistry,
+                     get_metrics_registry,
+                     set_metrics_registry)
+from multiprocessing import Process, Queue
+from os import replace
+from profiler import get_profiler
+from publisher import create_publisher, get_publisher, Publisher, set_publisher
+from queue import Empty, Queue as LocalQueue
+from scheduler import Scheduler
+from settings import (DEFAULT_PRIORITY,
+                      METRICS_FORWARD_INTERVAL,
+                      PID,
+                      PUBLISHER,
+                      SHUTDOWN_GRACE_PERIOD)
+from signal import SIGINT, SIG_IGN, SIGTERM, signal
+from state_store import ChannelStateStore, get_state_store, set_state_store
+from threading import Lock, Thread
+from time import monotonic
+from types import FrameType
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+from worker_pool import get_worker_pool
+
+
+# what a shard sends for every signal:
+# (zoneId, name, color, message, blink, priority)
+ShardSignal = Tuple[str, str, str, str, bool, str]
+# what a shard sends once assistants were removed: their zoneIds, as a list
+# so that it cannot be mistaken for a `ShardSignal`
+ShardRemoval = List[str]
+
+# the commands a running shard accepts: (ADD, assistants), (REMOVE, names)
+# or (PROFILE, (name, is_enabled))
+SHARD_ADD: str = 'add'
+SHARD_REMOVE: str = 'remove'
+SHARD_PROFILE: str = 'profile'
+
+
+def load_costs(path: str) -> Dict[str, float]:
+    """Returns the costs measured in previous runs, by assistant name
+
+    NOTE: A missing or unreadable costs file is the same as no costs at all
+    """
+    try:
+        with open(path) as costs_file:
+            return {name: float(cost)
+                    for name, cost in load(costs_file).items()}
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def save_costs(path: str, costs: Dict[str, float]):
+    """Merges the costs into the costs file, replacing it atomically"""
+    all_costs: Dict[str, float] = load_costs(path)
+    all_costs.update(costs)
+    with open(path + '.tmp', 'w') as costs_file:
+        dump(all_costs, costs_file, indent=2, sort_keys=True)
+    replace(path + '.tmp', path)
+
+
+def estimate_costs(assistants: List[Assistant],
+                   costs: Dict[str, float]) -> Dict[str, float]:
+    """Returns the cost of every assistant, by name
+
+    Assistants whose cost was never measured are assumed to cost the average
+    of those that were, or of every measured cost if none of them was
+    """
+    known_costs: List[float] = [costs[assistant.name]
+                                for assistant in assistants
+                                if assistant.name in costs]
+    if len(known_costs) == 0:
+        known_costs = list(costs.values())
+    default_cost: float = (sum(known_costs) / len(known_costs)
+                           if len(known_costs) > 0 else 1.0)
+    return {assistant.name: costs.get(assistant.name, default_cost)
+            for assistant in assistants}
+
+
+def compute_shards(assistants: List[Assistant],
+                   shard_count: int,
+                   costs: Dict[str, float]) -> List[List[Assistant]]:
+    """Packs the assistants into `shard_count` shards of about equal cost
+
+    Assistants pinned with `set_shard()` stay on their shard. The others are
+    placed from the most to the least costly, each on the shard with the
+    least cost so far. Assistants whose cost was never measured are assumed
+    to cost the average, see `estimate_costs()`
+
+    Arguments:
+        assistants (List[Assistant]): the assistants to pack
+        shard_count (int): the amount of shards
+        costs (Dict[str, float]): the share of a core every assistant uses,
+            by name
+
+    Returns:
+        List[List[Assistant]]: the assistants of every shard
+    """
+    assistant_costs: Dict[str, float] = estimate_costs(assistants, costs)
+
+    def get_cost(assistant: Assistant) -> float:
+        return assistant_costs[assistant.name]
+
+    shards: List[List[Assistant]] = [[] for _ in range(shard_count)]
+    shard_costs: List[float] = [0.0] * shard_count
+    unpinned_assistants: List[Assistant] = []
+    for assistant in assistants:
+        if assistant.shard is None:
+            unpinned_assistants.append(assistant)
+            continue
+        shards[assistant.shard].append(assistant)
+        shard_costs[assistant.shard] += get_cost(assistant)
+    for assistant in sorted(unpinned_assistants, key=get_cost, reverse=True):
+        index: int = shard_costs.index(min(shard_costs))
+        shards[index].append(assistant)
+        shard_costs[index] += get_cost(assistant)
+    return shards
+
+
+class ShardPublisher(Publisher):
+    """Forwards the signals of a shard to the `Publisher` of the driver
+
+    Only a compact `ShardSignal` tuple crosses the process boundary. If the
+    driver fails to publish a signal, it sends the `zoneId` back over the
+    feedback channel and `on_failure` of that signal is called here
+
+    NOTE: Signals are looked up by the `lookup` publisher of the shard
+    itself, which for the `DasPublisher` means a `ShadowCache` per shard
+
+    Attributes:
+        channel (Queue): carries the signals of every shard to the driver
+        feedback_channel (Queue): carries the zones that failed to publish
+            back to this shard
+        lookup (Publisher): looks up what is displayed on a zone
+    """
+    def __init__(self,
+                 channel: Queue,
+                 feedback_channel: Queue,
+                 lookup: Publisher):
+        self.channel: Queue = channel
+        self.feedback_channel: Queue = feedback_channel
+        self.lookup: Publisher = lookup
+        self._on_failures: Dict[str, Callable[[], None]] = {}
+        self._is_closed: bool = False
+        self._lock: Lock = Lock()
+        Thread(target=self._receive_failures_forever,
+               name='Shard Feedback',
+               daemon=True).start()
+
+    def get_signal(self,
+                   name: str,
+                   zone_id: str,
+                   deadline_at: float = inf) -> Dict[str, str]:
+        return self.lookup.get_signal(name, zone_id, deadline_at)
+
+    def put(self,
+            name: str,
+            signal: Dict[str, str],
+            on_failure: Callable[[], None],
+            priority: str = DEFAULT_PRIORITY):
+        with self._lock:
+            if self._is_closed:
+                return
+            self._on_failures[signal['zoneId']] = on_failure
+        shard_signal: ShardSignal = (signal['zoneId'],
+                                     name,
+                                     signal['color'],
+                                     signal['message'],
+                                     signal['effect'] == 'BLINK',
+                                     priority)
+        self.channel.put(shard_signal)
+
+    def close(self, timeout: float) -> bool:
+        with self._lock:
+            self._is_closed = True
+        return True
+
+    def _receive_failures_forever(self):
+        while 1:
+            zone_id: str = self.feedback_channel.get()
+            with self._lock:
+                on_failure: Optional[Callable[[], None]] = (
+                    self._on_failures.get(zone_id))
+            if on_failure is not None:
+                on_failure()
+
+
+def _raise_keyboard_interrupt(signal_number: int,
+                              frame: Optional[FrameType]):
+    raise KeyboardInterrupt
+
+
+def run_shard(assistants: List[Assistant],
+              channel: Queue,
+              feedback_channel: Queue,
+              command_channel: Queue,
+              cost_channel: Queue,
+              event_channel: Queue,
+              state_channel: Queue,
+              metrics_channel: Queue):
+    """Runs the bindings of the assistants of one shard in its own process
+
+    The assistants are evaluated by a `Scheduler`, exactly like in
+    `EVENT_LOOP_MODE`. Like a binding process, the shard ignores SIGINT and
+    shuts down on SIGTERM, sending the costs it measured to the driver
+
+    NOTE: State changes are sent to the `EventBus` of the driver over the
+    `event_channel`, snapshots to its `StateStore` over the `state_channel`,
+    and metrics to its `MetricsRegistry` over the `metrics_channel`
+
+    NOTE: Assistants are added, removed and profiled while the shard runs
+    through the `command_channel`. Once removed assistants finished
+    evaluating, their zones are sent to the driver as a `ShardRemoval`
+    """
+    signal(SIGINT, SIG_IGN)
+    signal(SIGTERM, _raise_keyboard_interrupt)
+    set_publisher(ShardPublisher(channel,
+                                 feedback_channel,
+                                 create_publisher(PUBLISHER)))
+    set_event_bus(ChannelEventBus(event_channel))
+    set_state_store(ChannelStateStore(state_channel))
+    metrics: ChannelMetricsRegistry = ChannelMetricsRegistry(
+        metrics_channel, METRICS_FORWARD_INTERVAL)
+    set_metrics_registry(metrics)
+    scheduler: Scheduler = Scheduler(assistants)
+    try:
+        scheduler.start()
+        while 1:
+            command, argument = command_channel.get()
+            if command == SHARD_ADD:
+                scheduler.add(argument)
+                continue
+            if command == SHARD_PROFILE:
+                get_profiler().set_enabled(*argument)
+                continue
+            removed_assistants: List[Assistant] = [
+                assistant for assistant in scheduler.assistants
+                if assistant.name in argument]
+            scheduler.remove(removed_assistants, SHUTDOWN_GRACE_PERIOD)
+            shard_removal: ShardRemoval = [assistant.zone_id
+                                           for assistant in removed_assistants]
+            channel.put(shard_removal)
+    except KeyboardInterrupt:
+        pass
+    scheduler.stop(SHUTDOWN_GRACE_PERIOD)
+    get_worker_pool().shutdown(wait=False)
+    get_publisher().close(0.0)
+    metrics.flush()
+    costs: Dict[str, float] = {}
+    for assistant in scheduler.assistants:
+        cost: Optional[float] = assistant._get_cost()
+        if cost is not None:
+            costs[assistant.name] = cost
+    cost_channel.put(costs)
+
+
+class ShardSupervisor:
+    """Starts the shard processes and publishes every signal they send
+
+    NOTE: The signals of every shard arrive on a single channel and are
+    handed to the `Publisher` of the driver, so with the `DasPublisher` there
+    is still only one writer posting to the Das API
+
+    Attributes:
+        shard_count (int): the amount of shard processes
+        costs_path (str): the file measured costs are loaded from and
+            saved to
+        processes (List[Process]): the shard processes, once started
+    """
+    def __init__(self, shard_count: int, costs_path: str):
+        self.shard_count: int = shard_count
+        self.costs_path: str = costs_path
+        self.processes: List[Process] = []
+        self._channel: Queue = Queue()
+        self._cost_channel: Queue = Queue()
+        self._feedback_channels: Dict[int, Queue] = {}
+        self._command_channels: Dict[int, Queue] = {}
+        self._removals: LocalQueue = LocalQueue()
+        self._costs: Dict[str, float] = {}
+        self._shard_costs: List[float] = [0.0] * shard_count
+        self._shard_indexes: Dict[str, int] = {}
+        self._assistant_costs: Dict[str, float] = {}
+
+    def start(self, assistants: List[Assistant]):
+        """Packs the assistants into shards and starts a process for each
+
+        NOTE: Shards that were left without an assistant are not started
+        """
+        self._costs = load_costs(self.costs_path)
+        shards: List[List[Assistant]] = compute_shards(assistants,
+                                                       self.shard_count,
+                                                       self._costs)
+        self._assistant_costs = estimate_costs(assistants, self._costs)
+        Thread(target=self._publish_forever,
+               name='Shard Publisher',
+               daemon=True).start()
+        for index, shard_assistants in enumerate(shards):
+            for assistant in shard_assistants:
+                self._shard_indexes[assistant.name] = index
+                self._shard_costs[index] += self._assistant_costs[
+                    assistant.name]
+            if len(shard_assistants) > 0:
+                self._start_shard(index, shard_assistants)
+
+    def add_assistants(self, assistants: List[Assistant]) -> List[Process]:
+        """Adds assistants to the running shards
+
+        Like in `compute_shards()`, pinned assistants go to their shard and
+        the others, most costly first, to the shard with the least cost
+
+        NOTE: A shard that was not started yet is started for its assistants
+
+        Returns:
+            List[Process]: the shard processes that were started
+        """
+        assistant_costs: Dict[str, float] = estimate_costs(assistants,
+                                                           self._costs)
+        self._assistant_costs.update(assistant_costs)
+        shards: Dict[int, List[Assistant]] = {}
+        for assistant in sorted(assistants,
+                                key=lambda a: assistant_costs[a.name],
+                                reverse=True):
+            index: int = (assistant.shard if assistant.shard is not None else
+                          self._shard_costs.index(min(self._shard_costs)))
+            shards.setdefault(index, []).append(assistant)
+            self._shard_indexes[assistant.name] = index
+            self._shard_costs[index] += assistant_costs[assistant.name]
+        started_processes: List[Process] = []
+        for index, shard_assistants in shards.items():
+            if index in self._command_channels:
+                self._command_channels[index].put((SHARD_ADD,
+                                                   shard_assistants))
+            else:
+                started_processes.append(self._start_shard(index,
+                                                           shard_assistants))
+        return started_processes
+
+    def remove_assistants(self,
+                          assistants: List[Assistant],
+                          timeout: float) -> bool:
+        """Removes assistants from their shards and waits until they stopped
+
+        NOTE: Once this returns, none of their signals is published anymore
+
+        Arguments:
+            assistants (List[Assistant]): the assistants to remove
+            timeout (float): the most seconds to wait
+
+        Returns:
+            bool: whether every shard confirmed the removal in time
+        """
+        deadline: float = monotonic() + timeout
+        names_by_shard: Dict[int, List[str]] = {}
+        for assistant in assistants:
+            index: int = self._shard_indexes.pop(assistant.name)
+            names_by_shard.setdefault(index, []).append(assistant.name)
+            self._shard_costs[index] -= self._assistant_costs.pop(
+                assistant.name)
+        for index, names in names_by_shard.items():
+            self._command_channels[index].put((SHARD_REMOVE, names))
+        # a removal confirmed too late for an earlier call may still arrive
+        remaining_zone_ids: Set[str] = {assistant.zone_id
+                                        for assistant in assistants}
+        while len(remaining_zone_ids) > 0:
+            try:
+                remaining_zone_ids.difference_update(self._removals.get(
+                    timeout=max(0.0, deadline - monotonic())))
+            except Empty:
+                return False
+        return True
+
+    def set_profiling(self, name: str, is_enabled: bool):
+        """Enables or disables profiling of the assistant in its shard
+
+        Arguments:
+            name (str): name of the assistant
+            is_enabled (bool): flag to profile the assistant
+        """
+        index: Optional[int] = self._shard_indexes.get(name)
+        if index is not None:
+            self._command_channels[index].put((SHARD_PROFILE,
+                                               (name, is_enabled)))
+
+    def save_costs(self, timeout: float):
+        """Saves the costs every stopped shard measured to the costs file
+
+        Arguments:
+            timeout (float): the most seconds to wait for the costs
+        """
+        deadline: float = monotonic() + timeout
+        costs: Dict[str, float] = {}
+        for _ in self.processes:
+            try:
+                costs.update(self._cost_channel.get(
+                    timeout=max(0.0, deadline - monotonic())))
+            except Empty:
+                break
+        if len(costs) > 0:
+            save_costs(self.costs_path, costs)
+
+    def _start_shard(self,
+                     index: int,
+                     assistants: List[Assistant]) -> Process:
+        self._feedback_channels[index] = Queue()
+        self._command_channels[index] = Queue()
+        process: Process = Process(target=run_shard,
+                                   args=(assistants,
+                                         self._channel,
+                                         self._feedback_channels[index],
+                                         self._command_channels[index],
+                                         self._cost_channel,
+                                         get_event_bus().get_channel(),
+                                         get_state_store().get_channel(),
+                                         get_metrics_registry().get_channel()))
+        self.processes.append(process)
+        process.start()
+        return process
+
+    def _publish_forever(self):
+        while 1:
+            shard_message: Union[ShardSignal,
+                                 ShardRemoval] = self._channel.get()
+            if isinstance(shard_message, list):
+                # every signal the removed assistants sent arrived before
+                get_publisher().discard(shard_message,
+                                        SHUTDOWN_GRACE_PERIOD)
+                self._removals.put(shard_message)
+                continue
+            (zone_id,
+             name,
+             color,
+             message,
+             is_blinking,
+             priority) = shard_message
+            index: Optional[int] = self._shard_indexes.get(name)
+            if index is None:
+                # the assistant is being removed
+                continue
+            get_publisher().put(
+                name,
+                {
+                    'pid': PID,
+                    'zoneId': zone_id,
+                    'color': color,
+                    'message': message,
+                    'name': name,
+                    'effect': 'BLINK' if is_blinking else 'SET_COLOR'
+                },
+                partial(self._feedback_channels[index].put, zone_id),
+                priority)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+from argparse import ArgumentParser, Namespace
+from benchmark import run_fake_server, use_temporary_state_store
+from das_client import set_das_base_url
+from json import dumps
+from multiprocessing import Pipe, Process
+from psutil import Process as SystemProcess
+from publisher import get_publisher
+from scheduler import Scheduler
+from settings import SHUTDOWN_GRACE_PERIOD
+from synthetic_assistant import SyntheticAssistant
+from tempfile import TemporaryDirectory
+from sys import exit, stdout
+from time import monotonic, sleep
+from typing import Dict, List, Optional, TextIO
+
+
+def take_sample(process: SystemProcess,
+                assistants: List[SyntheticAssistant],
+                started_at: float) -> Dict[str, float]:
+    """Samples the resources of this process and the lag of the assistants
+
+    NOTE: The lag is the longest one of any assistant since the previous
+    sample
+    """
+    return {
+        'elapsed_seconds': monotonic() - started_at,
+        'rss_bytes': process.memory_info().rss,
+        'open_files': process.num_fds(),
+        'threads': process.num_threads(),
+        'evaluations': sum(assistant.evaluation_count
+                           for assistant in assistants),
+        'max_lag_seconds': max(assistant.take_max_lag()
+                               for assistant in assistants),
+    }
+
+
+def find_violation(arguments: Namespace,
+                   baseline: Dict[str, float],
+                   sample: Dict[str, float]) -> Optional[str]:
+    """Returns why the sample grew too much from the baseline, if it did"""
+    if sample['rss_bytes'] > baseline['rss_bytes'] * (
+            1 + arguments.max_rss_growth):
+        return ('RSS grew from ' + str(baseline['rss_bytes']) + ' to ' +
+                str(sample['rss_bytes']) + ' bytes')
+    if sample['open_files'] > baseline['open_files'] + arguments.max_fd_growth:
+        return ('Open files grew from ' + str(baseline['open_files']) +
+                ' to ' + str(sample['open_files']))
+    if sample['threads'] > baseline['threads'] + arguments.max_thread_growth:
+        return ('Threads grew from ' + str(baseline['threads']) + ' to ' +
+                str(sample['threads']))
+    if sample['max_lag_seconds'] > arguments.max_lag:
+        return ('An evaluation started ' +
+                format(sample['max_lag_seconds'], '.2f') + ' seconds late')
+    return None
+
+
+def run_soak_test(arguments: Namespace, output: TextIO) -> Optional[str]:
+    """Runs synthetic assistants against a fake Das API until a growth limit
+    is exceeded or the duration is over
+
+    Every sample is written to `output` as one line of JSON. Once the warmup
+    is over, the next sample becomes the baseline, and every later sample is
+    compared against it
+
+    Returns:
+        Optional[str]: why the soak test failed, if it did
+    """
+    connection, server_connection = Pipe()
+    server: Process = Process(target=run_fake_server,
+                              args=(server_connection,
+                                    arguments.port,
+                                    arguments.latency,
+                                    arguments.error_rate,
+                                    False),
+                              daemon=True)
+    server.start()
+    set_das_base_url(connection.recv())
+    state_directory: TemporaryDirectory = use_temporary_state_store()
+    assistants: List[SyntheticAssistant] = [
+        SyntheticAssistant('Synthetic ' + str(index),
+                           arguments.delay,
+                           'SOAK_' + str(index),
+                           False,
+                           arguments.cpu_cost,
+                           arguments.io_cost,
+                           arguments.change_interval,
+                           False)
+        for index in range(arguments.assistants)]
+    process: SystemProcess = SystemProcess()
+    scheduler: Scheduler = Scheduler(assistants)
+    started_at: float = monotonic()
+    scheduler.start()
+    baseline: Optional[Dict[str, float]] = None
+    violation: Optional[str] = None
+    while violation is None and monotonic() - started_at < arguments.duration:
+        sleep(arguments.sample_interval)
+        sample: Dict[str, float] = take_sample(process, assistants, started_at)
+        output.write(dumps(sample, sort_keys=True) + '\n')
+        output.flush()
+        if sample['elapsed_seconds'] < arguments.warmup:
+            continue
+        if baseline is None:
+            baseline = sample
+        violation = find_violation(arguments, baseline, sample)
+    scheduler.stop(SHUTDOWN_GRACE_PERIOD)
+    get_publisher().close(SHUTDOWN_GRACE_PERIOD)
+    state_directory.cleanup()
+    connection.send('stop')
+    connection.recv()
+    server.join()
+    return violation
+
+
+def parse_arguments() -> Namespace:
+    parser: ArgumentParser = ArgumentParser(
+        description='Soaks the driver with synthetic assistants against a ' +
+                    'fake Das API, failing if its resources keep growing')
+    parser.add_argument('--assistants', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=24 * 60 * 60,
+                        help='seconds to run the assistants for')
+    parser.add_argument('--warmup', type=float, default=5 * 60,
+                        help='seconds before the baseline sample is taken')
+    parser.add_argument('--sample-interval', type=float, default=60.0,
+                        help='seconds between two samples')
+    parser.add_argument('--delay', type=float, default=1.0,
+                        help='seconds between evaluations of an assistant')
+    parser.add_argument('--cpu-cost', type=float, default=0.001,
+                        help='seconds of CPU every evaluation spends')
+    # the defaults keep the worker pool well below saturation, so that any
+    # growth is a leak rather than evaluations piling up
+    parser.add_argument('--io-cost', type=float, default=0.01,
+                        help='seconds every evaluation blocks for')
+    parser.add_argument('--change-interval', type=int, default=5,
+                        help='evaluations between two state changes')
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='seconds the fake Das API takes to answer')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='fraction of requests answered with a 500')
+    parser.add_argument('--port', type=int, default=27312,
+                        help='port of the fake Das API')
+    parser.add_argument('--max-rss-growth', type=float, default=0.25,
+                        help='fraction RSS may grow past the baseline')
+    parser.add_argument('--max-fd-growth', type=int, default=10,
+                        help='open files that may be added to the baseline')
+    parser.add_argument('--max-thread-growth', type=int, default=2,
+                        help='threads that may be added to the baseline')
+    parser.add_argument('--max-lag', type=float, default=1.0,
+                        help='seconds an evaluation may start late')
+    parser.add_argument('--output',
+                        help='file to write the samples to instead of stdout')
+    return parser.parse_args()
+
+
+def main():
+    """Runs the soak test and exits with 1 if a growth limit was exceeded
+
+    NOTE: The soak test can simply be run by navigating to this directory and
+    running `./soak_test.py`, see `./soak_test.py --help` for its parameters
+    and limits
+    """
+    arguments: Namespace = parse_arguments()
+    violation: Optional[str]
+    if arguments.output is None:
+        violation = run_soak_test(arguments, stdout)
+    else:
+        with open(arguments.output, 'w') as output_file:
+            violation = run_soak_test(arguments, output_file)
+    if violation is not None:
+        print('Soak test failed: ' + violation)
+        exit(1)
+    print('Soak test passed')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+from argparse import ArgumentParser, Namespace
+from fake_das_server import FakeDasServer
+from os import killpg, path
+from settings import BASE_URL
+from signal import SIGKILL
+from subprocess import DEVNULL, PIPE, Popen, TimeoutExpired
+from sys import executable
+from tempfile import TemporaryFile
+from time import perf_counter, sleep
+from typing import Dict, IO, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+# runs in a child process, which starts the driver exactly like `./driver.py`
+# but against the fake Das API and without waiting for input
+STARTUP_SCRIPT: str = '''
+from das_client import set_das_base_url
+from signal import SIGTERM, signal
+from sys import argv
+from time import perf_counter, sleep
+set_das_base_url(argv[1])
+import driver
+signal(SIGTERM, driver.raise_keyboard_interrupt)
+try:
+    started_at = perf_counter()
+    all_assistants = driver.load_assistants()
+    print(perf_counter() - started_at, flush=True)
+    driver.initiate_all_bindings(all_assistants)
+    while 1:
+        sleep(60)
+except KeyboardInterrupt:
+    driver.kill_all_bindings()
+'''
+
+
+def summarize_import_times(import_time_output: str) -> Dict[str, float]:
+    """Sums the `-X importtime` output per top-level package
+
+    Arguments:
+        import_time_output (str): what `-X importtime` wrote to stderr
+
+    Returns:
+        Dict[str, float]: seconds spent importing every top-level package
+    """
+    package_times: Dict[str, float] = {}
+    for line in import_time_output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        columns: List[str] = line[len('import time:'):].split('|')
+        if len(columns) != 3 or not columns[0].strip().isdigit():
+            continue
+        package: str = columns[2].strip().split('.')[0]
+        package_times[package] = (package_times.get(package, 0.0) +
+                                  int(columns[0]) / 1000000)
+    return package_times
+
+
+def get_error_output(import_time_output: str) -> str:
+    """Returns whatever else than import times the driver wrote to stderr"""
+    return '\n'.join(line for line in import_time_output.splitlines()
+                     if not line.startswith('import time:'))
+
+
+def measure_startup(
+        arguments: Namespace) -> Tuple[Dict[str, float],
+                                       Optional[float],
+                                       Optional[float],
+                                       Optional[int],
+                                       str]:
+    """Starts the driver in a child process until its first signal arrives
+
+    NOTE: The driver runs in its own session, so that every binding it could
+    not shut down in time is killed along with it
+
+    Returns:
+        Tuple[Dict[str, float], Optional[float], Optional[float],
+            Optional[int], str]: the import time of every top-level package,
+            the seconds loading the assistants took, the seconds from
+            starting the process to the first signal reaching the fake Das
+            API (or `None` if it never did), the exit status of the driver if
+            it exited on its own before that, and what else it wrote to stderr
+    """
+    server: FakeDasServer = FakeDasServer('127.0.0.1',
+                                          arguments.port,
+                                          urlsplit(BASE_URL).path,
+                                          0.0,
+                                          0.0,
+                                          True)
+    server.start()
+    # the import times are far too long to be left waiting in a pipe
+    import_time_file: IO[str] = TemporaryFile('w+')
+    started_at: float = perf_counter()
+    driver: Popen = Popen([executable,
+                           '-X', 'importtime',
+                           '-c', STARTUP_SCRIPT,
+                           server.get_base_url()],
+                          cwd=path.dirname(path.abspath(__file__)),
+                          stdin=DEVNULL,
+                          stdout=PIPE,
+                          stderr=import_time_file,
+                          universal_newlines=True,
+                          start_new_session=True)
+    init_output: str = driver.stdout.readline().strip()
+    while (len(server.received_signals) == 0 and
+           perf_counter() - started_at < arguments.timeout and
+           driver.poll() is None):
+        sleep(0.01)
+    first_publish_seconds: Optional[float] = (
+        server.received_signals[0][0] - started_at
+        if len(server.received_signals) > 0 else None)
+    exit_status: Optional[int] = driver.poll()
+    driver.terminate()
+    try:
+        driver.communicate(timeout=arguments.timeout)
+    except TimeoutExpired:
+        # the bindings are in the session of the driver, and keep its stdout
+        killpg(driver.pid, SIGKILL)
+        try:
+            driver.communicate(timeout=arguments.timeout)
+        except TimeoutExpired:
+            print('The driver could not be killed, pid ' + str(driver.pid))
+    server.stop()
+    with import_time_file:
+        import_time_file.seek(0)
+        import_time_output: str = import_time_file.read()
+    init_seconds: Optional[float] = (float(init_output)
+                                     if init_output != '' else None)
+    return (summarize_import_times(import_time_output),
+            init_seconds,
+            first_publish_seconds,
+            exit_status,
+            get_error_output(import_time_output))
+
+
+def format_seconds(seconds: float) -> str:
+    return format(seconds * 1000, '.1f') + ' ms'
+
+
+def parse_arguments() -> Namespace:
+    parser: ArgumentParser = ArgumentParser(
+        description='Reports how long the driver takes to start')
+    parser.add_argument('--top', type=int, default=15,
+                        help='amount of packages to list')
+    parser.add_argument('--timeout', type=float, default=60.0,
+                        help='seconds to wait for the first publish')
+    parser.add_argument('--port', type=int, default=27313,
+                        help='port of the fake Das API')
+    return parser.parse_args()
+
+
+def main():
+    """Prints the slowest imports of the driver and its time to first publish
+
+    NOTE: The driver loads the assistants from `CONFIG_PATH` or config.py
+    and binds every assistant as usual, so the first publish waits on whichever
+    assistant evaluates first
+    """
+    arguments: Namespace = parse_arguments()
+    (package_times,
+     init_seconds,
+     first_publish_seconds,
+     exit_status,
+     error_output) = measure_startup(arguments)
+    print('Imports: ' + format_seconds(sum(package_times.values())) +
+          ' in ' + str(len(package_times)) + ' top-level packages')
+    for package, seconds in sorted(package_times.items(),
+                                   key=lambda item: item[1],
+                                   reverse=True)[:arguments.top]:
+        print('  ' + format_seconds(seconds).rjust(10) + '  ' + package)
+    if init_seconds is not None:
+        print('Loading the assistants: ' + format_seconds(init_seconds))
+    else:
+        print('Loading the assistants did not finish')
+    if first_publish_seconds is not None:
+        print('First publish: ' + format_seconds(first_publish_seconds) +
+              ' after starting the process')
+    elif exit_status is not None:
+        print('No signal was published, the driver exited with status ' +
+              str(exit_status))
+    else:
+        print('No signal was published within ' + str(arguments.timeout) +
+              ' seconds')
+    if error_output != '':
+        print('The driver wrote to stderr:')
+        print(error_output)
+
+
+if __name__ == '__main__':
+    main()
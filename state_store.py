@@ -0,0 +1,193 @@
+from json import dump, load
+from multiprocessing import Queue
+from os import replace
+from settings import STATE_FLUSH_INTERVAL, STATE_PATH
+from threading import Condition, Lock, Thread
+from time import sleep
+from typing import Dict, List, Optional, Tuple
+
+
+# what is remembered of an assistant between runs:
+# {'type': class name, 'state': str, 'values': [color, message, is_blinking],
+#  'fields': {...}} where `fields` are whatever the assistant persists
+AssistantSnapshot = Dict[str, object]
+
+
+class StateStore:
+    """Remembers the last state of every assistant on disk between runs
+
+    Snapshots are kept in memory and written in a single batch at most every
+    `flush_interval` seconds, and only if any of them changed since the last
+    write. The file is replaced atomically, so a crash never leaves a torn
+    file behind
+
+    NOTE: The file is read once when the store is created, so snapshots
+    recorded by this run are never mistaken for those of the previous run.
+    Only snapshots recorded by this run are written, so assistants that are
+    not bound anymore are forgotten
+
+    Attributes:
+        path (str): the path of the JSON file
+        flush_interval (float): the most seconds a changed snapshot waits
+            before it is written
+    """
+    def __init__(self, path: str, flush_interval: float):
+        self.path: str = path
+        self.flush_interval: float = flush_interval
+        self._snapshots: Dict[str, AssistantSnapshot] = {}
+        self._previous_snapshots: Dict[str, AssistantSnapshot] = self._load()
+        self._is_dirty: bool = False
+        self._condition: Condition = Condition()
+        # held for a whole write, since the flusher thread and the driver
+        # shutting down share the temporary file
+        self._flush_lock: Lock = Lock()
+        self._flusher: Optional[Thread] = None
+        self._channel: Optional[Queue] = None
+
+    def get_snapshot(self, name: str) -> Optional[AssistantSnapshot]:
+        """Returns the snapshot the previous run left for the assistant"""
+        return self._previous_snapshots.get(name)
+
+    def record(self, name: str, snapshot: AssistantSnapshot):
+        """Remembers the snapshot of the assistant until the next write"""
+        with self._condition:
+            if self._snapshots.get(name) == snapshot:
+                return
+            self._snapshots[name] = snapshot
+            self._is_dirty = True
+            if self._flusher is None:
+                self._flusher = Thread(target=self._flush_forever,
+                                       name='State Store',
+                                       daemon=True)
+                self._flusher.start()
+
+    def forget(self, names: List[str]):
+        """Drops the snapshots of assistants that were unbound or changed"""
+        with self._condition:
+            for name in names:
+                self._previous_snapshots.pop(name, None)
+                if self._snapshots.pop(name, None) is not None:
+                    self._is_dirty = True
+
+    def flush(self):
+        """Writes every snapshot right away if any of them changed
+
+        NOTE: Writes happen one at a time, so the newest snapshots are
+        always written last
+        """
+        with self._flush_lock:
+            with self._condition:
+                if not self._is_dirty:
+                    return
+                self._is_dirty = False
+                snapshots: Dict[str, AssistantSnapshot] = dict(
+                    self._snapshots)
+            try:
+                with open(self.path + '.tmp', 'w') as state_file:
+                    dump(snapshots, state_file)
+                replace(self.path + '.tmp', self.path)
+            except (OSError, TypeError, ValueError):
+                # the next run simply starts cold, like without a store
+                return
+
+    def get_channel(self) -> Queue:
+        """Returns a channel whose snapshots are recorded by this store
+
+        NOTE: Binding processes and shards send their snapshots to the
+        driver through it, see `ChannelStateStore`. The channel and the thread
+        that drains it are created on first use
+        """
+        with self._condition:
+            if self._channel is None:
+                self._channel = Queue()
+                Thread(target=self._forward_forever,
+                       args=(self._channel,),
+                       name='State Forwarder',
+                       daemon=True).start()
+            return self._channel
+
+    def _forward_forever(self, channel: Queue):
+        while 1:
+            name, snapshot = channel.get()
+            self.record(name, snapshot)
+
+    def _flush_forever(self):
+        while 1:
+            sleep(self.flush_interval)
+            self.flush()
+
+    def _load(self) -> Dict[str, AssistantSnapshot]:
+        try:
+            with open(self.path) as state_file:
+                snapshots: object = load(state_file)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(snapshots, dict):
+            return {}
+        return snapshots
+
+
+class ChannelStateStore(StateStore):
+    """Sends the snapshots of a binding process or shard to the driver
+
+    NOTE: Only the `StateStore` of the driver writes the file, so that
+    processes never overwrite each other's snapshots
+
+    Attributes:
+        channel (Queue): carries the snapshots to the driver
+    """
+    def __init__(self, channel: Queue):
+        # the file is neither read nor written here, so the store is not
+        # initialized like the one of the driver
+        self.channel: Queue = channel
+        self._last_snapshots: Dict[str, AssistantSnapshot] = {}
+        self._lock: Lock = Lock()
+
+    def get_snapshot(self, name: str) -> Optional[AssistantSnapshot]:
+        # the driver restores the assistants before they are bound
+        return None
+
+    def record(self, name: str, snapshot: AssistantSnapshot):
+        # unchanged snapshots never cross the process boundary
+        with self._lock:
+            if self._last_snapshots.get(name) == snapshot:
+                return
+            self._last_snapshots[name] = snapshot
+        message: Tuple[str, AssistantSnapshot] = (name, snapshot)
+        self.channel.put(message)
+
+    def forget(self, names: List[str]):
+        with self._lock:
+            for name in names:
+                self._last_snapshots.pop(name, None)
+
+    def flush(self):
+        return
+
+
+_state_store: Optional[StateStore] = None
+_state_store_lock: Lock = Lock()
+
+
+def set_state_store(state_store: StateStore):
+    """Replaces the `StateStore` shared by every assistant in this process
+
+    NOTE: Used by binding processes and shards, whose snapshots are written
+    by the driver rather than by the process itself
+    """
+    global _state_store
+    with _state_store_lock:
+        _state_store = state_store
+
+
+def get_state_store() -> StateStore:
+    """Returns the `StateStore` shared by every assistant in this process
+
+    NOTE: The store is created lazily so that forked bindings never inherit a
+    store whose flusher thread only exists in their parent
+    """
+    global _state_store
+    with _state_store_lock:
+        if _state_store is None:
+            _state_store = StateStore(STATE_PATH, STATE_FLUSH_INTERVAL)
+        return _state_store
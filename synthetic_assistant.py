@@ -0,0 +1,104 @@
+from assistant import Assistant
+from settings import COLORS
+from threading import Lock
+from time import monotonic, perf_counter, sleep
+from typing import Dict, Optional
+
+
+class SyntheticAssistant(Assistant):
+    """An assistant desgined to put a controllable load on the driver
+
+    Every evaluation spins the CPU for `cpu_cost` seconds and then blocks for
+    `io_cost` seconds, like an assistant waiting on a remote server would.
+    The state changes every `change_interval` evaluations, each state having
+    its own message so that every change is published
+
+    NOTE: Used by `benchmark.py`, which measures publish latencies from the
+    `perf_counter()` each state was first identified at, see `changed_at`,
+    and by `soak_test.py`, which samples the evaluation lag, see
+    `take_max_lag()`
+
+    Attributes:
+        name (str): name of the assistant
+        delay (str): the delay between evaluations
+        zone_id (str): the zone_id to bind the color to
+        is_muted (bool): flag to deliver with no message
+        cpu_cost (float): seconds of CPU every evaluation spends
+        io_cost (float): seconds every evaluation blocks for
+        change_interval (int): evaluations between two state changes
+        evaluation_count (int): amount of states identified so far
+        changed_at (Dict[str, float]): the `perf_counter()` every message was
+            first identified at, unless `is_recording_changes` is not set
+        is_recording_changes (bool): flag to fill `changed_at`, which only
+            grows
+    """
+
+    def __init__(self,
+                 name: str,
+                 delay: float,
+                 zone_id: str,
+                 is_muted: bool,
+                 cpu_cost: float,
+                 io_cost: float,
+                 change_interval: int,
+                 is_recording_changes: bool = True):
+        Assistant.__init__(self, name, delay, zone_id, is_muted)
+        self.cpu_cost: float = cpu_cost
+        self.io_cost: float = io_cost
+        self.change_interval: int = change_interval
+        self.evaluation_count: int = 0
+        self.changed_at: Dict[str, float] = {}
+        self.is_recording_changes: bool = is_recording_changes
+        self._last_started_at: Optional[float] = None
+        self._max_lag: float = 0.0
+        self._count_lock: Lock = Lock()
+
+    def __getstate__(self) -> Dict[str, object]:
+        state: Dict[str, object] = Assistant.__getstate__(self)
+        del state['_count_lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, object]):
+        Assistant.__setstate__(self, state)
+        self._count_lock = Lock()
+
+    def take_max_lag(self) -> float:
+        """Returns the longest evaluation lag since the last call and resets it
+
+        The lag of an evaluation is how much later than `delay` seconds after
+        the previous evaluation it started
+        """
+        with self._count_lock:
+            max_lag: float = self._max_lag
+            self._max_lag = 0.0
+            return max_lag
+
+    def state_identifier(self) -> str:
+        started_at: float = monotonic()
+        with self._count_lock:
+            if self._last_started_at is not None:
+                self._max_lag = max(self._max_lag,
+                                    started_at - self._last_started_at -
+                                    self.delay)
+            self._last_started_at = started_at
+        spin_until: float = perf_counter() + self.cpu_cost
+        while perf_counter() < spin_until:
+            pass
+        if self.io_cost > 0:
+            sleep(min(self.io_cost, self._get_remaining_time()))
+        with self._count_lock:
+            state: str = str(self.evaluation_count // self.change_interval)
+            self.evaluation_count += 1
+        return state
+
+    def color_identifier(self, state: str) -> str:
+        if int(state) % 2 == 0:
+            return COLORS['light green']
+        else:
+            return COLORS['light blue']
+
+    def message_identifier(self, state: str) -> str:
+        message: str = self.name + ' is in state ' + state
+        if self.is_recording_changes and message not in self.changed_at:
+            self.changed_at[message] = perf_counter()
+        return message
@@ -29,7 +29,8 @@ class TemplateAssistant(Assistant):
 
     def state_identifier(self) -> str:
         try:
-            # TODO: perform any logic to find the state
+            # TODO: perform any logic to find the state, passing
+            # `self._get_remaining_time()` as the timeout of any blocking call
             return self.example_state
         except AssistantError as e:
             e.elaborate()
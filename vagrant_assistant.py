@@ -1,11 +1,15 @@
 from assistant import Assistant
 from errors import (AssistantError,
                     CommandFailedError,
+                    DeadlineExceededError,
                     StateNotFoundError,
                     ValueNotFoundError)
 from settings import COLORS, IS_DEBUG_MODE
-from subprocess import check_output, CalledProcessError, STDOUT
-from typing import Dict
+from subprocess import (check_output,
+                        CalledProcessError,
+                        STDOUT,
+                        TimeoutExpired)
+from typing import Dict, List
 
 
 class VagrantAssistant(Assistant):
@@ -41,14 +45,18 @@ class VagrantAssistant(Assistant):
         self.ABORTED: str = 'aborted'
 
     def _get_vagrant_output(self) -> str:
-        cmd: str = 'vagrant status ' + self.vagrant_vm_id
+        cmd: List[str] = ['vagrant', 'status', self.vagrant_vm_id]
         try:
+            # without a shell, the timeout kills `vagrant` itself
             return check_output(cmd,
                                 stderr=STDOUT,
-                                shell=True,
-                                text=True)
-        except CalledProcessError:
-            raise CommandFailedError(self.name, cmd)
+                                text=True,
+                                timeout=self._get_remaining_time())
+        except (CalledProcessError, OSError):
+            # `OSError` covers `vagrant` not being installed at all
+            raise CommandFailedError(self.name, ' '.join(cmd))
+        except TimeoutExpired:
+            raise DeadlineExceededError(self.name, self.deadline)
 
     def state_identifier(self) -> str:
         try:
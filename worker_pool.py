@@ -0,0 +1,196 @@
+from concurrent.futures import Executor, Future
+from heapq import heappop, heappush
+from settings import DEFAULT_PRIORITY, EVALUATION_POOL_SIZE, PRIORITIES
+from threading import Condition, Lock, Thread
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# what a `WorkerPool` queues: rank, sequence, future, function, arguments
+WorkItem = Tuple[int,
+                 int,
+                 Future,
+                 Callable[..., object],
+                 Tuple[object, ...],
+                 Dict[str, object]]
+
+
+class ConcurrencyGauge:
+    """Tracks how many evaluations are running at once in this process
+
+    NOTE: The peak is the highest amount of concurrent evaluations seen since
+    the gauge was created or the peak was last reset
+    """
+    def __init__(self):
+        self._current: int = 0
+        self._peak: int = 0
+        self._lock: Condition = Condition()
+
+    def enter(self):
+        with self._lock:
+            self._current += 1
+            self._peak = max(self._peak, self._current)
+
+    def exit(self):
+        with self._lock:
+            self._current -= 1
+            if self._current == 0:
+                self._lock.notify_all()
+
+    def wait_until_idle(self, timeout: float) -> bool:
+        """Waits up to `timeout` seconds for every evaluation to finish
+
+        Returns:
+            bool: whether every evaluation finished in time
+        """
+        with self._lock:
+            return self._lock.wait_for(lambda: self._current == 0, timeout)
+
+    def get_current(self) -> int:
+        return self._current
+
+    def get_peak(self) -> int:
+        return self._peak
+
+    def reset_peak(self) -> int:
+        """Resets the peak to the current amount and returns the old peak"""
+        with self._lock:
+            peak: int = self._peak
+            self._peak = self._current
+            return peak
+
+
+class WorkerPool(Executor):
+    """A pool of reused threads that runs the most urgent work first
+
+    Work waiting for a thread is taken by priority, in the order of
+    `PRIORITIES`, and in the order it was submitted within a priority. So
+    when every thread is busy, an urgent evaluation never waits behind a
+    backlog of routine ones
+
+    NOTE: Threads are spawned as work is submitted, up to `max_workers`, and
+    only while no idle thread can take the work
+
+    Attributes:
+        max_workers (int): the most threads the pool holds
+        thread_name_prefix (str): the prefix of the names of the threads
+    """
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self.max_workers: int = max_workers
+        self.thread_name_prefix: str = thread_name_prefix
+        self._queue: List[WorkItem] = []
+        self._sequence: int = 0
+        self._threads: List[Thread] = []
+        self._idle_count: int = 0
+        self._is_shutdown: bool = False
+        self._condition: Condition = Condition()
+
+    def submit(self,
+               fn: Callable[..., object],
+               *args: object,
+               **kwargs: object) -> Future:
+        """Queues the call with the `DEFAULT_PRIORITY`"""
+        return self.submit_with_priority(DEFAULT_PRIORITY, fn, *args,
+                                         **kwargs)
+
+    def submit_with_priority(self,
+                             priority: str,
+                             fn: Callable[..., object],
+                             *args: object,
+                             **kwargs: object) -> Future:
+        """Queues the call behind any work of the same or a higher priority
+
+        Arguments:
+            priority (str): one of the `PRIORITIES` in settings
+            fn (Callable[..., object]): the function to call
+
+        Returns:
+            Future: the result of the call
+        """
+        future: Future = Future()
+        with self._condition:
+            if self._is_shutdown:
+                raise RuntimeError('cannot schedule new futures after ' +
+                                   'shutdown')
+            heappush(self._queue, (PRIORITIES.index(priority),
+                                   self._sequence,
+                                   future,
+                                   fn,
+                                   args,
+                                   kwargs))
+            self._sequence += 1
+            if (len(self._queue) > self._idle_count and
+                    len(self._threads) < self.max_workers):
+                thread: Thread = Thread(
+                    target=self._work_forever,
+                    name=(self.thread_name_prefix + '_' +
+                          str(len(self._threads))),
+                    daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._condition.notify()
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        """Stops taking work, and stops every thread once the queue is empty
+
+        Arguments:
+            wait (bool): flag to wait for every thread to stop
+            cancel_futures (bool): flag to cancel the work still queued
+        """
+        with self._condition:
+            self._is_shutdown = True
+            if cancel_futures:
+                for work_item in self._queue:
+                    work_item[2].cancel()
+                self._queue.clear()
+            self._condition.notify_all()
+            threads: List[Thread] = list(self._threads)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _work_forever(self):
+        while 1:
+            with self._condition:
+                self._idle_count += 1
+                while len(self._queue) == 0 and not self._is_shutdown:
+                    self._condition.wait()
+                self._idle_count -= 1
+                if len(self._queue) == 0:
+                    return
+                _, _, future, fn, args, kwargs = heappop(self._queue)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result: object = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+
+_concurrency_gauge: ConcurrencyGauge = ConcurrencyGauge()
+_worker_pool: Optional[WorkerPool] = None
+_worker_pool_lock: Lock = Lock()
+
+
+def get_worker_pool() -> WorkerPool:
+    """Returns the pool that runs every evaluation in this process
+
+    The pool holds at most `EVALUATION_POOL_SIZE` threads, which are reused
+    from one evaluation to the next rather than spawned for every evaluation,
+    and take the most urgent evaluation waiting first
+
+    NOTE: The pool is created lazily so that forked bindings never inherit
+    the worker threads of their parent
+    """
+    global _worker_pool
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            _worker_pool = WorkerPool(EVALUATION_POOL_SIZE, 'Evaluator')
+        return _worker_pool
+
+
+def get_concurrency_gauge() -> ConcurrencyGauge:
+    """Returns the gauge of evaluations running in this process"""
+    return _concurrency_gauge
@@ -2,6 +2,7 @@ from assistant import Assistant
 from datetime import datetime, timedelta
 from errors import (AssistantError,
                     ConnectionFailedError,
+                    DeadlineExceededError,
                     NoInternetError,
                     StateNotFoundError,
                     ValueNotFoundError)
@@ -76,7 +77,7 @@ class YamlAssistant(Assistant):
 
     def state_identifier(self) -> str:
         try:
-            current_version: str = self._get_current_version()
+            current_version: str = self._retry(self._get_current_version)
             if self._most_recent_version == '':
                 # if no version was found before this version, we are going to
                 # assume the first version found is NOT new
@@ -127,9 +128,25 @@ class YamlAssistant(Assistant):
         else:
             raise ValueNotFoundError(self.name, state, 'message')
 
+    def _get_persisted_fields(self) -> Dict[str, object]:
+        # the notification window carries on across restarts
+        if self._most_recent_version == '':
+            return {}
+        return {'most_recent_version': self._most_recent_version,
+                'most_recent_version_time':
+                    self._most_recent_version_time.isoformat()}
+
+    def _restore_persisted_fields(self, fields: Dict[str, object]):
+        if 'most_recent_version' not in fields:
+            return
+        self._most_recent_version_time = datetime.fromisoformat(
+            str(fields['most_recent_version_time']))
+        self._most_recent_version = str(fields['most_recent_version'])
+
     def _get_current_version(self) -> str:
         try:
-            response: Response = get(self.yaml_url)
+            response: Response = get(self.yaml_url,
+                                     timeout=self._get_remaining_time())
             if not response.ok:
                 raise ConnectionFailedError(self.name,
                                             'GET',
@@ -144,6 +161,8 @@ class YamlAssistant(Assistant):
                 else:
                     break
             raise YamlArgumentError(self.name)
+        except requests_exceptions.Timeout:
+            raise DeadlineExceededError(self.name, self.deadline)
         except (requests_exceptions.ConnectionError,
                 url_exceptions.NewConnectionError):
             raise NoInternetError(self.name)